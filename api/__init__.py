@@ -1,11 +1,14 @@
-from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi import FastAPI, HTTPException, status
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from fastapi_pagination import add_pagination
 
+from app.database import async_engine, db
 from config import config
 
 from .utils import custom_generate_unique_id
 from .routes import router
+from .controllers.super_search_index import is_super_search_index_enabled, super_search_index
+from .controllers.query_metrics import install_query_hooks, query_metrics, query_metrics_middleware
 
 CFG = config()
 
@@ -24,6 +27,25 @@ app = FastAPI(
 
 app.include_router(router)
 add_pagination(app)
+app.middleware("http")(query_metrics_middleware)
+
+
+@app.on_event("startup")
+def load_super_search_index():
+    """Build the in-memory super search index at worker start"""
+
+    if is_super_search_index_enabled():
+        with db.Session() as session:
+            super_search_index.get(session)
+
+
+@app.on_event("startup")
+def setup_query_metrics():
+    """Measure SQL statements of the database engine (no-op unless metrics are enabled)"""
+
+    install_query_hooks(db.get_engine())
+    if async_engine:
+        install_query_hooks(async_engine.sync_engine)
 
 
 @app.get("/", tags=["root"])
@@ -31,6 +53,16 @@ async def root():
     return RedirectResponse(url="/docs")
 
 
+@app.get("/metrics", tags=["root"], response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    """Per-route SQL statement metrics in the Prometheus text format"""
+
+    if not query_metrics.enabled:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Metrics are disabled")
+
+    return query_metrics.to_prometheus()
+
+
 # TODO: add basic auth to swagger
 # security = HTTPBasic()
 # def swagger_auth(credentials: Annotated[HTTPBasicCredentials, Depends(security)]):
@@ -1,11 +1,12 @@
 from datetime import datetime
-import json
-import os
+from typing import TypeVar
+
 import sqlalchemy as sa
 from fastapi import UploadFile
 
-from api.dependency.s3_client import get_s3_connect
-from api.utils import get_quick_movie_file_path, process_movie_rating
+from api.controllers.images import store_image
+from api.controllers.visual_profiles import VisualProfileNotFoundError, create_visual_profile
+from api.controllers.movie_rating import recalculate_movie_rating
 import app.schema as s
 import app.models as m
 from app.logger import log
@@ -15,6 +16,8 @@ from config import config
 
 CFG = config()
 
+KeyedModelT = TypeVar("KeyedModelT", bound=m.KeyedModel)
+
 
 def create_new_movie(db: Session, form_data: s.MovieFormData) -> m.Movie:
     shared_universe = None
@@ -55,6 +58,26 @@ def create_new_movie(db: Session, form_data: s.MovieFormData) -> m.Movie:
             e.args = (*e.args, "Base movie not found")
             raise e
 
+    actors_keys = [actor_key.key for actor_key in form_data.actors_keys]
+    actors_db = {actor.key: actor for actor in db.scalars(sa.select(m.Actor).where(m.Actor.key.in_(actors_keys)))}
+    actors = []
+    for actor_key in actors_keys:
+        if actor_key not in actors_db:
+            log(log.ERROR, "Actor [%s] not found", actor_key)
+            raise Exception(f"Actor [{actor_key}] not found")
+        actors.append(actors_db[actor_key])
+
+    directors_db = {
+        director.key: director
+        for director in db.scalars(sa.select(m.Director).where(m.Director.key.in_(form_data.directors_keys)))
+    }
+    directors = []
+    for director_key in form_data.directors_keys:
+        if director_key not in directors_db:
+            log(log.ERROR, "Director [%s] not found", director_key)
+            raise Exception(f"Director [{director_key}] not found")
+        directors.append(directors_db[director_key])
+
     translations = [
         m.MovieTranslation(
             language=s.Language.UK.value,
@@ -84,171 +107,64 @@ def create_new_movie(db: Session, form_data: s.MovieFormData) -> m.Movie:
         collection_order=collection_order,
         shared_universe_id=shared_universe.id if shared_universe else None,
         shared_universe_order=form_data.shared_universe_order,
-        actors=[
-            db.scalar(sa.select(m.Actor).where(m.Actor.key == actor_key))
-            for actor_key in [actor_key.key for actor_key in form_data.actors_keys]
-        ],
-        directors=[
-            db.scalar(sa.select(m.Director).where(m.Director.key == director_key))
-            for director_key in form_data.directors_keys
-        ],
-        genres=[db.scalar(sa.select(m.Genre).where(m.Genre.key == genre_key.key)) for genre_key in form_data.genres],
-        subgenres=[
-            db.scalar(sa.select(m.Subgenre).where(m.Subgenre.key == subgenre_key.key))
-            for subgenre_key in form_data.subgenres
-        ],
-        specifications=[
-            db.scalar(sa.select(m.Specification).where(m.Specification.key == specification_key.key))
-            for specification_key in form_data.specifications
-        ],
-        keywords=[
-            db.scalar(sa.select(m.Keyword).where(m.Keyword.key == keyword_key.key))
-            for keyword_key in form_data.keywords
-        ],
-        action_times=[
-            db.scalar(sa.select(m.ActionTime).where(m.ActionTime.key == action_time_key.key))
-            for action_time_key in form_data.action_times
-        ],
+        actors=actors,
+        directors=directors,
     )
 
 
-def add_poster_to_new_movie(new_movie: m.Movie, file: UploadFile, UPLOAD_DIRECTORY: str):
-    """For local work only"""
-
-    app_env = os.getenv("APP_ENV")
-
+def add_poster_to_new_movie(new_movie: m.Movie, file: UploadFile):
     try:
-        if app_env == "testing":
-            file_name = file.filename if file.filename else ""
-            file_location = f"{CFG.TEST_DATA_PATH}{file_name}"
-        else:
-            file_name = f"{new_movie.id}_{file.filename}"
-            file_location = f"{UPLOAD_DIRECTORY}{file_name}"
-
-        with open(file_location, "wb+") as file_object:
-            file_object.write(file.file.read())
-
-        new_movie.poster = file_name
+        new_movie.poster = store_image(file, "posters")
     except Exception as e:
         log(log.ERROR, "Error uploading poster [%s]: %s", new_movie.key, e)
         e.args = (*e.args, "Error uploading poster")
         raise e
 
 
-def add_image_to_s3_bucket(file: UploadFile, upload_directory: str, file_name: str):
-    try:
-        s3_object_key = f"{upload_directory}/{file_name}"
+def get_ids_by_keys(db: Session, model: type[KeyedModelT], keys: list[str]) -> dict[str, int]:
+    """Resolve entity keys to ids with one IN query"""
 
-        s3_client = get_s3_connect()
+    if not keys:
+        return {}
+    return {key: id for key, id in db.execute(sa.select(model.key, model.id).where(model.key.in_(set(keys))))}
 
-        s3_client.upload_fileobj(
-            file.file, CFG.AWS_S3_BUCKET_NAME, s3_object_key, ExtraArgs={"ContentType": file.content_type}
-        )
-    except Exception as e:
-        log(log.ERROR, "Error uploading image to S3 Bucket [%s]: %s", file_name, e)
-        e.args = (*e.args, "Error uploading image to S3 Bucket")
-        raise e
+
+# Form field, model, association table, association column, name for error message
+PERCENTAGE_MATCH_FILTERS: tuple[tuple[str, type[m.KeyedModel], sa.Table, str, str], ...] = (
+    ("genres", m.Genre, m.movie_genres, "genre_id", "Genre"),
+    ("subgenres", m.Subgenre, m.movie_subgenres, "subgenre_id", "Subgenre"),
+    ("specifications", m.Specification, m.movie_specifications, "specification_id", "Specification"),
+    ("keywords", m.Keyword, m.movie_keywords, "keyword_id", "Keyword"),
+    ("action_times", m.ActionTime, m.movie_action_times, "action_time_id", "Action time"),
+)
 
 
 def set_percentage_match(movie_id: int, db: Session, form_data: s.MovieFormData):
+    """Add movie genres, subgenres, specifications, keywords and action times with their percentage match"""
+
     try:
         filter_error_message = "Error updating percentage match"
 
-        # Genres percentage match
-        for percentage_match_dict in form_data.genres:
-            genre_key = percentage_match_dict.key
-            percentage_match = percentage_match_dict.percentage_match
-            genre = db.scalar(sa.select(m.Genre).where(m.Genre.key == genre_key))
-
-            if not genre:
-                log(log.ERROR, "Genre [%s] not found", genre_key)
-                filter_error_message = f"Genre [{genre_key}] not found"
-                raise Exception
-
-            movie_genre = (
-                m.movie_genres.update()
-                .values({"percentage_match": percentage_match})
-                .where(m.movie_genres.c.movie_id == movie_id, m.movie_genres.c.genre_id == genre.id)
-            )
-            db.execute(movie_genre)
-
-        # Subgenres percentage match
-        for percentage_match_dict in form_data.subgenres:
-            subgenre_key = percentage_match_dict.key
-            percentage_match = percentage_match_dict.percentage_match
-            subgenre = db.scalar(sa.select(m.Subgenre).where(m.Subgenre.key == subgenre_key))
-
-            if not subgenre:
-                log(log.ERROR, "Subgenre [%s] not found", subgenre_key)
-                filter_error_message = f"Subgenre [{subgenre_key}] not found"
-                raise Exception
-
-            movie_subgenre = (
-                m.movie_subgenres.update()
-                .values({"percentage_match": percentage_match})
-                .where(m.movie_subgenres.c.movie_id == movie_id, m.movie_subgenres.c.subgenre_id == subgenre.id)
-            )
-            db.execute(movie_subgenre)
-
-        # Specifications percentage match
-        for percentage_match_dict in form_data.specifications:
-            specification_key = percentage_match_dict.key
-            percentage_match = percentage_match_dict.percentage_match
-            specification = db.scalar(sa.select(m.Specification).where(m.Specification.key == specification_key))
-
-            if not specification:
-                log(log.ERROR, "Specification [%s] not found", specification_key)
-                filter_error_message = f"Specification [{specification_key}] not found"
-                raise Exception
-
-            movie_specification = (
-                m.movie_specifications.update()
-                .values({"percentage_match": percentage_match})
-                .where(
-                    m.movie_specifications.c.movie_id == movie_id,
-                    m.movie_specifications.c.specification_id == specification.id,
-                )
-            )
-            db.execute(movie_specification)
-
-        # Keywords percentage match
-        for percentage_match_dict in form_data.keywords:
-            keyword_key = percentage_match_dict.key
-            percentage_match = percentage_match_dict.percentage_match
-            keyword = db.scalar(sa.select(m.Keyword).where(m.Keyword.key == keyword_key))
-
-            if not keyword:
-                log(log.ERROR, "Keyword [%s] not found", keyword_key)
-                filter_error_message = f"Keyword [{keyword_key}] not found"
-                raise Exception
-
-            movie_keyword = (
-                m.movie_keywords.update()
-                .values({"percentage_match": percentage_match})
-                .where(m.movie_keywords.c.movie_id == movie_id, m.movie_keywords.c.keyword_id == keyword.id)
+        for field_name, model, table, column_name, item_name in PERCENTAGE_MATCH_FILTERS:
+            items: list[s.MovieFilterField] = getattr(form_data, field_name)
+            if not items:
+                continue
+
+            ids = get_ids_by_keys(db, model, [item.key for item in items])
+
+            for item in items:
+                if item.key not in ids:
+                    log(log.ERROR, "%s [%s] not found", item_name, item.key)
+                    filter_error_message = f"{item_name} [{item.key}] not found"
+                    raise Exception
+
+            db.execute(
+                table.insert(),
+                [
+                    {"movie_id": movie_id, column_name: ids[item.key], "percentage_match": item.percentage_match}
+                    for item in items
+                ],
             )
-            db.execute(movie_keyword)
-
-        # Action times percentage match
-        for percentage_match_dict in form_data.action_times:
-            action_time_key = percentage_match_dict.key
-            percentage_match = percentage_match_dict.percentage_match
-            action_time = db.scalar(sa.select(m.ActionTime).where(m.ActionTime.key == action_time_key))
-
-            if not action_time:
-                log(log.ERROR, "Action time [%s] not found", action_time_key)
-                filter_error_message = f"Action time [{action_time_key}] not found"
-                raise Exception
-
-            movie_action_time = (
-                m.movie_action_times.update()
-                .values({"percentage_match": percentage_match})
-                .where(
-                    m.movie_action_times.c.movie_id == movie_id,
-                    m.movie_action_times.c.action_time_id == action_time.id,
-                )
-            )
-            db.execute(movie_action_time)
     except Exception as e:
         log(log.ERROR, "Error updating percentage match: %s", e)
         e.args = (*e.args, filter_error_message)
@@ -256,22 +172,23 @@ def set_percentage_match(movie_id: int, db: Session, form_data: s.MovieFormData)
 
 
 def add_new_characters(new_movie_id: int, db: Session, actors_keys: list[s.ActorCharacterKey]):
+    actors_ids = get_ids_by_keys(db, m.Actor, [actor.key for actor in actors_keys])
+    characters_ids = get_ids_by_keys(db, m.Character, [actor.character_key for actor in actors_keys])
+
     try:
         for idx, actor in enumerate(actors_keys):
-            actor_db = db.scalar(sa.select(m.Actor).where(m.Actor.key == actor.key))
-            if not actor_db:
+            if actor.key not in actors_ids:
                 log(log.ERROR, "Actor [%s] not found", actor.key)
                 raise Exception
 
-            character_db = db.scalar(sa.select(m.Character).where(m.Character.key == actor.character_key))
-            if not character_db:
+            if actor.character_key not in characters_ids:
                 log(log.ERROR, "Character [%s] not found", actor.character_key)
                 raise Exception
 
             new_character = m.MovieActorCharacter(
-                actor_id=actor_db.id,
+                actor_id=actors_ids[actor.key],
                 movie_id=new_movie_id,
-                character_id=character_db.id,
+                character_id=characters_ids[actor.character_key],
                 order=idx + 1,
             )
 
@@ -304,8 +221,9 @@ def add_new_movie_rating(new_movie: m.Movie, db: Session, current_user: int, for
         )
 
         db.add(new_rating)
+        db.flush()
 
-        process_movie_rating(new_movie)
+        recalculate_movie_rating(db, new_movie)
 
         log(log.INFO, "Rating [%s] successfully created")
     except Exception as e:
@@ -452,38 +370,6 @@ def import_new_movie_to_google_sheet(db: Session):
         raise e
 
 
-def get_movies_data_from_file():
-    """Get movies data from json file"""
-
-    file_path = get_quick_movie_file_path()
-
-    with open(file_path, "r") as file:
-        file_data = s.QuickMovieJSON.model_validate(json.load(file))
-
-    return file_data.movies
-
-
-def remove_quick_movie(movie_key: str):
-    """Remove movie from json file"""
-    file_path = get_quick_movie_file_path()
-
-    if os.path.exists(file_path):
-        try:
-            movies = get_movies_data_from_file()
-
-            if movies:
-                keys = [movie.key for movie in movies]
-                movies_to_file = movies
-
-                if movie_key in keys:
-                    movies_to_file = [movie for movie in movies if movie.key != movie_key]
-
-                with open(file_path, "w") as file:
-                    json.dump(s.QuickMovieJSON(movies=movies_to_file).model_dump(mode="json"), file, indent=4)
-        except Exception as e:
-            log(log.ERROR, "Error adding movie [%s] to file: %s", movie_key, e)
-
-
 def add_visual_profile(
     category_key: str,
     category_criteria: list[s.VisualProfileCriterionData],
@@ -493,43 +379,11 @@ def add_visual_profile(
 ):
     """Add visual profile to movie"""
 
-    category = session.scalar(sa.select(m.VisualProfileCategory).where(m.VisualProfileCategory.key == category_key))
-    if not category:
-        log(log.ERROR, "Category [%s] not found", category_key)
-        raise Exception(f"Category [{category_key}] not found")
-
     try:
-        new_vp = m.VisualProfile(
-            movie_id=movie_id,
-            user_id=user_id,
-            category_id=category.id,
-        )
-
-        session.add(new_vp)
-        session.flush()
+        create_visual_profile(session, movie_id, user_id, category_key, category_criteria)
+    except VisualProfileNotFoundError:
+        raise
     except Exception as e:
         log(log.ERROR, "Error creating visual profile for movie [%s]: %s", movie_id, e)
         e.args = (*e.args, "Error creating visual profile")
         raise e
-
-    for idx, criterion in enumerate(category_criteria):
-        criterion_db = session.scalar(
-            sa.select(m.VisualProfileCategoryCriterion).where(m.VisualProfileCategoryCriterion.key == criterion.key)
-        )
-
-        if not criterion_db:
-            log(log.ERROR, "Criterion [%s] not found", criterion.key)
-            raise Exception(f"Criterion [{criterion.key}] not found")
-
-        try:
-            new_rating = m.VisualProfileRating(
-                title_visual_profile_id=new_vp.id,
-                criterion_id=criterion_db.id,
-                rating=criterion.rating,
-                order=idx + 1,
-            )
-            session.add(new_rating)
-        except Exception as e:
-            log(log.ERROR, "Error creating visual profile rating for movie [%s]: %s", movie_id, e)
-            e.args = (*e.args, "Error creating visual profile rating")
-            raise e
@@ -0,0 +1,220 @@
+import base64
+import json
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cmp_to_key
+from typing import Any, Callable, Sequence
+
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy.orm import InstrumentedAttribute, Session, selectinload
+
+import app.models as m
+import app.schema as s
+from api.controllers.random_sampling import generate_seed, get_random_pivot
+from app.logger import log
+
+MoviesTransformer = Callable[[Sequence[m.Movie]], Sequence[s.MoviePreviewOut]]
+
+
+@dataclass
+class SortKey:
+    expression: sa.ColumnElement[Any] | InstrumentedAttribute[Any]
+    descending: bool = False
+
+    def is_valid_value(self, value: Any) -> bool:
+        """Value of the key type (int, float or datetime) or None, as encoded in cursors"""
+
+        if value is None:
+            return True
+        value_type = self.expression.type.python_type
+        if isinstance(value, bool):
+            return False
+        if value_type is float:
+            return isinstance(value, (int, float))
+        return isinstance(value, value_type)
+
+
+@dataclass
+class CursorParams:
+    """Decoded cursor pagination request"""
+
+    sort: str  # "<sort_by>:<sort_order>", cursor is valid only for the same sort
+    keys: list[SortKey]
+    values: list[Any] | None  # sort values of the last movie of the previous page
+    size: int
+    seed: int | None
+    with_total: bool
+
+
+def get_cursor_sort_keys(
+    sort_by: s.SortBy, is_reverse: bool, seed: int | None, by_user_rating: bool = False
+) -> list[SortKey]:
+    """Sort keys with a unique id tiebreaker (same order as get_order/get_user_order and the super search index)"""
+
+    if sort_by == s.SortBy.RANDOM:
+        pivot = get_random_pivot(seed)
+        return [
+            SortKey(sa.case((m.Movie.random_key >= pivot, 0), else_=1)),
+            SortKey(m.Movie.random_key),
+            SortKey(m.Movie.id),
+        ]
+    if sort_by == s.SortBy.RELEASE_DATE:
+        # Movies without release date go last in ascending order
+        return [
+            SortKey(sa.case((m.Movie.release_date.is_(None), 1), else_=0), is_reverse),
+            SortKey(m.Movie.release_date, is_reverse),
+            SortKey(m.Movie.id),
+        ]
+    if sort_by == s.SortBy.RATINGS_COUNT:
+        return [SortKey(m.Movie.ratings_count, is_reverse), SortKey(m.Movie.id)]
+
+    if by_user_rating:
+        if sort_by == s.SortBy.RATED_AT:
+            return [SortKey(m.Rating.updated_at, is_reverse), SortKey(m.Movie.id)]
+        return [SortKey(m.Rating.rating, is_reverse), SortKey(m.Movie.id)]
+
+    if sort_by == s.SortBy.RATING:
+        return [SortKey(m.Movie.average_rating, is_reverse), SortKey(m.Movie.id)]
+    return [SortKey(m.Movie.id, is_reverse)]
+
+
+def encode_cursor(sort: str, values: Sequence[Any], seed: int | None) -> str:
+    def default(value: Any):
+        if isinstance(value, datetime):
+            return {"dt": value.isoformat()}
+        raise TypeError(f"Unsupported cursor value: {value!r}")
+
+    data = json.dumps({"s": sort, "v": list(values), "r": seed}, default=default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, list[Any], int | None]:
+    def object_hook(value: dict):
+        return datetime.fromisoformat(value["dt"]) if "dt" in value else value
+
+    data = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)), object_hook=object_hook)
+    return data["s"], data["v"], data["r"]
+
+
+def get_cursor_params(
+    sort_by: s.SortBy,
+    sort_order: s.SortOrder,
+    seed: int | None,
+    cursor: str | None,
+    size: int,
+    with_total: bool,
+    by_user_rating: bool = False,
+) -> CursorParams:
+    sort = f"{sort_by.value}:{sort_order.value}"
+    values = None
+
+    if cursor:
+        try:
+            cursor_sort, values, cursor_seed = decode_cursor(cursor)
+        except Exception as e:
+            log(log.ERROR, "Invalid cursor [%s]: %s", cursor, e)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if cursor_seed is not None and (not isinstance(cursor_seed, int) or isinstance(cursor_seed, bool)):
+            log(log.ERROR, "Invalid cursor seed [%s]", cursor_seed)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+        if cursor_sort != sort:
+            log(log.ERROR, "Cursor for [%s] used with [%s]", cursor_sort, sort)
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor doesn't match the sort")
+        # Random order continues with the seed of the first page
+        seed = cursor_seed if seed is None else seed
+    elif sort_by == s.SortBy.RANDOM and seed is None:
+        seed = generate_seed()
+
+    keys = get_cursor_sort_keys(sort_by, sort_order == s.SortOrder.DESC, seed, by_user_rating)
+    if values is not None and (
+        not isinstance(values, list)
+        or len(values) != len(keys)
+        or not all(key.is_valid_value(value) for key, value in zip(keys, values))
+    ):
+        log(log.ERROR, "Invalid cursor values [%s] for [%s]", values, sort)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    return CursorParams(sort=sort, keys=keys, values=values, size=size, seed=seed, with_total=with_total)
+
+
+def get_keyset_condition(keys: list[SortKey], values: list[Any]) -> sa.ColumnElement:
+    """Rows after `values`: (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ... (with < for descending keys)"""
+
+    conditions = []
+    for i, key in enumerate(keys):
+        # Nothing is after NULL inside the group of NULLs (the group is defined by a preceding flag key)
+        if values[i] is None:
+            continue
+        equal = [
+            keys[j].expression.is_(None) if values[j] is None else keys[j].expression == values[j] for j in range(i)
+        ]
+        after = key.expression < values[i] if key.descending else key.expression > values[i]
+        conditions.append(sa.and_(*equal, after))
+    return sa.or_(*conditions)
+
+
+def paginate_by_cursor(
+    db: Session, query: sa.Select, params: CursorParams, transformer: MoviesTransformer
+) -> s.CursorPaginationDataOut:
+    """Page of movies after the cursor: no OFFSET and no COUNT (unless with_total), so every page costs the same"""
+
+    query = query.order_by(None)
+    total = db.scalar(sa.select(sa.func.count()).select_from(query.subquery())) if params.with_total else None
+
+    page_query = query.add_columns(*[key.expression for key in params.keys]).order_by(
+        *[key.expression.desc() if key.descending else key.expression.asc() for key in params.keys]
+    )
+    if params.values is not None:
+        page_query = page_query.where(get_keyset_condition(params.keys, params.values))
+
+    rows = db.execute(page_query.limit(params.size + 1)).all()
+
+    next_cursor = None
+    if len(rows) > params.size:
+        rows = rows[: params.size]
+        next_cursor = encode_cursor(params.sort, rows[-1][1:], params.seed)
+
+    return s.CursorPaginationDataOut(
+        items=list(transformer([row[0] for row in rows])), size=params.size, next_cursor=next_cursor, total=total
+    )
+
+
+def paginate_movie_ids_by_cursor(
+    db: Session,
+    movie_ids: list[int],
+    get_values: Callable[[int], list[Any]],
+    params: CursorParams,
+    transformer: MoviesTransformer,
+) -> s.CursorPaginationDataOut:
+    """Cursor page of already filtered and sorted movie ids (in the order of params.keys)"""
+
+    def compare(left: list[Any], right: list[Any]) -> int:
+        for key, left_value, right_value in zip(params.keys, left, right):
+            if left_value == right_value:
+                continue
+            # NULLs go after values (a valid cursor has them only where the preceding flag key groups them)
+            is_less = right_value is None if left_value is None or right_value is None else left_value < right_value
+            return (1 if is_less else -1) if key.descending else (-1 if is_less else 1)
+        return 0
+
+    start = 0
+    if params.values is not None:
+        sort_key = cmp_to_key(compare)
+        start = bisect_right(movie_ids, sort_key(params.values), key=lambda movie_id: sort_key(get_values(movie_id)))
+
+    page_ids = movie_ids[start : start + params.size]
+    next_cursor = None
+    if start + params.size < len(movie_ids):
+        next_cursor = encode_cursor(params.sort, get_values(page_ids[-1]), params.seed)
+
+    movies = db.scalars(sa.select(m.Movie).options(selectinload(m.Movie.ratings)).where(m.Movie.id.in_(page_ids))).all()
+    movies_by_id = {movie.id: movie for movie in movies}
+
+    return s.CursorPaginationDataOut(
+        items=list(transformer([movies_by_id[movie_id] for movie_id in page_ids if movie_id in movies_by_id])),
+        size=params.size,
+        next_cursor=next_cursor,
+        total=len(movie_ids) if params.with_total else None,
+    )
@@ -0,0 +1,85 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field
+
+import app.schema as s
+from app.logger import log
+from config import config
+
+CFG = config()
+
+
+@dataclass(frozen=True)
+class FiltersCacheEntry:
+    content: bytes
+    etag: str
+    version: int
+    created_at: float
+    # Encoding -> compressed content, filled on the first request with that encoding
+    compressed: dict[str, bytes] = field(default_factory=dict)
+
+
+class FiltersCache:
+    """Process-local cache for the serialized movie filters payload (one entry per language).
+
+    Entries are invalidated by the version counter, which is bumped by every route that creates
+    or updates a filter item. The TTL bounds staleness between workers, because the counter lives
+    only in the memory of the current process.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._version = 0
+        self._entries: dict[str, FiltersCacheEntry] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self) -> int:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            return self._version
+
+    def get(self, lang: s.Language) -> FiltersCacheEntry | None:
+        entry = self._entries.get(lang.value)
+        if not entry:
+            return None
+
+        if entry.version != self._version or time.monotonic() - entry.created_at > self.ttl:
+            return None
+
+        return entry
+
+    def set(self, lang: s.Language, filters: s.MovieFiltersListOut, version: int) -> FiltersCacheEntry:
+        content = filters.model_dump_json().encode()
+        entry = FiltersCacheEntry(
+            content=content,
+            etag=f'"{version}-{hashlib.sha256(content).hexdigest()[:32]}"',
+            version=version,
+            created_at=time.monotonic(),
+        )
+
+        with self._lock:
+            # Do not store a payload built before a concurrent bump
+            if version == self._version:
+                self._entries[lang.value] = entry
+
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+filters_cache = FiltersCache(ttl=CFG.FILTERS_CACHE_TTL)
+
+
+def bump_filters_version():
+    """Invalidate cached movie filters after a filter item was created or updated"""
+
+    version = filters_cache.bump()
+    log(log.DEBUG, "Movie filters cache version bumped to [%s]", version)
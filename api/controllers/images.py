@@ -0,0 +1,263 @@
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from botocore.exceptions import ClientError
+from fastapi import HTTPException, Request, Response, UploadFile, status
+from fastapi.responses import FileResponse, RedirectResponse
+from PIL import Image, ImageOps
+
+from api.dependency.s3_client import get_s3_connect
+from app.logger import log
+from config import config
+
+CFG = config()
+
+# Uploads are read and hashed by chunks, never as a whole
+IMAGE_CHUNK_SIZE = 1024 * 1024
+
+# Image kind (storage directory) -> variant name -> max (width, height)
+IMAGE_VARIANTS = {
+    "posters": {"card": (300, 450), "detail": (600, 900)},
+    "actors": {"card": (160, 240), "detail": (320, 480)},
+    "directors": {"card": (160, 240), "detail": (320, 480)},
+}
+VARIANT_FORMAT = "webp"
+VARIANT_QUALITY = 80
+
+# Content-addressed names never change their content
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Variant is not generated yet, the original is served meanwhile
+PENDING_VARIANT_CACHE_CONTROL = "no-cache"
+
+CONTENT_NAME_RE = re.compile(r"^(?P<digest>[0-9a-f]{32})(\.[a-z0-9]+)?$")
+
+
+def get_variant_key(kind: str, name: str, variant: str) -> str:
+    return f"{kind}/{variant}/{os.path.splitext(name)[0]}.{VARIANT_FORMAT}"
+
+
+class ImageStorage(ABC):
+    """Where images are kept; keys are `<kind>/<name>` or `<kind>/<variant>/<name>`"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def save_file(self, key: str, path: str, content_type: str | None):
+        """Store a local file under the key (the file is moved or removed)"""
+
+    @abstractmethod
+    def save_bytes(self, key: str, data: bytes, content_type: str):
+        ...
+
+    @abstractmethod
+    def read(self, key: str) -> bytes:
+        ...
+
+    @abstractmethod
+    def get_response(self, key: str, headers: dict[str, str]) -> Response:
+        ...
+
+
+class LocalImageStorage(ImageStorage):
+    def __init__(self, root: str):
+        self.root = root
+
+    def get_path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self.get_path(key))
+
+    def save_file(self, key: str, path: str, content_type: str | None):
+        os.makedirs(os.path.dirname(self.get_path(key)), exist_ok=True)
+        shutil.move(path, self.get_path(key))
+
+    def save_bytes(self, key: str, data: bytes, content_type: str):
+        path = self.get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Readers never see a half written file
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as temp_file:
+            temp_file.write(data)
+        os.replace(temp_file.name, path)
+
+    def read(self, key: str) -> bytes:
+        with open(self.get_path(key), "rb") as file:
+            return file.read()
+
+    def get_response(self, key: str, headers: dict[str, str]) -> Response:
+        return FileResponse(self.get_path(key), headers=headers)
+
+
+class S3ImageStorage(ImageStorage):
+    def __init__(self, bucket_name: str, bucket_url: str):
+        self.bucket_name = bucket_name
+        self.bucket_url = bucket_url
+
+    def exists(self, key: str) -> bool:
+        try:
+            get_s3_connect().head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError:
+            return False
+        return True
+
+    def get_extra_args(self, key: str, content_type: str | None) -> dict[str, str]:
+        extra_args = {"CacheControl": IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        return extra_args
+
+    def save_file(self, key: str, path: str, content_type: str | None):
+        try:
+            # Multipart upload by chunks for big files
+            get_s3_connect().upload_file(path, self.bucket_name, key, ExtraArgs=self.get_extra_args(key, content_type))
+        finally:
+            os.remove(path)
+
+    def save_bytes(self, key: str, data: bytes, content_type: str):
+        get_s3_connect().upload_fileobj(
+            io.BytesIO(data), self.bucket_name, key, ExtraArgs=self.get_extra_args(key, content_type)
+        )
+
+    def read(self, key: str) -> bytes:
+        return get_s3_connect().get_object(Bucket=self.bucket_name, Key=key)["Body"].read()
+
+    def get_response(self, key: str, headers: dict[str, str]) -> Response:
+        # Objects are served by the bucket (with the cache headers set on upload)
+        return RedirectResponse(f"{self.bucket_url.rstrip('/')}/{key}", headers=headers)
+
+
+def get_image_storage() -> ImageStorage:
+    if CFG.ENV == "production":
+        return S3ImageStorage(CFG.AWS_S3_BUCKET_NAME, CFG.AWS_S3_BUCKET_URL)
+    return LocalImageStorage(CFG.IMAGES_DIRECTORY)
+
+
+image_storage = get_image_storage()
+
+image_workers = ThreadPoolExecutor(max_workers=CFG.IMAGE_WORKERS, thread_name_prefix="image-variants")
+
+# Storage key of the original -> variants job in progress
+variant_jobs: dict[str, Future] = {}
+variant_jobs_lock = threading.Lock()
+
+
+def make_image_variant(data: bytes, size: tuple[int, int]) -> bytes:
+    with Image.open(io.BytesIO(data)) as original:
+        image: Image.Image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        output = io.BytesIO()
+        image.save(output, format=VARIANT_FORMAT, quality=VARIANT_QUALITY, method=4)
+    return output.getvalue()
+
+
+def generate_image_variants(storage: ImageStorage, kind: str, name: str):
+    """Resized and recompressed copies of the original image (existing variants are kept)"""
+
+    key = f"{kind}/{name}"
+    try:
+        data = None
+        for variant, size in IMAGE_VARIANTS[kind].items():
+            variant_key = get_variant_key(kind, name, variant)
+            if storage.exists(variant_key):
+                continue
+            data = data if data is not None else storage.read(key)
+            storage.save_bytes(variant_key, make_image_variant(data, size), f"image/{VARIANT_FORMAT}")
+        log(log.DEBUG, "Image variants for [%s] generated", key)
+    except Exception as e:
+        # The original is served until the variants exist
+        log(log.ERROR, "Error generating image variants for [%s]: %s", key, e)
+    finally:
+        with variant_jobs_lock:
+            variant_jobs.pop(key, None)
+
+
+def schedule_image_variants(kind: str, name: str) -> Future:
+    key = f"{kind}/{name}"
+    with variant_jobs_lock:
+        if key not in variant_jobs:
+            variant_jobs[key] = image_workers.submit(generate_image_variants, image_storage, kind, name)
+        return variant_jobs[key]
+
+
+def wait_for_image_variants(timeout: float | None = None):
+    with variant_jobs_lock:
+        jobs = list(variant_jobs.values())
+    wait(jobs, timeout=timeout)
+
+
+def store_image(file: UploadFile, kind: str) -> str:
+    """Save the uploaded image under a name made of its content hash and schedule its variants.
+
+    The upload is streamed by chunks to a temporary file while hashing, so the same image
+    uploaded again is stored once. Returns the name to keep in the model (poster, avatar).
+    """
+
+    extension = os.path.splitext(file.filename or "")[1].lower()
+    digest = hashlib.sha256()
+
+    with tempfile.NamedTemporaryFile(delete=False, suffix=extension) as temp_file:
+        while chunk := file.file.read(IMAGE_CHUNK_SIZE):
+            digest.update(chunk)
+            temp_file.write(chunk)
+
+    name = f"{digest.hexdigest()[:32]}{extension}"
+    key = f"{kind}/{name}"
+    try:
+        if image_storage.exists(key):
+            os.remove(temp_file.name)
+            log(log.DEBUG, "Image [%s] already stored", key)
+        else:
+            image_storage.save_file(key, temp_file.name, file.content_type)
+            log(log.INFO, "Image [%s] stored", key)
+    except Exception as e:
+        if os.path.exists(temp_file.name):
+            os.remove(temp_file.name)
+        log(log.ERROR, "Error storing image [%s]: %s", key, e)
+        e.args = (*e.args, "Error storing image")
+        raise e
+
+    schedule_image_variants(kind, name)
+    return name
+
+
+def get_image_response(request: Request, kind: str, name: str, variant: str | None, placeholder: str) -> Response:
+    """Image (or its variant) with long-lived caching for content-addressed names"""
+
+    if variant and variant not in IMAGE_VARIANTS[kind]:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown image variant")
+
+    key = f"{kind}/{name}"
+    if name.startswith(".") or os.path.basename(name) != name or not image_storage.exists(key):
+        return FileResponse(placeholder)
+
+    match = CONTENT_NAME_RE.match(name)
+    if not match:
+        # Old names (<id>_<filename>) can be overwritten, so they are not cached
+        return image_storage.get_response(key, {})
+
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    if variant:
+        variant_key = get_variant_key(kind, name, variant)
+        if image_storage.exists(variant_key):
+            key = variant_key
+        else:
+            schedule_image_variants(kind, name)
+            headers = {"Cache-Control": PENDING_VARIANT_CACHE_CONTROL}
+
+    etag = f'"{match["digest"]}-{variant if key != f"{kind}/{name}" else "original"}"'
+    headers["ETag"] = etag
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return image_storage.get_response(key, headers)
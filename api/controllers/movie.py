@@ -4,26 +4,111 @@ import app.models as m
 import app.schema as s
 import sqlalchemy as sa
 from fastapi import HTTPException, status
+from api.controllers.create_movie import PERCENTAGE_MATCH_FILTERS
+from api.controllers.random_sampling import get_seeded_random_order
+from api.controllers.translations import translations
+from api.controllers.users_cache import get_cached_owner
 from app.logger import log
 
 
-def get_movie_data(movie: m.Movie, db: Session, lang: s.Language, current_user: m.User | None = None) -> s.MovieOut:
-    """Get detailed movie data including visual profile, ratings, and related information."""
+def get_movie_detail_options() -> list:
+    """Eager loading for the movie detail page, so it costs a fixed number of queries"""
 
-    movie_id = movie.id
-    movie_key = movie.key
+    return [
+        selectinload(m.Movie.translations),
+        selectinload(m.Movie.ratings),
+        # Visual profile
+        selectinload(m.Movie.visual_profiles)
+        .selectinload(m.VisualProfile.ratings)
+        .selectinload(m.VisualProfileRating.criterion)
+        .selectinload(m.VisualProfileCategoryCriterion.translations),
+        selectinload(m.Movie.visual_profiles)
+        .selectinload(m.VisualProfile.category)
+        .selectinload(m.VisualProfileCategory.translations),
+        # Actor
+        selectinload(m.Movie.characters).selectinload(m.MovieActorCharacter.actor).selectinload(m.Actor.translations),
+        # Character
+        selectinload(m.Movie.characters)
+        .selectinload(m.MovieActorCharacter.character)
+        .selectinload(m.Character.translations),
+        selectinload(m.Movie.directors).selectinload(m.Director.translations),
+        # Filters
+        selectinload(m.Movie.genres).selectinload(m.Genre.translations),
+        selectinload(m.Movie.subgenres).selectinload(m.Subgenre.translations),
+        selectinload(m.Movie.subgenres).selectinload(m.Subgenre.genre),
+        selectinload(m.Movie.specifications).selectinload(m.Specification.translations),
+        selectinload(m.Movie.keywords).selectinload(m.Keyword.translations),
+        selectinload(m.Movie.action_times).selectinload(m.ActionTime.translations),
+        # Collection (the movie can be the base one or a member)
+        selectinload(m.Movie.collection_members).selectinload(m.Movie.translations),
+        selectinload(m.Movie.collection_base_movie).selectinload(m.Movie.translations),
+        selectinload(m.Movie.collection_base_movie)
+        .selectinload(m.Movie.collection_members)
+        .selectinload(m.Movie.translations),
+        # Shared universe
+        selectinload(m.Movie.shared_universe).selectinload(m.SharedUniverse.translations),
+        selectinload(m.Movie.shared_universe).selectinload(m.SharedUniverse.movies).selectinload(m.Movie.translations),
+    ]
+
+
+def get_movies_filter_matches(db: Session, movie_ids: list[int]) -> dict[int, dict[str, dict[int, float]]]:
+    """Percentage matches of all filters (genres, subgenres, ...) of the movies with one UNION ALL query"""
+
+    query = sa.union_all(
+        *[
+            sa.select(
+                table.c.movie_id,
+                sa.literal(field_name).label("filter_name"),
+                table.c[column_name].label("item_id"),
+                table.c.percentage_match,
+            ).where(table.c.movie_id.in_(movie_ids))
+            for field_name, _, table, column_name, _ in PERCENTAGE_MATCH_FILTERS
+        ]
+    )
+
+    matches: dict[int, dict[str, dict[int, float]]] = {
+        movie_id: {field_name: {} for field_name, *_ in PERCENTAGE_MATCH_FILTERS} for movie_id in movie_ids
+    }
+    for movie_id, filter_name, item_id, percentage_match in db.execute(query):
+        matches[movie_id][filter_name][item_id] = percentage_match
+    return matches
+
+
+def get_movie_filter_matches(db: Session, movie_id: int) -> dict[str, dict[int, float]]:
+    """Percentage matches of all movie filters (genres, subgenres, ...) with one UNION ALL query"""
+
+    return get_movies_filter_matches(db, [movie_id])[movie_id]
 
-    user_rating = None
-    owner = None
 
+def get_owner_user(db: Session, current_user: m.User | None = None) -> m.User:
     if current_user and current_user.role == s.UserRole.OWNER.value:
-        owner = current_user
-    else:
-        owner = db.scalar(sa.select(m.User).where(m.User.role == s.UserRole.OWNER.value))
+        return current_user
 
+    owner = get_cached_owner(db)
     if not owner:
         log(log.ERROR, "Owner not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Owner not found")
+    return owner
+
+
+def get_movie_data(
+    movie: m.Movie,
+    db: Session,
+    lang: s.Language,
+    current_user: m.User | None = None,
+    owner: m.User | None = None,
+    filter_matches: dict[str, dict[int, float]] | None = None,
+) -> s.MovieOut:
+    """Get detailed movie data including visual profile, ratings, and related information.
+
+    Batch callers pass the owner and filter matches loaded once for all movies.
+    """
+
+    movie_id = movie.id
+    movie_key = movie.key
+
+    user_rating = None
+    owner = owner or get_owner_user(db, current_user)
 
     owner_rating = next((r for r in movie.ratings if r.user_id == owner.id), None)
     if not owner_rating:
@@ -92,20 +177,13 @@ def get_movie_data(movie: m.Movie, db: Session, lang: s.Language, current_user:
         else None
     )
 
-    genre_matches = {(mg.genre_id): mg.percentage_match for mg in db.query(m.movie_genres).filter_by(movie_id=movie_id)}
-    subgenre_matches = {
-        (mg.subgenre_id): mg.percentage_match for mg in db.query(m.movie_subgenres).filter_by(movie_id=movie_id)
-    }
-    specification_matches = {
-        (mg.specification_id): mg.percentage_match
-        for mg in db.query(m.movie_specifications).filter_by(movie_id=movie_id)
-    }
-    keyword_matches = {
-        (mg.keyword_id): mg.percentage_match for mg in db.query(m.movie_keywords).filter_by(movie_id=movie_id)
-    }
-    action_time_matches = {
-        (mg.action_time_id): mg.percentage_match for mg in db.query(m.movie_action_times).filter_by(movie_id=movie_id)
-    }
+    if filter_matches is None:
+        filter_matches = get_movie_filter_matches(db, movie_id)
+    genre_matches = filter_matches["genres"]
+    subgenre_matches = filter_matches["subgenres"]
+    specification_matches = filter_matches["specifications"]
+    keyword_matches = filter_matches["keywords"]
+    action_time_matches = filter_matches["action_times"]
 
     return s.MovieOut(
         key=movie_key,
@@ -247,10 +325,7 @@ def get_main_genres_for_movies(db: Session, movie_ids: list[int], lang: s.Langua
             m.movie_genres.c.percentage_match,
         ).where(m.movie_genres.c.movie_id.in_(movie_ids))
     ).all()
-    # Fetch all genres needed
-    genre_ids = {row.genre_id for row in genre_rows}
-    genres = db.query(m.Genre).options(selectinload(m.Genre.translations)).filter(m.Genre.id.in_(genre_ids)).all()
-    genre_map = {genre.id: genre for genre in genres}
+    genre_names = translations.get(db, "genre", [row.genre_id for row in genre_rows])
 
     # Build a dict: movie_id -> (genre, percentage_match)
     main_genre_map = {}
@@ -261,55 +336,54 @@ def get_main_genres_for_movies(db: Session, movie_ids: list[int], lang: s.Langua
     for movie_id, rows in movie_genre_matches.items():
         # Pick the genre with the highest percentage_match
         best_row = max(rows, key=lambda r: r.percentage_match)
-        genre = genre_map.get(best_row.genre_id)
-        if genre:
-            genre_name = genre.get_name(lang)
+        genre_name = genre_names.get_name(best_row.genre_id, lang)
+        if genre_name:
             main_genre_map[movie_id] = f"{genre_name} ({best_row.percentage_match}%)"
         else:
             main_genre_map[movie_id] = "No main genre"
     return main_genre_map
 
 
-def get_user_order(sort_by: s.SortBy, is_reverse: bool):
+def get_user_order(sort_by: s.SortBy, is_reverse: bool, seed: int | None = None) -> list:
     """Get the order for authenticated user"""
 
     if sort_by == s.SortBy.RATED_AT:
-        return m.Rating.updated_at.desc() if is_reverse else m.Rating.updated_at.asc()
+        return [m.Rating.updated_at.desc() if is_reverse else m.Rating.updated_at.asc()]
     if sort_by == s.SortBy.RELEASE_DATE:
-        return m.Movie.release_date.desc() if is_reverse else m.Movie.release_date.asc()
+        return [m.Movie.release_date.desc() if is_reverse else m.Movie.release_date.asc()]
     if sort_by == s.SortBy.RATINGS_COUNT:
-        return m.Movie.ratings_count.desc() if is_reverse else m.Movie.ratings_count.asc()
+        return [m.Movie.ratings_count.desc() if is_reverse else m.Movie.ratings_count.asc()]
     if sort_by == s.SortBy.RANDOM:
-        return sa.func.random()
+        return get_seeded_random_order(seed)
 
-    return m.Rating.rating.desc() if is_reverse else m.Rating.rating.asc()
+    return [m.Rating.rating.desc() if is_reverse else m.Rating.rating.asc()]
 
 
-def get_order(sort_by: s.SortBy, is_reverse: bool):
+def get_order(sort_by: s.SortBy, is_reverse: bool, seed: int | None = None) -> list:
     if sort_by == s.SortBy.RELEASE_DATE:
-        return m.Movie.release_date.desc() if is_reverse else m.Movie.release_date.asc()
+        return [m.Movie.release_date.desc() if is_reverse else m.Movie.release_date.asc()]
     if sort_by == s.SortBy.RATING:
-        return m.Movie.average_rating.desc() if is_reverse else m.Movie.average_rating.asc()
+        return [m.Movie.average_rating.desc() if is_reverse else m.Movie.average_rating.asc()]
     if sort_by == s.SortBy.RATINGS_COUNT:
-        return m.Movie.ratings_count.desc() if is_reverse else m.Movie.ratings_count.asc()
+        return [m.Movie.ratings_count.desc() if is_reverse else m.Movie.ratings_count.asc()]
     if sort_by == s.SortBy.RANDOM:
-        return sa.func.random()
+        return get_seeded_random_order(seed)
 
-    return m.Movie.id.desc() if is_reverse else m.Movie.id.asc()
+    return [m.Movie.id.desc() if is_reverse else m.Movie.id.asc()]
 
 
-def build_movie_query(sort_by: s.SortBy, is_reverse: bool, current_user: m.User | None):
+def build_movie_query(sort_by: s.SortBy, is_reverse: bool, current_user: m.User | None, seed: int | None = None):
     """Build a query for movies based on the sort criteria and user context."""
 
     if current_user:
-        user_order = get_user_order(sort_by, is_reverse)
+        user_order = get_user_order(sort_by, is_reverse, seed)
         return (
             sa.select(m.Movie)
-            .options(selectinload(m.Movie.translations), selectinload(m.Movie.ratings))
+            .options(selectinload(m.Movie.ratings))
             .join(m.Rating, m.Rating.movie_id == m.Movie.id)
             .where(m.Rating.user_id == current_user.id)
-            .order_by(user_order)
+            .order_by(*user_order)
         )
     else:
-        order = get_order(sort_by, is_reverse)
-        return sa.select(m.Movie).options(selectinload(m.Movie.translations)).order_by(order)
+        order = get_order(sort_by, is_reverse, seed)
+        return sa.select(m.Movie).order_by(*order)
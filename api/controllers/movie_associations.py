@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+from typing import Callable
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import app.models as m
+from api.controllers.create_movie import PERCENTAGE_MATCH_FILTERS
+from app.logger import log
+
+# Session.info key of changes waiting for commit
+PENDING_CHANGES_KEY = "movie_association_changes"
+
+# Field name -> filter item model, association table, association column
+PERCENTAGE_MATCH_TABLES: dict[str, tuple[type[m.KeyedModel], sa.Table, str]] = {
+    field_name: (model, table, column_name) for field_name, model, table, column_name, _ in PERCENTAGE_MATCH_FILTERS
+}
+
+
+@dataclass
+class AssociationChange:
+    """Difference between the old and the new items (item key -> percentage match) of a movie filter"""
+
+    movie_id: int
+    field_name: str
+    added: dict[str, float] = field(default_factory=dict)
+    removed: dict[str, float] = field(default_factory=dict)
+    changed: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed)
+
+
+AssociationChangeListener = Callable[[AssociationChange], None]
+
+association_change_listeners: list[AssociationChangeListener] = []
+
+
+def on_association_change(listener: AssociationChangeListener) -> AssociationChangeListener:
+    """Register a listener called after the transaction with the change is committed"""
+
+    association_change_listeners.append(listener)
+    return listener
+
+
+class UnknownItemsError(Exception):
+    def __init__(self, field_name: str, keys: list[str]):
+        super().__init__(f"Unknown {field_name}: {', '.join(keys)}")
+        self.field_name = field_name
+        self.keys = keys
+
+
+def update_movie_associations(
+    db: Session, movie_id: int, field_name: str, percentages: dict[str, float]
+) -> AssociationChange:
+    """Set movie filter items (item key -> percentage match) of PERCENTAGE_MATCH_FILTERS `field_name`.
+
+    Only the difference with the current rows is written: one DELETE, one INSERT and one
+    executemany UPDATE at most, in the caller's transaction (nothing is committed here).
+    """
+
+    model, table, column_name = PERCENTAGE_MATCH_TABLES[field_name]
+    item_column = table.c[column_name]
+
+    ids = {
+        key: item_id for key, item_id in db.execute(sa.select(model.key, model.id).where(model.key.in_(percentages)))
+    }
+    unknown_keys = [key for key in percentages if key not in ids]
+    if unknown_keys:
+        raise UnknownItemsError(field_name, unknown_keys)
+
+    current: dict[str, float] = {}
+    for key, item_id, percentage_match in db.execute(
+        sa.select(model.key, model.id, table.c.percentage_match)
+        .join(model, model.id == item_column)
+        .where(table.c.movie_id == movie_id)
+    ):
+        current[key] = percentage_match
+        ids[key] = item_id
+
+    change = AssociationChange(
+        movie_id=movie_id,
+        field_name=field_name,
+        added={key: value for key, value in percentages.items() if key not in current},
+        removed={key: value for key, value in current.items() if key not in percentages},
+        changed={key: value for key, value in percentages.items() if key in current and current[key] != value},
+    )
+    if change.is_empty:
+        return change
+
+    if change.removed:
+        removed_ids = [ids[key] for key in change.removed]
+        db.execute(sa.delete(table).where(table.c.movie_id == movie_id, item_column.in_(removed_ids)))
+
+    if change.added:
+        db.execute(
+            sa.insert(table),
+            [
+                {"movie_id": movie_id, column_name: ids[key], "percentage_match": value}
+                for key, value in change.added.items()
+            ],
+        )
+
+    if change.changed:
+        db.execute(
+            sa.update(table)
+            .where(table.c.movie_id == sa.bindparam("b_movie_id"), item_column == sa.bindparam("b_item_id"))
+            .values(percentage_match=sa.bindparam("b_percentage_match")),
+            [
+                {"b_movie_id": movie_id, "b_item_id": ids[key], "b_percentage_match": value}
+                for key, value in change.changed.items()
+            ],
+        )
+
+    db.info.setdefault(PENDING_CHANGES_KEY, []).append(change)
+    log(
+        log.DEBUG,
+        "Movie [%s] %s: [%s] added, [%s] removed, [%s] changed",
+        movie_id,
+        field_name,
+        len(change.added),
+        len(change.removed),
+        len(change.changed),
+    )
+    return change
+
+
+@event.listens_for(Session, "after_commit")
+def dispatch_association_changes(session: Session):
+    for change in session.info.pop(PENDING_CHANGES_KEY, []):
+        for listener in association_change_listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                # The data is already committed, listeners only keep derived state up to date
+                log(log.ERROR, "Association change listener [%s] failed: %s", listener.__name__, e)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_association_changes(session: Session):
+    session.info.pop(PENDING_CHANGES_KEY, None)
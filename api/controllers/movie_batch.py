@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import Sequence
+
+import sqlalchemy as sa
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session, selectinload
+
+import app.models as m
+import app.schema as s
+from api.controllers.movie import (
+    get_main_genres_for_movies,
+    get_movie_data,
+    get_movie_detail_options,
+    get_movies_filter_matches,
+    get_owner_user,
+)
+from api.controllers.translations import translations
+from app.logger import log
+
+# Max movie keys in one batch request
+MOVIE_BATCH_LIMIT = 50
+
+
+def get_movies_preview(
+    db: Session, movies: Sequence[m.Movie], lang: s.Language, current_user: m.User | None = None
+) -> list[s.MoviePreviewOut]:
+    main_genre_map = get_main_genres_for_movies(db, [movie.id for movie in movies], lang)
+    titles = translations.get(db, "movie", [movie.id for movie in movies])
+
+    return [
+        s.MoviePreviewOut(
+            key=movie.key,
+            title=titles.get_name(movie.id, lang),
+            poster=movie.poster,
+            release_date=movie.release_date if movie.release_date else datetime.now(),
+            duration=movie.formatted_duration(lang.value),
+            main_genre=main_genre_map.get(movie.id, "No main genre"),
+            rating=next((r.rating for r in movie.ratings if r.user_id == current_user.id), 0.0)
+            if current_user
+            else 0.0,
+        )
+        for movie in movies
+    ]
+
+
+def get_movies_batch(
+    db: Session,
+    movie_keys: list[str],
+    projection: s.MovieProjection,
+    lang: s.Language,
+    current_user: m.User | None = None,
+) -> s.MovieBatchOut:
+    """Movies by keys in the request order.
+
+    Unknown keys, and in the full projection movies without the owner rating or visual profile
+    (the movie page is 404 for them), are reported in `not_found`. All movies are hydrated together: one query per relationship (selectinload) plus the owner
+    and filter matches shared by the batch, so the number of queries doesn't grow with the batch size.
+    """
+
+    movie_keys = list(dict.fromkeys(movie_keys))
+    options = get_movie_detail_options() if projection == s.MovieProjection.FULL else [selectinload(m.Movie.ratings)]
+    movies = db.scalars(sa.select(m.Movie).where(m.Movie.key.in_(movie_keys)).options(*options)).all()
+
+    movies_by_key = {movie.key: movie for movie in movies}
+    ordered_movies = [movies_by_key[key] for key in movie_keys if key in movies_by_key]
+    not_found = [key for key in movie_keys if key not in movies_by_key]
+
+    if projection == s.MovieProjection.PREVIEW:
+        return s.MovieBatchOut(items=get_movies_preview(db, ordered_movies, lang, current_user), not_found=not_found)
+
+    if not ordered_movies:
+        return s.MovieBatchOut(items=[], not_found=not_found)
+
+    owner = get_owner_user(db, current_user)
+    filter_matches = get_movies_filter_matches(db, [movie.id for movie in ordered_movies])
+    items = []
+    incomplete_keys = set()
+    for movie in ordered_movies:
+        try:
+            items.append(
+                get_movie_data(movie, db, lang, current_user, owner=owner, filter_matches=filter_matches[movie.id])
+            )
+        except HTTPException as e:
+            if e.status_code != status.HTTP_404_NOT_FOUND:
+                raise
+            log(log.WARNING, "Movie [%s] skipped in the batch: %s", movie.key, e.detail)
+            incomplete_keys.add(movie.key)
+
+    return s.MovieBatchOut(
+        items=items,
+        not_found=[key for key in movie_keys if key not in movies_by_key or key in incomplete_keys],
+    )
@@ -1,205 +1,156 @@
+from typing import Any, Sequence
+
 import sqlalchemy as sa
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session
 import app.models as m
 import app.schema as s
 from fastapi import HTTPException, status
+from api.controllers.translations import translations
 from app.logger import log
 
 
-def get_people_filters(db: Session, lang: s.Language):
-    actors = db.scalars(
-        sa.select(m.Actor)
-        .options(selectinload(m.Actor.translations))
-        .join(m.Actor.translations)
-        .where(m.ActorTranslation.language == lang.value)
-        .order_by(
-            sa.func.concat(
-                m.ActorTranslation.first_name,
-            )
-        )
+def get_translated_items(db: Session, model, translation_model, order_by, lang: s.Language) -> Sequence[sa.Row]:
+    """(id, key) of items translated to `lang`, in SQL order of the translation. Names come from `translations`"""
+
+    return db.execute(
+        sa.select(model.id, model.key)
+        .join(model.translations)
+        .where(translation_model.language == lang.value)
+        .order_by(order_by)
     ).all()
+
+
+def get_people_filters(db: Session, lang: s.Language):
+    actors = get_translated_items(db, m.Actor, m.ActorTranslation, sa.func.concat(m.ActorTranslation.first_name), lang)
     if not actors:
         log(log.ERROR, "Actors [%s] not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Actors not found")
 
-    directors = db.scalars(
-        sa.select(m.Director)
-        .options(selectinload(m.Director.translations))
-        .join(m.Director.translations)
-        .where(m.DirectorTranslation.language == lang.value)
-        .order_by(
-            sa.func.concat(
-                m.DirectorTranslation.first_name,
-            )
-        )
-    ).all()
+    directors = get_translated_items(
+        db, m.Director, m.DirectorTranslation, sa.func.concat(m.DirectorTranslation.first_name), lang
+    )
     if not directors:
         log(log.ERROR, "Director [%s] not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Director not found")
 
-    characters = db.scalars(
-        sa.select(m.Character)
-        .options(selectinload(m.Character.translations))
-        .join(m.Character.translations)
-        .where(m.CharacterTranslation.language == lang.value)
-        .order_by(m.CharacterTranslation.name)
-    ).all()
+    characters = get_translated_items(db, m.Character, m.CharacterTranslation, m.CharacterTranslation.name, lang)
     if not characters:
         log(log.ERROR, "Characters [%s] not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Characters not found")
 
     another_lang = s.Language.EN if lang == s.Language.UK else s.Language.UK
 
-    actors_out = [
-        s.MainItemMenu(
-            key=actor.key,
-            name=actor.full_name(lang),
-            another_lang_name=actor.full_name(another_lang),
+    people_out = []
+    for entity, items in (("actor", actors), ("director", directors), ("character", characters)):
+        names = translations.get(db, entity, [item_id for item_id, _ in items])
+        people_out.append(
+            [
+                s.MainItemMenu(
+                    key=key,
+                    name=names.get_name(item_id, lang),
+                    another_lang_name=names.get_name(item_id, another_lang),
+                )
+                for item_id, key in items
+            ]
         )
-        for actor in actors
-    ]
 
-    directors_out = [
-        s.MainItemMenu(
-            key=director.key,
-            name=director.full_name(lang),
-            another_lang_name=director.full_name(another_lang),
-        )
-        for director in directors
-    ]
+    actors_out, directors_out, characters_out = people_out
+    return actors_out, directors_out, characters_out
 
-    characters_out = [
-        s.MainItemMenu(
-            key=character.key,
-            name=character.get_name(lang),
-            another_lang_name=character.get_name(another_lang),
+
+def get_subgenres_out(db: Session, lang: s.Language, subgenres: Sequence[Sequence[Any]]) -> list[s.SubgenreOut]:
+    """Subgenres from (id, key, genre key) rows"""
+
+    names = translations.get(db, "subgenre", [subgenre_id for subgenre_id, _, _ in subgenres])
+    return [
+        s.SubgenreOut(
+            key=key,
+            name=names.get_name(subgenre_id, lang),
+            description=names.get_description(subgenre_id, lang),
+            parent_genre_key=genre_key,
         )
-        for character in characters
+        for subgenre_id, key, genre_key in subgenres
     ]
 
-    return actors_out, directors_out, characters_out
-
 
 def get_genre_filters(db: Session, lang: s.Language):
-    genres = db.scalars(
-        sa.select(m.Genre)
-        .options(
-            selectinload(m.Genre.translations), selectinload(m.Genre.subgenres).selectinload(m.Subgenre.translations)
-        )
-        .join(m.Genre.translations)
-        .where(m.GenreTranslation.language == lang.value)
-        .order_by(m.GenreTranslation.name)
-    ).all()
+    genres = get_translated_items(db, m.Genre, m.GenreTranslation, m.GenreTranslation.name, lang)
     if not genres:
         log(log.ERROR, "Genres [%s] not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Genres not found")
 
+    genres_subgenres: dict[int, list[Sequence[Any]]] = {}
+    for row in db.execute(
+        sa.select(m.Subgenre.id, m.Subgenre.key, m.Genre.key, m.Subgenre.genre_id).join(m.Subgenre.genre)
+    ):
+        genres_subgenres.setdefault(row[3], []).append(row[:3])
+
+    names = translations.get(db, "genre", [genre_id for genre_id, _ in genres])
     genres_out = [
         s.GenreOut(
-            key=genre.key,
-            name=genre.get_name(lang),
-            description=genre.get_description(lang),
+            key=key,
+            name=names.get_name(genre_id, lang),
+            description=names.get_description(genre_id, lang),
             subgenres=sorted(
-                [
-                    s.SubgenreOut(
-                        key=subgenre.key,
-                        name=subgenre.get_name(lang),
-                        description=subgenre.get_description(lang),
-                        parent_genre_key=subgenre.genre.key,
-                    )
-                    for subgenre in genre.subgenres
-                ],
+                get_subgenres_out(db, lang, genres_subgenres.get(genre_id, [])),
                 key=lambda x: x.name,
             ),
         )
-        for genre in genres
+        for genre_id, key in genres
     ]
 
     return genres_out
 
 
 def get_filters(db: Session, lang: s.Language):
-    specifications = db.scalars(
-        sa.select(m.Specification)
-        .options(selectinload(m.Specification.translations))
-        .join(m.Specification.translations)
-        .where(m.SpecificationTranslation.language == lang.value)
-        .order_by(m.SpecificationTranslation.name)
-    ).all()
+    specifications = get_translated_items(
+        db, m.Specification, m.SpecificationTranslation, m.SpecificationTranslation.name, lang
+    )
     if not specifications:
         log(log.ERROR, "Specifications [%s] not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Specifications not found")
 
-    keywords = db.scalars(
-        sa.select(m.Keyword)
-        .options(selectinload(m.Keyword.translations))
-        .join(m.Keyword.translations)
-        .where(m.KeywordTranslation.language == lang.value)
-        .order_by(m.KeywordTranslation.name)
-    ).all()
+    keywords = get_translated_items(db, m.Keyword, m.KeywordTranslation, m.KeywordTranslation.name, lang)
     if not keywords:
         log(log.ERROR, "Keywords [%s] not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Keywords not found")
 
-    action_times = db.scalars(
-        sa.select(m.ActionTime)
-        .options(selectinload(m.ActionTime.translations))
-        .join(m.ActionTime.translations)
-        .where(m.ActionTimeTranslation.language == lang.value)
-        .order_by(m.ActionTimeTranslation.name)
-    ).all()
+    action_times = get_translated_items(db, m.ActionTime, m.ActionTimeTranslation, m.ActionTimeTranslation.name, lang)
     if not action_times:
         log(log.ERROR, "Action times [%s] not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Action times not found")
 
-    shared_universes = db.scalars(
-        sa.select(m.SharedUniverse)
-        .options(selectinload(m.SharedUniverse.translations))
-        .join(m.SharedUniverse.translations)
-        .where(m.SharedUniverseTranslation.language == lang.value)
-        .order_by(m.SharedUniverseTranslation.name)
-    ).all()
+    shared_universes = get_translated_items(
+        db, m.SharedUniverse, m.SharedUniverseTranslation, m.SharedUniverseTranslation.name, lang
+    )
     if not shared_universes:
         log(log.ERROR, "Shared universes [%s] not found")
         raise HTTPException(status_code=404, detail="Shared universes not found")
 
-    specifications_out = [
-        s.FilterItemOut(
-            key=specification.key,
-            name=specification.get_name(lang),
-            description=specification.get_description(lang),
-            percentage_match=0.0,
-        )
-        for specification in specifications
-    ]
-
-    keywords_out = [
-        s.FilterItemOut(
-            key=keyword.key,
-            name=keyword.get_name(lang),
-            description=keyword.get_description(lang),
-            percentage_match=0.0,
-        )
-        for keyword in keywords
-    ]
-
-    action_times_out = [
-        s.FilterItemOut(
-            key=action_time.key,
-            name=action_time.get_name(lang),
-            description=action_time.get_description(lang),
-            percentage_match=0.0,
+    filters_out = []
+    for entity, items in (("specification", specifications), ("keyword", keywords), ("action_time", action_times)):
+        names = translations.get(db, entity, [item_id for item_id, _ in items])
+        filters_out.append(
+            [
+                s.FilterItemOut(
+                    key=key,
+                    name=names.get_name(item_id, lang),
+                    description=names.get_description(item_id, lang),
+                    percentage_match=0.0,
+                )
+                for item_id, key in items
+            ]
         )
-        for action_time in action_times
-    ]
+    specifications_out, keywords_out, action_times_out = filters_out
 
+    names = translations.get(db, "shared_universe", [su_id for su_id, _ in shared_universes])
     su_out = [
         s.BaseSharedUniverse(
-            key=su.key,
-            name=su.get_name(lang),
-            description=su.get_description(lang),
+            key=key,
+            name=names.get_name(su_id, lang),
+            description=names.get_description(su_id, lang),
         )
-        for su in shared_universes
+        for su_id, key in shared_universes
     ]
 
     return (
@@ -208,3 +159,52 @@ def get_filters(db: Session, lang: s.Language):
         action_times_out,
         su_out,
     )
+
+
+def get_movie_filters_out(db: Session, lang: s.Language) -> s.MovieFiltersListOut:
+    specifications_out, keywords_out, action_times_out, su_out = get_filters(db, lang)
+    actors_out, directors_out, characters_out = get_people_filters(db, lang)
+    genres_out = get_genre_filters(db, lang)
+
+    subgenres = db.execute(
+        sa.select(m.Subgenre.id, m.Subgenre.key, m.Genre.key)
+        .join(m.Subgenre.genre)
+        .join(m.Subgenre.translations)
+        .where(m.SubgenreTranslation.language == lang.value)
+        .order_by(m.SubgenreTranslation.name)
+    ).all()
+    if not subgenres:
+        log(log.ERROR, "Subgenre [%s] not found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subgenre not found")
+
+    visual_profile_categories = db.execute(sa.select(m.VisualProfileCategory.id, m.VisualProfileCategory.key)).all()
+    if not visual_profile_categories:
+        log(log.ERROR, "Visual profile categories [%s] not found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Visual profile categories not found")
+
+    subgenres_out = get_subgenres_out(db, lang, subgenres)
+
+    names = translations.get(
+        db, "visual_profile_category", [category_id for category_id, _ in visual_profile_categories]
+    )
+    vp_categories_out = [
+        s.VisualProfileCategoryOut(
+            key=key,
+            name=names.get_name(category_id, lang),
+            description=names.get_description(category_id, lang),
+        )
+        for category_id, key in visual_profile_categories
+    ]
+
+    return s.MovieFiltersListOut(
+        genres=genres_out,
+        subgenres=subgenres_out,
+        specifications=specifications_out,
+        keywords=keywords_out,
+        action_times=action_times_out,
+        actors=actors_out,
+        directors=directors_out,
+        characters=characters_out,
+        visual_profile_categories=vp_categories_out,
+        shared_universes=su_out,
+    )
@@ -0,0 +1,154 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+import app.models as m
+import app.schema as s
+from app.logger import log
+
+BASE_CRITERIA = ("acting", "plot_storyline", "script_dialogue", "music", "enjoyment", "production_design")
+
+# Criteria that are only counted for movies with the matching rating criterion
+OPTIONAL_CRITERIA = {
+    "visual_effects": s.RatingCriterion.VISUAL_EFFECTS,
+    "scare_factor": s.RatingCriterion.SCARE_FACTOR,
+    "humor": s.RatingCriterion.HUMOR,
+    "animation_cartoon": s.RatingCriterion.ANIMATION_CARTOON,
+}
+
+RATING_FIELDS = ("rating", *BASE_CRITERIA, *OPTIONAL_CRITERIA)
+
+
+def get_empty_rating_values(rating_criterion: str) -> dict:
+    return dict(
+        average_rating=0.0,
+        ratings_count=0,
+        average_by_criteria={
+            **{criterion: 0.0 for criterion in BASE_CRITERIA},
+            **{
+                criterion: 0.0 if rating_criterion == movie_criterion else None
+                for criterion, movie_criterion in OPTIONAL_CRITERIA.items()
+            },
+        },
+    )
+
+
+def get_rating_aggregates(db: Session, movie_ids: list[int] | None = None) -> dict[int, dict]:
+    """Rating aggregates per movie, calculated with a single GROUP BY over ratings.
+
+    Averages are rounded to 2 decimals, NULL criteria are ignored and optional criteria are set
+    only for the matching rating criterion.
+    """
+
+    query = (
+        sa.select(
+            m.Rating.movie_id,
+            m.Movie.rating_criterion,
+            sa.func.count(m.Rating.id),
+            *[sa.func.avg(getattr(m.Rating, field)) for field in RATING_FIELDS],
+        )
+        .join(m.Movie, m.Movie.id == m.Rating.movie_id)
+        .group_by(m.Rating.movie_id, m.Movie.rating_criterion)
+    )
+    if movie_ids is not None:
+        query = query.where(m.Rating.movie_id.in_(movie_ids))
+
+    aggregates = {}
+    for movie_id, rating_criterion, ratings_count, *averages in db.execute(query):
+        values = dict(zip(RATING_FIELDS, [round(average, 2) if average is not None else 0.0 for average in averages]))
+        aggregates[movie_id] = dict(
+            average_rating=values["rating"],
+            ratings_count=ratings_count,
+            average_by_criteria={
+                **{criterion: values[criterion] for criterion in BASE_CRITERIA},
+                **{
+                    criterion: values[criterion] if rating_criterion == movie_criterion else None
+                    for criterion, movie_criterion in OPTIONAL_CRITERIA.items()
+                },
+            },
+        )
+    return aggregates
+
+
+def recalculate_movies_rating(db: Session, movie_ids: list[int] | None = None) -> int:
+    """Recalculate rating aggregates for all movies (or the given ones) with bulk UPDATE by primary key.
+
+    Without `movie_ids` only movies that have ratings are updated. Returns number of updated movies.
+    """
+
+    aggregates = get_rating_aggregates(db, movie_ids)
+
+    if movie_ids is not None:
+        # Movies without ratings left
+        for movie_id, rating_criterion in db.execute(
+            sa.select(m.Movie.id, m.Movie.rating_criterion).where(m.Movie.id.in_(set(movie_ids) - set(aggregates)))
+        ):
+            aggregates[movie_id] = get_empty_rating_values(rating_criterion)
+
+    if aggregates:
+        db.execute(sa.update(m.Movie), [dict(id=movie_id, **values) for movie_id, values in aggregates.items()])
+
+    log(log.DEBUG, "Rating recalculated for [%s] movies", len(aggregates))
+    return len(aggregates)
+
+
+def recalculate_movie_rating(db: Session, movie: m.Movie):
+    """Recalculate rating aggregates of one movie from the database"""
+
+    values = get_rating_aggregates(db, [movie.id]).get(movie.id) or get_empty_rating_values(movie.rating_criterion)
+
+    movie.average_rating = values["average_rating"]
+    movie.ratings_count = values["ratings_count"]
+    movie.average_by_criteria = values["average_by_criteria"]
+
+
+def get_rating_values(rating: m.Rating) -> dict[str, float | None]:
+    """Snapshot of rating fields (to pass old values to `apply_rating_change`)"""
+
+    return {field: getattr(rating, field) for field in RATING_FIELDS}
+
+
+def apply_rating_change(
+    db: Session,
+    movie: m.Movie,
+    old_rating: dict[str, float | None] | None,
+    new_rating: dict[str, float | None] | None,
+):
+    """Update movie rating aggregates in O(1) from the old and new values of one rating.
+
+    `old_rating` is None for a new rating, `new_rating` is None for a deleted one. Stored averages
+    are rounded, so tiny drift is possible; `flask calculate-movie-rating` resyncs exact values.
+    Falls back to a single-movie recalculation when averages can't be derived from stored values.
+    """
+
+    count = movie.ratings_count or 0
+    new_count = count + (new_rating is not None) - (old_rating is not None)
+    criteria = movie.average_by_criteria
+
+    def shift(average: float, old_value: float | None, new_value: float | None) -> float:
+        if not new_count:
+            return 0.0
+        total = average * count - (old_value or 0.0) + (new_value or 0.0)
+        return round(total / new_count, 2)
+
+    is_exact = bool(criteria) and (count > 0 or old_rating is None)
+    if is_exact:
+        for criterion, movie_criterion in OPTIONAL_CRITERIA.items():
+            if movie.rating_criterion != movie_criterion:
+                continue
+            # NULL criteria values are not counted, so the counter can't be shared
+            if any(rating is not None and rating[criterion] is None for rating in (old_rating, new_rating)):
+                is_exact = False
+
+    if not is_exact:
+        recalculate_movie_rating(db, movie)
+        return
+
+    old_rating = old_rating or {}
+    new_rating = new_rating or {}
+
+    movie.average_rating = shift(movie.average_rating or 0.0, old_rating.get("rating"), new_rating.get("rating"))
+    movie.average_by_criteria = {
+        criterion: None if average is None else shift(average, old_rating.get(criterion), new_rating.get(criterion))
+        for criterion, average in criteria.items()
+    }
+    movie.ratings_count = new_count
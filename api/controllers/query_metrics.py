@@ -0,0 +1,180 @@
+import threading
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.logger import log
+from config import config
+
+CFG = config()
+
+
+@dataclass
+class RequestQueryStats:
+    """SQL statements executed while handling one request"""
+
+    statements_count: int = 0
+    db_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: str | None = None
+
+    def add(self, statement: str, duration: float):
+        self.statements_count += 1
+        self.db_time += duration
+        if duration > self.slowest_time:
+            self.slowest_time = duration
+            self.slowest_statement = statement
+
+
+@dataclass
+class RouteQueryStats:
+    """Totals for one route since the worker start"""
+
+    requests_count: int = 0
+    statements_count: int = 0
+    max_statements_count: int = 0
+    db_time: float = 0.0
+    request_time: float = 0.0
+    slowest_time: float = 0.0
+    slowest_statement: str | None = field(default=None, repr=False)
+
+
+# Stats of the request handled in the current context. Sync routes run in a threadpool with a copy
+# of the context, so the same stats object is shared with the middleware.
+current_request_stats: ContextVar[RequestQueryStats | None] = ContextVar("current_request_stats", default=None)
+
+
+class QueryMetrics:
+    """Per-route SQL statement count and latency, collected by the `query_metrics_middleware`.
+
+    Disabled by default (QUERY_METRICS_ENABLED): engine hooks are still installed, but they do nothing
+    outside of a measured request.
+    """
+
+    def __init__(self, enabled: bool, max_statements: int, slow_request_ms: int):
+        self.enabled = enabled
+        self.max_statements = max_statements
+        self.slow_request_ms = slow_request_ms
+        self._routes: dict[tuple[str, str], RouteQueryStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, route: str, stats: RequestQueryStats, request_time: float):
+        with self._lock:
+            route_stats = self._routes.setdefault((method, route), RouteQueryStats())
+            route_stats.requests_count += 1
+            route_stats.statements_count += stats.statements_count
+            route_stats.max_statements_count = max(route_stats.max_statements_count, stats.statements_count)
+            route_stats.db_time += stats.db_time
+            route_stats.request_time += request_time
+            if stats.slowest_time > route_stats.slowest_time:
+                route_stats.slowest_time = stats.slowest_time
+                route_stats.slowest_statement = stats.slowest_statement
+
+        if stats.statements_count > self.max_statements or request_time * 1000 > self.slow_request_ms:
+            log(
+                log.WARNING,
+                "Route [%s %s]: [%s] statements, [%.1f] ms in DB, [%.1f] ms total, slowest [%.1f] ms: %s",
+                method,
+                route,
+                stats.statements_count,
+                stats.db_time * 1000,
+                request_time * 1000,
+                stats.slowest_time * 1000,
+                stats.slowest_statement,
+            )
+
+    def get_route_stats(self, method: str, route: str) -> RouteQueryStats | None:
+        return self._routes.get((method, route))
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+
+        metrics = (
+            ("requests_total", "counter", "Requests handled", "requests_count"),
+            ("db_statements_total", "counter", "SQL statements executed", "statements_count"),
+            ("db_statements_max", "gauge", "Max SQL statements in one request", "max_statements_count"),
+            ("db_seconds_total", "counter", "Time spent executing SQL statements", "db_time"),
+            ("db_slowest_statement_seconds", "gauge", "Slowest SQL statement", "slowest_time"),
+            ("request_seconds_total", "counter", "Time spent handling requests", "request_time"),
+        )
+
+        with self._lock:
+            routes = sorted(self._routes.items())
+
+        lines = []
+        for name, metric_type, description, attr in metrics:
+            lines.append(f"# HELP api_{name} {description}")
+            lines.append(f"# TYPE api_{name} {metric_type}")
+            for (method, route), route_stats in routes:
+                lines.append(f'api_{name}{{method="{method}",route="{route}"}} {getattr(route_stats, attr)}')
+        return "\n".join(lines) + "\n"
+
+
+query_metrics = QueryMetrics(
+    enabled=CFG.QUERY_METRICS_ENABLED,
+    max_statements=CFG.QUERY_METRICS_MAX_STATEMENTS,
+    slow_request_ms=CFG.QUERY_METRICS_SLOW_REQUEST_MS,
+)
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request_stats.get() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request_stats.get()
+    start_times = conn.info.get("query_start_time")
+    if stats is None or not start_times:
+        return
+    stats.add(statement, time.perf_counter() - start_times.pop())
+
+
+def install_query_hooks(engine: Engine):
+    """Measure SQL statements executed by the engine"""
+
+    if not event.contains(engine, "before_cursor_execute", before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def get_route_path(request: Request) -> str:
+    """Route template (like /api/movies/{movie_key}) to keep the number of metric labels bounded"""
+
+    route = request.scope.get("route")
+    return route.path if route else "unmatched"
+
+
+async def query_metrics_middleware(request: Request, call_next) -> Response:
+    """Collect SQL statements of the request and expose them as the Server-Timing header"""
+
+    if not query_metrics.enabled:
+        return await call_next(request)
+
+    stats = RequestQueryStats()
+    token = current_request_stats.set(stats)
+    start_time = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_stats.reset(token)
+    request_time = time.perf_counter() - start_time
+
+    query_metrics.record(request.method, get_route_path(request), stats, request_time)
+
+    response.headers["Server-Timing"] = ", ".join(
+        [
+            f'db;dur={stats.db_time * 1000:.2f};desc="{stats.statements_count} statements"',
+            f"db-slowest;dur={stats.slowest_time * 1000:.2f}",
+            f"total;dur={request_time * 1000:.2f}",
+        ]
+    )
+    return response
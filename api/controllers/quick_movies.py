@@ -0,0 +1,63 @@
+import sqlalchemy as sa
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import app.models as m
+import app.schema as s
+from app.logger import log
+
+
+class QuickMovieExistsError(Exception):
+    def __init__(self, key: str):
+        super().__init__(f"Quick movie [{key}] already exists")
+        self.key = key
+
+
+def get_quick_movies(db: Session) -> list[m.QuickMovie]:
+    """Quick movies, the latest first"""
+
+    return list(db.scalars(sa.select(m.QuickMovie).order_by(m.QuickMovie.id.desc())))
+
+
+def get_quick_movie(db: Session, key: str) -> s.QuickMovieFormData | None:
+    quick_movie = db.scalar(sa.select(m.QuickMovie).where(m.QuickMovie.key == key))
+    if not quick_movie:
+        return None
+
+    return s.QuickMovieFormData(
+        key=quick_movie.key,
+        title_en=quick_movie.title_en,
+        rating=quick_movie.rating,
+        rating_criterion_type=s.RatingCriterion(quick_movie.rating_criterion),
+        rating_criteria=s.BaseRatingCriteria.model_validate(quick_movie.rating_criteria),
+    )
+
+
+def count_quick_movies(db: Session) -> int:
+    return db.scalar(sa.select(sa.func.count()).select_from(m.QuickMovie)) or 0
+
+
+def add_quick_movie(db: Session, form_data: s.QuickMovieFormData):
+    """Insert and commit the quick movie. The unique key makes concurrent adds of the same movie safe"""
+
+    db.add(
+        m.QuickMovie(
+            key=form_data.key,
+            title_en=form_data.title_en,
+            rating=form_data.rating,
+            rating_criterion=form_data.rating_criterion_type.value,
+            rating_criteria=form_data.rating_criteria.model_dump(mode="json"),
+        )
+    )
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise QuickMovieExistsError(form_data.key)
+
+
+def remove_quick_movie(db: Session, movie_key: str):
+    """Delete the quick movie in the caller's transaction (e.g. with the movie creation)"""
+
+    deleted = db.execute(sa.delete(m.QuickMovie).where(m.QuickMovie.key == movie_key)).rowcount
+    log(log.DEBUG, "Quick movie [%s] removed: [%s]", movie_key, deleted)
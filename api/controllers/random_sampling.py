@@ -0,0 +1,76 @@
+import random
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+import app.models as m
+from app.models.movie import RANDOM_KEY_MODULUS
+
+# Movies in the random carousel
+RANDOM_MOVIES_COUNT = 10
+
+# Extra probe rounds when sampled movies collide
+SAMPLE_MAX_ROUNDS = 3
+
+
+def generate_seed() -> int:
+    return random.randrange(RANDOM_KEY_MODULUS)
+
+
+def get_random_pivot(seed: int | None) -> int:
+    """Random key where the seeded random order starts"""
+
+    return random.Random(generate_seed() if seed is None else seed).randrange(RANDOM_KEY_MODULUS)
+
+
+def get_seeded_random_order(seed: int | None) -> list[sa.ColumnExpressionArgument]:
+    """Random order of movies which is the same for the same seed: random_key order rotated at the seed pivot.
+
+    Pages of this order are read by keyset from the last (random_key, id), see `get_cursor_sort_keys`.
+    """
+
+    pivot = get_random_pivot(seed)
+    return [sa.case((m.Movie.random_key >= pivot, 0), else_=1), m.Movie.random_key, m.Movie.id]
+
+
+def sample_movie_ids(db: Session, count: int) -> list[int]:
+    """Random movies by probing the random_key index (`count` index lookups instead of a full scan)"""
+
+    def probe(point: int) -> sa.ColumnElement:
+        # The first movie at or after the point, wrapping around to the smallest key
+        return sa.func.coalesce(
+            sa.select(m.Movie.id)
+            .where(m.Movie.random_key >= point)
+            .order_by(m.Movie.random_key)
+            .limit(1)
+            .scalar_subquery(),
+            sa.select(m.Movie.id).order_by(m.Movie.random_key).limit(1).scalar_subquery(),
+        )
+
+    movie_ids: list[int] = []
+    if count <= 0:
+        return movie_ids
+
+    for _ in range(SAMPLE_MAX_ROUNDS):
+        points = [random.randrange(RANDOM_KEY_MODULUS) for _ in range(count - len(movie_ids))]
+        for movie_id in db.execute(sa.select(*[probe(point) for point in points])).one():
+            if movie_id is None:
+                # No movies
+                return movie_ids
+            if movie_id not in movie_ids:
+                movie_ids.append(movie_id)
+        if len(movie_ids) == count:
+            return movie_ids
+
+    # Small catalogue: probes keep colliding, take the next movies by random key instead
+    point = random.randrange(RANDOM_KEY_MODULUS)
+    for condition in (m.Movie.random_key >= point, m.Movie.random_key < point):
+        movie_ids += db.scalars(
+            sa.select(m.Movie.id)
+            .where(condition, m.Movie.id.not_in(movie_ids))
+            .order_by(m.Movie.random_key)
+            .limit(count - len(movie_ids))
+        )
+        if len(movie_ids) == count:
+            break
+
+    return movie_ids
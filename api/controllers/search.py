@@ -0,0 +1,55 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import InstrumentedAttribute, Session
+from sqlalchemy.orm.interfaces import LoaderOption
+
+from api.utils import normalize_query
+from app.models.mixins import KeyedModel, SearchableMixin
+
+SEARCH_LIMIT = 5
+
+
+def get_search_rank(search_name: InstrumentedAttribute[str], query: str) -> sa.ColumnElement[int]:
+    """Lower is better: exact match, name prefix, word prefix, substring"""
+
+    return sa.case(
+        (search_name == query, 0),
+        (search_name.startswith(query), 1),
+        (search_name.contains(f" {query}"), 2),
+        else_=3,
+    )
+
+
+def search_by_name(
+    db: Session,
+    model: type[KeyedModel],
+    translation_model: type[SearchableMixin],
+    owner_id: InstrumentedAttribute[int],
+    query: str,
+    options: list[LoaderOption] | None = None,
+    limit: int = SEARCH_LIMIT,
+) -> list:
+    """Search items by the precomputed `search_name` of their translations, ordered by relevance.
+
+    `owner_id` is the translation column referencing the item (like `MovieTranslation.movie_id`).
+    `LIKE '%query%'` on the normalized column uses the pg_trgm index (a full scan on SQLite).
+    """
+
+    normalized_query = normalize_query(query)
+    search_name = translation_model.search_name
+
+    ids = db.scalars(
+        sa.select(owner_id)
+        .where(search_name.contains(normalized_query))
+        .group_by(owner_id)
+        .order_by(
+            sa.func.min(get_search_rank(search_name, normalized_query)),
+            sa.func.min(sa.func.length(search_name)),
+            owner_id,
+        )
+        .limit(limit)
+    ).all()
+    if not ids:
+        return []
+
+    items = {item.id: item for item in db.scalars(sa.select(model).where(model.id.in_(ids)).options(*options or []))}
+    return [items[id] for id in ids if id in items]
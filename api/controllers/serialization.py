@@ -0,0 +1,107 @@
+import gzip
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+from config import config
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+CFG = config()
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+
+def get_quality(params: list[str]) -> float:
+    """q-value of an Accept-Encoding item, 0 (refused) when it is malformed"""
+
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0
+    return 1
+
+
+def get_content_encoding(request: Request) -> str | None:
+    """Best supported encoding accepted by the client"""
+
+    accepted = set()
+    for value in request.headers.get("accept-encoding", "").split(","):
+        coding, *params = value.split(";")
+        if get_quality(params) > 0:
+            accepted.add(coding.strip().lower())
+    if brotli and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def get_response_encoding(request: Request, content: bytes) -> str | None:
+    """Encoding of the response, None when the content is below RESPONSE_COMPRESSION_MIN_SIZE"""
+
+    min_size = CFG.RESPONSE_COMPRESSION_MIN_SIZE
+    return get_content_encoding(request) if min_size and len(content) >= min_size else None
+
+
+def get_encoded_etag(etag: str, encoding: str | None) -> str:
+    """Strong ETag of the encoded representation (each encoding has its own bytes)"""
+
+    if not encoding:
+        return etag
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    return gzip.compress(content, compresslevel=GZIP_LEVEL)
+
+
+def json_response(
+    request: Request,
+    content: bytes,
+    headers: dict[str, str] | None = None,
+    compressed: dict[str, bytes] | None = None,
+) -> Response:
+    """JSON response from serialized content, compressed above RESPONSE_COMPRESSION_MIN_SIZE.
+
+    `compressed` caches compressed content by encoding (for payloads served many times).
+    An ETag in `headers` gets the encoding suffix (see get_encoded_etag).
+    """
+
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    encoding = get_response_encoding(request, content)
+
+    if encoding:
+        if compressed is None:
+            content = compress(content, encoding)
+        else:
+            if encoding not in compressed:
+                compressed[encoding] = compress(content, encoding)
+            content = compressed[encoding]
+        headers["Content-Encoding"] = encoding
+        if "ETag" in headers:
+            headers["ETag"] = get_encoded_etag(headers["ETag"], encoding)
+
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+def model_response(request: Request, model: BaseModel) -> Response | BaseModel:
+    """Serialize a server-built model straight to JSON.
+
+    Returning a Response makes FastAPI skip the response_model validation and encoding (the data
+    is already validated when the models are built); response_model stays for the OpenAPI schema.
+    """
+
+    if not CFG.FAST_JSON_RESPONSES:
+        return model
+    return json_response(request, to_json(model))
@@ -0,0 +1,304 @@
+import heapq
+import math
+from collections import defaultdict
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, selectinload
+
+import app.models as m
+from api.controllers.create_movie import PERCENTAGE_MATCH_FILTERS
+from app.logger import log
+
+SIMILAR_MOVIES_LIMIT = 10
+
+# Filter weight in the movie vector: genres define similarity the most
+FILTER_WEIGHTS = {
+    "genres": 1.0,
+    "subgenres": 0.8,
+    "specifications": 0.6,
+    "keywords": 0.5,
+    "action_times": 0.3,
+}
+
+# (filter name, item id) -> weight
+MovieVector = dict[tuple[str, int], float]
+
+
+def get_weight(filter_name: str, percentage_match: float) -> float:
+    return FILTER_WEIGHTS[filter_name] * percentage_match / 100
+
+
+def get_norm(vector: MovieVector) -> float:
+    # fsum doesn't depend on the order of the tags, so stored norms match recalculated ones
+    return math.sqrt(math.fsum(weight * weight for weight in vector.values()))
+
+
+def get_score(products: list[float], norm: float, other_norm: float) -> float:
+    return round(math.fsum(products) / (norm * other_norm), 6)
+
+
+def get_top(scores: dict[int, float], limit: int = SIMILAR_MOVIES_LIMIT) -> list[tuple[int, float]]:
+    # Ties are broken by id to keep results stable between refreshes
+    return heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], -item[0]))
+
+
+def get_movie_vectors(db: Session, movie_ids: list[int] | None = None) -> dict[int, MovieVector]:
+    """Sparse vectors of all (or the given) movies, weighted by filter weight and percentage match.
+
+    Loaded with one UNION ALL query.
+    """
+
+    selects = []
+    for field_name, _, table, column_name, _ in PERCENTAGE_MATCH_FILTERS:
+        select = sa.select(
+            sa.literal(field_name).label("filter_name"),
+            table.c.movie_id,
+            table.c[column_name].label("item_id"),
+            table.c.percentage_match,
+        )
+        if movie_ids is not None:
+            select = select.where(table.c.movie_id.in_(movie_ids))
+        selects.append(select)
+
+    movies_query = sa.select(m.Movie.id)
+    if movie_ids is not None:
+        movies_query = movies_query.where(m.Movie.id.in_(movie_ids))
+    vectors: dict[int, MovieVector] = {movie_id: {} for movie_id in db.scalars(movies_query)}
+    for filter_name, movie_id, item_id, percentage_match in db.execute(sa.union_all(*selects)):
+        if movie_id in vectors and percentage_match:
+            vectors[movie_id][(filter_name, item_id)] = get_weight(filter_name, percentage_match)
+    return vectors
+
+
+def get_collections(db: Session) -> dict[int, int]:
+    """Movie id -> base movie id, for movies in a collection (they are shown as related, not similar)"""
+
+    collections = {}
+    for movie_id, base_movie_id in db.execute(
+        sa.select(m.Movie.id, m.Movie.collection_base_movie_id).where(m.Movie.collection_base_movie_id.is_not(None))
+    ):
+        collections[movie_id] = base_movie_id
+        collections[base_movie_id] = base_movie_id
+    return collections
+
+
+def get_collection(db: Session, movie_id: int) -> int | None:
+    """Base movie id of the collection of the movie (the same as `get_collections` gives)"""
+
+    base_movie_id = db.scalar(sa.select(m.Movie.collection_base_movie_id).where(m.Movie.id == movie_id))
+    if base_movie_id:
+        return base_movie_id
+    if db.scalar(sa.select(m.Movie.id).where(m.Movie.collection_base_movie_id == movie_id).limit(1)):
+        return movie_id
+    return None
+
+
+class MovieSimilarity:
+    """Cosine similarity between movie vectors, with an inverted index (tag -> movies) for sparse dot products"""
+
+    def __init__(self, vectors: dict[int, MovieVector], collections: dict[int, int]):
+        self.vectors = vectors
+        self.collections = collections
+        self.norms = {movie_id: get_norm(vector) for movie_id, vector in vectors.items()}
+        self.postings: dict[tuple[str, int], list[tuple[int, float]]] = defaultdict(list)
+        for movie_id, vector in vectors.items():
+            for tag, weight in vector.items():
+                self.postings[tag].append((movie_id, weight))
+
+    def get_scores(self, movie_id: int) -> dict[int, float]:
+        """Similarity to every movie sharing at least one tag"""
+
+        norm = self.norms.get(movie_id)
+        if not norm:
+            return {}
+
+        products: dict[int, list[float]] = defaultdict(list)
+        for tag, weight in self.vectors[movie_id].items():
+            for other_id, other_weight in self.postings[tag]:
+                products[other_id].append(weight * other_weight)
+
+        collection = self.collections.get(movie_id)
+        return {
+            other_id: get_score(other_products, norm, self.norms[other_id])
+            for other_id, other_products in products.items()
+            if other_id != movie_id and (collection is None or self.collections.get(other_id) != collection)
+        }
+
+    def get_top(self, movie_id: int, limit: int = SIMILAR_MOVIES_LIMIT) -> list[tuple[int, float]]:
+        return get_top(self.get_scores(movie_id), limit)
+
+
+def get_tag_movies_query(vector: MovieVector) -> sa.Subquery:
+    """(filter name, movie id, item id, percentage match) of the movies with the tags of the vector.
+
+    Read through the tag side (tag id, percentage match, movie id) indexes.
+    """
+
+    selects = []
+    for field_name, _, table, column_name, _ in PERCENTAGE_MATCH_FILTERS:
+        item_ids = [item_id for filter_name, item_id in vector if filter_name == field_name]
+        if item_ids:
+            selects.append(
+                sa.select(
+                    sa.literal(field_name).label("filter_name"),
+                    table.c.movie_id,
+                    table.c[column_name].label("item_id"),
+                    table.c.percentage_match,
+                ).where(table.c[column_name].in_(item_ids))
+            )
+    return sa.union_all(*selects).subquery()
+
+
+def get_movie_scores(db: Session, movie_id: int) -> tuple[float, dict[int, float], sa.Subquery | None]:
+    """Norm of the movie vector and its similarity to every movie sharing a tag (as `MovieSimilarity.get_scores`).
+
+    Only the vector of the movie is loaded: other movies are found by its tags, with their stored norms.
+    Also returns the query of the movies sharing a tag.
+    """
+
+    vector = get_movie_vectors(db, [movie_id]).get(movie_id, {})
+    norm = get_norm(vector)
+    if not norm:
+        return norm, {}, None
+
+    tag_movies = get_tag_movies_query(vector)
+    collection = get_collection(db, movie_id)
+    products: dict[int, list[float]] = defaultdict(list)
+    other_norms: dict[int, float] = {}
+    for filter_name, other_id, item_id, percentage_match, other_norm, base_movie_id in db.execute(
+        sa.select(tag_movies, m.Movie.similarity_norm, m.Movie.collection_base_movie_id).join(
+            m.Movie, m.Movie.id == tag_movies.c.movie_id
+        )
+    ):
+        if other_id == movie_id or not percentage_match:
+            continue
+        if collection is not None and collection in (other_id, base_movie_id):
+            continue
+        products[other_id].append(vector[(filter_name, item_id)] * get_weight(filter_name, percentage_match))
+        other_norms[other_id] = other_norm
+
+    scores = {
+        other_id: get_score(other_products, norm, other_norms[other_id])
+        for other_id, other_products in products.items()
+        if other_norms[other_id]
+    }
+    return norm, scores, tag_movies
+
+
+def refresh_movie_similarities(db: Session, movie_id: int) -> dict[int, list[tuple[int, float]]]:
+    """New top lists after tags of the movie changed: its own list and the lists it enters or leaves.
+
+    Another list is rebuilt from its stored rows when that is exact, and recalculated (with
+    `get_movie_scores`) only when the movie leaves a full list or ties with its lowest score.
+    """
+
+    norm, scores, tag_movies = get_movie_scores(db, movie_id)
+    db.execute(sa.update(m.Movie).where(m.Movie.id == movie_id).values(similarity_norm=norm))
+    tops = {movie_id: get_top(scores)}
+
+    table = m.similar_movies
+    # Lists with the movie, and lists of the movies sharing a tag that it may enter
+    listed = set(db.scalars(sa.select(table.c.movie_id).where(table.c.similar_movie_id == movie_id)))
+    lists_conditions = [table.c.movie_id.in_(listed)]
+    if tag_movies is not None:
+        lists_conditions.append(table.c.movie_id.in_(sa.select(tag_movies.c.movie_id)))
+    # Other movies of the lists: list -> (count, lowest score)
+    lists = {
+        list_id: (count, lowest_score)
+        for list_id, count, lowest_score in db.execute(
+            sa.select(table.c.movie_id, sa.func.count(), sa.func.min(table.c.score))
+            .where(sa.or_(*lists_conditions), table.c.similar_movie_id != movie_id)
+            .group_by(table.c.movie_id)
+        )
+    }
+
+    rebuilt = []
+    recalculated = []
+    for list_id in listed | set(scores):
+        score = scores.get(list_id)
+        count, lowest_score = lists.get(list_id, (0, None))
+        is_full = count >= SIMILAR_MOVIES_LIMIT - (list_id in listed)
+        if lowest_score is not None and score == lowest_score:
+            recalculated.append(list_id)
+        elif not is_full or (score is not None and (lowest_score is None or score > lowest_score)):
+            rebuilt.append(list_id)
+        elif list_id in listed:
+            # The movie leaves a full list, the next movie of the list is not stored
+            recalculated.append(list_id)
+
+    if rebuilt:
+        list_scores: dict[int, dict[int, float]] = {list_id: {} for list_id in rebuilt}
+        for list_id, similar_movie_id, similar_score in db.execute(
+            sa.select(table.c.movie_id, table.c.similar_movie_id, table.c.score).where(
+                table.c.movie_id.in_(rebuilt), table.c.similar_movie_id != movie_id
+            )
+        ):
+            list_scores[list_id][similar_movie_id] = similar_score
+        for list_id, other_scores in list_scores.items():
+            if list_id in scores:
+                other_scores[movie_id] = scores[list_id]
+            tops[list_id] = get_top(other_scores)
+
+    for list_id in recalculated:
+        tops[list_id] = get_top(get_movie_scores(db, list_id)[1])
+
+    return tops
+
+
+def insert_top_lists(db: Session, tops: dict[int, list[tuple[int, float]]]):
+    rows = [
+        dict(movie_id=movie_id, similar_movie_id=similar_movie_id, score=score)
+        for movie_id, top in tops.items()
+        for similar_movie_id, score in top
+    ]
+    if rows:
+        db.execute(sa.insert(m.similar_movies), rows)
+
+
+def refresh_similar_movies(db: Session, movie_ids: list[int] | None = None) -> int:
+    """Recalculate the top similar movies table.
+
+    Without `movie_ids` all movies (and their stored norms) are recalculated. With `movie_ids`
+    (movies whose tags changed) only their vectors are loaded, and only their lists and the lists
+    they enter or leave are rewritten. Returns number of refreshed movies.
+    """
+
+    if movie_ids is None:
+        similarity = MovieSimilarity(get_movie_vectors(db), get_collections(db))
+        tops = {movie_id: similarity.get_top(movie_id) for movie_id in similarity.vectors}
+        db.execute(sa.delete(m.similar_movies))
+        insert_top_lists(db, tops)
+
+        stored_norms = {movie_id: norm for movie_id, norm in db.execute(sa.select(m.Movie.id, m.Movie.similarity_norm))}
+        norms = [
+            dict(id=movie_id, similarity_norm=norm)
+            for movie_id, norm in similarity.norms.items()
+            if stored_norms.get(movie_id) != norm
+        ]
+        if norms:
+            db.execute(sa.update(m.Movie), norms)
+    else:
+        tops = {}
+        for movie_id in movie_ids:
+            movie_tops = refresh_movie_similarities(db, movie_id)
+            db.execute(sa.delete(m.similar_movies).where(m.similar_movies.c.movie_id.in_(list(movie_tops))))
+            insert_top_lists(db, movie_tops)
+            tops.update(movie_tops)
+
+    log(log.DEBUG, "Similar movies refreshed for [%s] movies", len(tops))
+    return len(tops)
+
+
+def get_top_similar_movies(db: Session, movie_id: int, limit: int = SIMILAR_MOVIES_LIMIT) -> list[m.Movie]:
+    """Most similar movies from the precomputed table"""
+
+    return list(
+        db.scalars(
+            sa.select(m.Movie)
+            .join(m.similar_movies, m.similar_movies.c.similar_movie_id == m.Movie.id)
+            .where(m.similar_movies.c.movie_id == movie_id)
+            .order_by(m.similar_movies.c.score.desc(), m.Movie.id)
+            .options(selectinload(m.Movie.translations))
+            .limit(limit)
+        )
+    )
@@ -0,0 +1,577 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from itertools import chain
+from typing import Callable, Sequence
+
+import sqlalchemy as sa
+from fastapi_pagination import Params, create_page
+from sqlalchemy.orm import Session, selectinload
+from starlette.concurrency import run_in_threadpool
+
+import app.models as m
+import app.schema as s
+from api.controllers.movie_associations import AssociationChange, on_association_change
+from api.controllers.random_sampling import get_random_pivot
+from api.utils import extract_values, extract_word
+from app.database import db
+from app.logger import log
+from config import config
+
+CFG = config()
+
+# Association tables with percentage_match: filter name -> (table, tag model, tag column)
+PERCENTAGE_FILTERS: dict[str, tuple[sa.Table, type[m.KeyedModel], sa.Column]] = {
+    "genre": (m.movie_genres, m.Genre, m.movie_genres.c.genre_id),
+    "subgenre": (m.movie_subgenres, m.Subgenre, m.movie_subgenres.c.subgenre_id),
+    "specification": (m.movie_specifications, m.Specification, m.movie_specifications.c.specification_id),
+    "keyword": (m.movie_keywords, m.Keyword, m.movie_keywords.c.keyword_id),
+    "action_time": (m.movie_action_times, m.ActionTime, m.movie_action_times.c.action_time_id),
+}
+
+
+# PERCENTAGE_MATCH_FILTERS field name -> filter name
+FIELD_FILTERS = {
+    "genres": "genre",
+    "subgenres": "subgenre",
+    "specifications": "specification",
+    "keywords": "keyword",
+    "action_times": "action_time",
+}
+
+
+def to_bitmap(movie_ids: list[int]) -> int:
+    """Pack movie ids into an int where bit N is set for movie with id N"""
+
+    if not movie_ids:
+        return 0
+
+    buffer = bytearray(max(movie_ids) // 8 + 1)
+    for movie_id in movie_ids:
+        buffer[movie_id >> 3] |= 1 << (movie_id & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def from_bitmap(bitmap: int) -> list[int]:
+    """Movie ids of the set bits of the bitmap in ascending order"""
+
+    movie_ids = []
+    buffer = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    for position, byte in enumerate(buffer):
+        if not byte:
+            continue
+        for bit in range(8):
+            if byte >> bit & 1:
+                movie_ids.append(position * 8 + bit)
+    return movie_ids
+
+
+# Facets AND the item bitmaps when the counted movies have more than this many associations
+# per item of the filter. Measured with timeit on random bitmaps of 10 000 movies: an AND and
+# popcount of two bitmaps took 0.7 us, counting one association with Counter took 45 ns.
+BITMAP_COST_ASSOCIATIONS = 16
+
+# Facet counts of the latest selections kept by the index
+FACETS_CACHE_SIZE = 128
+
+
+@dataclass
+class PostingList:
+    """Movies of one filter item sorted by percentage match.
+
+    Searches read posting lists without a lock, so a loaded posting list is never changed in place:
+    `added` and `removed` return a changed copy.
+    """
+
+    percentages: list[float] = field(default_factory=list)
+    movie_ids: list[int] = field(default_factory=list)
+    bitmap: int = 0
+
+    def select(self, low: float, high: float) -> int:
+        start = bisect_left(self.percentages, low)
+        end = bisect_right(self.percentages, high)
+        if start == 0 and end == len(self.percentages):
+            return self.bitmap
+        return to_bitmap(self.movie_ids[start:end])
+
+    def added(self, movie_id: int, percentage: float) -> "PostingList":
+        position = bisect_right(self.percentages, percentage)
+        return PostingList(
+            percentages=[*self.percentages[:position], percentage, *self.percentages[position:]],
+            movie_ids=[*self.movie_ids[:position], movie_id, *self.movie_ids[position:]],
+            bitmap=self.bitmap | 1 << movie_id,
+        )
+
+    def removed(self, movie_id: int) -> "PostingList":
+        if movie_id not in self.movie_ids:
+            return self
+        position = self.movie_ids.index(movie_id)
+        return PostingList(
+            percentages=self.percentages[:position] + self.percentages[position + 1 :],
+            movie_ids=self.movie_ids[:position] + self.movie_ids[position + 1 :],
+            bitmap=self.bitmap & ~(1 << movie_id),
+        )
+
+
+@dataclass
+class MovieSortKeys:
+    release_date: datetime | None
+    average_rating: float
+    ratings_count: int
+    random_key: int
+
+
+class SuperSearchIndex:
+    """In-memory inverted index over the movie association tables.
+
+    Every filter item is stored as a posting list (bitmap of movie ids plus the ids sorted by
+    percentage match), so super search filters are answered with bitwise AND/OR instead of one
+    correlated EXISTS subquery per selected item.
+
+    Searches run without a lock: updates build new posting lists and movie sort keys and swap
+    them in, and are serialized with `update_lock`.
+    """
+
+    def __init__(self):
+        self.percentage_postings: dict[str, dict[str, PostingList]] = {name: {} for name in PERCENTAGE_FILTERS}
+        self.postings: dict[str, dict[str, int]] = {
+            "actor": {},
+            "director": {},
+            "character": {},
+            "shared_universe": {},
+            "visual_profile": {},
+        }
+        self.visual_profile_categories: set[str] = set()
+        # Filter name -> movie id -> keys of its items (for facet counts)
+        self.movie_items: dict[str, dict[int, list[str]]] = {
+            name: {} for name in [*self.percentage_postings, *self.postings]
+        }
+        # Filter name -> item key -> number of movies, calculated on the first facets request
+        self.item_sizes: dict[str, dict[str, int]] = {}
+        self.facets_cache: OrderedDict[tuple, tuple[int, dict[str, dict[str, int]]]] = OrderedDict()
+        # Bumped on every filter update: facets counted before it are not cached
+        self.facets_generation = 0
+        self.facets_lock = threading.Lock()
+        self.movies: dict[int, MovieSortKeys] = {}
+        self.all_movies = 0
+        self.update_lock = threading.Lock()
+        self.loaded_at = time.monotonic()
+
+    @classmethod
+    def load(cls, db: Session) -> "SuperSearchIndex":
+        index = cls()
+
+        for name, (table, model, tag_column) in PERCENTAGE_FILTERS.items():
+            rows = db.execute(
+                sa.select(model.key, table.c.movie_id, table.c.percentage_match)
+                .join(model, model.id == tag_column)
+                .order_by(model.key, table.c.percentage_match)
+            ).all()
+            postings = index.percentage_postings[name]
+            movie_items = index.movie_items[name]
+            for key, movie_id, percentage_match in rows:
+                posting = postings.setdefault(key, PostingList())
+                posting.percentages.append(percentage_match)
+                posting.movie_ids.append(movie_id)
+                movie_items.setdefault(movie_id, []).append(key)
+            for posting in postings.values():
+                posting.bitmap = to_bitmap(posting.movie_ids)
+
+        index._add_postings(
+            "actor",
+            db.execute(
+                sa.select(m.Actor.key, m.movie_actors.c.movie_id).join(
+                    m.movie_actors, m.movie_actors.c.actor_id == m.Actor.id
+                )
+            ).all(),
+        )
+        index._add_postings(
+            "director",
+            db.execute(
+                sa.select(m.Director.key, m.movie_directors.c.movie_id).join(
+                    m.movie_directors, m.movie_directors.c.director_id == m.Director.id
+                )
+            ).all(),
+        )
+        index._add_postings(
+            "character",
+            db.execute(
+                sa.select(m.Character.key, m.MovieActorCharacter.movie_id)
+                .select_from(m.MovieActorCharacter)
+                .join(m.MovieActorCharacter.character)
+            ).all(),
+        )
+        index._add_postings(
+            "shared_universe",
+            db.execute(
+                sa.select(m.SharedUniverse.key, m.Movie.id).select_from(m.Movie).join(m.Movie.shared_universe)
+            ).all(),
+        )
+        index._add_postings(
+            "visual_profile",
+            db.execute(
+                sa.select(m.VisualProfileCategory.key, m.VisualProfile.movie_id)
+                .select_from(m.VisualProfile)
+                .join(m.VisualProfile.category)
+            ).all(),
+        )
+        index.visual_profile_categories = set(db.scalars(sa.select(m.VisualProfileCategory.key)))
+
+        for movie_id, release_date, average_rating, ratings_count, random_key in db.execute(
+            sa.select(
+                m.Movie.id, m.Movie.release_date, m.Movie.average_rating, m.Movie.ratings_count, m.Movie.random_key
+            )
+        ):
+            index.movies[movie_id] = MovieSortKeys(release_date, average_rating or 0.0, ratings_count or 0, random_key)
+        index.all_movies = to_bitmap(list(index.movies))
+
+        return index
+
+    def _add_postings(self, name: str, rows: Sequence[sa.Row]):
+        movie_ids: dict[str, list[int]] = {}
+        movie_items = self.movie_items[name]
+        for key, movie_id in rows:
+            movie_ids.setdefault(key, []).append(movie_id)
+            movie_items.setdefault(movie_id, []).append(key)
+        self.postings[name] = {key: to_bitmap(ids) for key, ids in movie_ids.items()}
+
+    def _percentage_selection(self, name: str, items: list[str]) -> list[tuple[str, int]]:
+        keys = extract_word(items)
+        values = extract_values(items)
+
+        # Same pairing as get_genre_query_conditions/get_filter_query_conditions
+        selection = []
+        for key, value_range in zip(keys, values):
+            if value_range:
+                posting = self.percentage_postings[name].get(key)
+                selection.append((key, posting.select(value_range[0], value_range[1]) if posting else 0))
+        return selection
+
+    def _selection(self, filters: dict[str, list[str]]) -> dict[str, list[tuple[str, int]]]:
+        """(key, bitmap) of the selected items of every filter"""
+
+        selection = {name: self._percentage_selection(name, filters.get(name, [])) for name in PERCENTAGE_FILTERS}
+        for name in ("actor", "director", "character", "shared_universe"):
+            selection[name] = [(key, self.postings[name].get(key, 0)) for key in filters.get(name, [])]
+
+        # Unknown visual profile categories are skipped, as in get_visual_profile_query_conditions
+        visual_profiles = self.postings["visual_profile"]
+        selection["visual_profile"] = [
+            (key, visual_profiles.get(key, 0))
+            for key in filters.get("visual_profile", [])
+            if key in self.visual_profile_categories
+        ]
+        return selection
+
+    @staticmethod
+    def _combine(bitmaps: list[int], is_and: bool) -> int | None:
+        if not bitmaps:
+            return None
+
+        result = bitmaps[0]
+        for bitmap in bitmaps[1:]:
+            result = result & bitmap if is_and else result | bitmap
+        return result
+
+    def search(
+        self,
+        filters: dict[str, list[str]],
+        exact_match: bool = False,
+        inner_exact_match: bool = False,
+    ) -> int:
+        """Bitmap of movies matching the super search filters (with the same AND/OR semantics as SQL)"""
+
+        dimensions = [
+            self._combine([bitmap for _, bitmap in items], inner_exact_match)
+            for items in self._selection(filters).values()
+        ]
+        result = self._combine([dimension for dimension in dimensions if dimension is not None], exact_match)
+        return self.all_movies if result is None else result & self.all_movies
+
+    def facet_counts(
+        self,
+        filters: dict[str, list[str]],
+        exact_match: bool = False,
+        inner_exact_match: bool = False,
+    ) -> tuple[int, dict[str, dict[str, int]]]:
+        """Number of movies the search returns, and for every filter item the number it returns with
+        the item added to the selection (items with no movies are left out).
+
+        Adding an item with bitmap b to a filter gives (X & b) | Y, where X and Y depend only on
+        the filter and the selection, so all items of a filter are counted in one pass over the
+        movies of X. Unselected percentage items are counted with any percentage match.
+        """
+
+        cache_key = (
+            tuple((name, tuple(items)) for name, items in sorted(filters.items())),
+            exact_match,
+            inner_exact_match,
+        )
+        with self.facets_lock:
+            if cache_key in self.facets_cache:
+                self.facets_cache.move_to_end(cache_key)
+                return self.facets_cache[cache_key]
+            generation = self.facets_generation
+
+        selection = self._selection(filters)
+        dimensions = {
+            name: self._combine([bitmap for _, bitmap in items], inner_exact_match) for name, items in selection.items()
+        }
+        result = self._combine([dimension for dimension in dimensions.values() if dimension is not None], exact_match)
+        result = self.all_movies if result is None else result & self.all_movies
+
+        facets: dict[str, dict[str, int]] = {}
+        # Movie ids of the bitmaps counted for several filters
+        movie_lists: dict[int, list[int]] = {}
+        for name, dimension in dimensions.items():
+            rest = self._combine(
+                [other for other_name, other in dimensions.items() if other_name != name and other is not None],
+                exact_match,
+            )
+            # (X, Y) for the filter bitmap being `dimension & b` or `dimension | b` (b alone if nothing is selected)
+            if dimension is None or not inner_exact_match:
+                added, kept = self.all_movies, dimension or 0
+            else:
+                added, kept = dimension, 0
+            if rest is not None:
+                if exact_match:
+                    added, kept = added & rest, kept & rest
+                else:
+                    kept |= rest
+            kept &= self.all_movies
+            added &= self.all_movies & ~kept
+            kept_count = kept.bit_count()
+
+            counts = self._count_items(name, added, kept_count, movie_lists)
+            # Selected items are counted as selected (e.g. with their percentage range)
+            for key, bitmap in selection[name]:
+                if key in self._get_item_sizes(name):
+                    count = kept_count + (added & bitmap).bit_count()
+                    if count:
+                        counts[key] = count
+                    else:
+                        counts.pop(key, None)
+            facets[name] = counts
+
+        with self.facets_lock:
+            if generation == self.facets_generation:
+                self.facets_cache[cache_key] = result.bit_count(), facets
+                if len(self.facets_cache) > FACETS_CACHE_SIZE:
+                    self.facets_cache.popitem(last=False)
+        return result.bit_count(), facets
+
+    def _get_item_bitmaps(self, name: str) -> dict[str, int]:
+        if name in PERCENTAGE_FILTERS:
+            return {key: posting.bitmap for key, posting in self.percentage_postings[name].items()}
+        return self.postings[name]
+
+    def _get_item_sizes(self, name: str) -> dict[str, int]:
+        # A filter update can drop the entry at any moment, so the local dict is returned
+        sizes = self.item_sizes.get(name)
+        if sizes is None:
+            sizes = {
+                key: (bitmap & self.all_movies).bit_count() for key, bitmap in self._get_item_bitmaps(name).items()
+            }
+            self.item_sizes[name] = sizes
+        return sizes
+
+    def _count_items(
+        self, name: str, bitmap: int, base_count: int, movie_lists: dict[int, list[int]]
+    ) -> dict[str, int]:
+        """`base_count` plus the number of movies of the bitmap for every item of the filter (zeros left out).
+
+        Filters with few items AND the bitmap of every item. For the others the items of the
+        movies (or of the movies left out, if there are less of them) are counted with Counter.
+        """
+
+        sizes = self._get_item_sizes(name)
+        movies_count = bitmap.bit_count()
+        if not movies_count:
+            return dict.fromkeys(sizes, base_count) if base_count else {}
+        if movies_count == len(self.movies):
+            return {key: base_count + size for key, size in sizes.items() if base_count + size}
+
+        counted_movies = min(movies_count, len(self.movies) - movies_count)
+        associations = sum(sizes.values()) * counted_movies / len(self.movies)
+        if len(sizes) * BITMAP_COST_ASSOCIATIONS < associations:
+            counts = {
+                key: base_count + (bitmap & item_bitmap).bit_count()
+                for key, item_bitmap in self._get_item_bitmaps(name).items()
+            }
+            return {key: count for key, count in counts.items() if count}
+
+        movie_items = self.movie_items[name]
+        if movies_count == counted_movies:
+            if bitmap not in movie_lists:
+                movie_lists[bitmap] = from_bitmap(bitmap)
+            counter = Counter(chain.from_iterable(filter(None, map(movie_items.get, movie_lists[bitmap]))))
+            if not base_count:
+                return counter
+            return {key: base_count + counter.get(key, 0) for key in sizes}
+
+        excluded_bitmap = self.all_movies & ~bitmap
+        if excluded_bitmap not in movie_lists:
+            movie_lists[excluded_bitmap] = from_bitmap(excluded_bitmap)
+        excluded = Counter(chain.from_iterable(filter(None, map(movie_items.get, movie_lists[excluded_bitmap]))))
+        counts = {key: base_count + size - excluded.get(key, 0) for key, size in sizes.items()}
+        return counts if base_count else {key: count for key, count in counts.items() if count}
+
+    def sort(self, bitmap: int, sort_by: s.SortBy, sort_order: s.SortOrder, seed: int | None = None) -> list[int]:
+        movie_ids = from_bitmap(bitmap)
+        is_reverse = sort_order == s.SortOrder.DESC
+
+        if sort_by == s.SortBy.RANDOM:
+            # Same order as get_seeded_random_order
+            pivot = get_random_pivot(seed)
+            movie_ids.sort(
+                key=lambda movie_id: (
+                    self.movies[movie_id].random_key < pivot,
+                    self.movies[movie_id].random_key,
+                    movie_id,
+                )
+            )
+            return movie_ids
+
+        if sort_by == s.SortBy.RELEASE_DATE:
+            # NULL release dates go last in ascending order, as in Postgres
+            dated = [movie_id for movie_id in movie_ids if self.movies[movie_id].release_date]
+            undated = [movie_id for movie_id in movie_ids if not self.movies[movie_id].release_date]
+            dated.sort(key=lambda movie_id: self.movies[movie_id].release_date or datetime.min, reverse=is_reverse)
+            return undated + dated if is_reverse else dated + undated
+
+        if sort_by == s.SortBy.RATING:
+            movie_ids.sort(key=lambda movie_id: self.movies[movie_id].average_rating, reverse=is_reverse)
+        elif sort_by == s.SortBy.RATINGS_COUNT:
+            movie_ids.sort(key=lambda movie_id: self.movies[movie_id].ratings_count, reverse=is_reverse)
+        elif is_reverse:
+            movie_ids.reverse()
+
+        return movie_ids
+
+    def get_sort_values(self, movie_id: int, sort_by: s.SortBy, seed: int | None) -> list:
+        """Sort values of a movie, the same as get_cursor_sort_keys select in SQL"""
+
+        sort_keys = self.movies[movie_id]
+        if sort_by == s.SortBy.RANDOM:
+            return [int(sort_keys.random_key < get_random_pivot(seed)), sort_keys.random_key, movie_id]
+        if sort_by == s.SortBy.RELEASE_DATE:
+            return [int(sort_keys.release_date is None), sort_keys.release_date, movie_id]
+        if sort_by == s.SortBy.RATING:
+            return [sort_keys.average_rating, movie_id]
+        if sort_by == s.SortBy.RATINGS_COUNT:
+            return [sort_keys.ratings_count, movie_id]
+        return [movie_id]
+
+    def update_movie_filter(self, change: AssociationChange):
+        name = FIELD_FILTERS[change.field_name]
+        with self.update_lock:
+            postings = dict(self.percentage_postings[name])
+            for key in [*change.removed, *change.changed]:
+                if key in postings:
+                    postings[key] = postings[key].removed(change.movie_id)
+            for key, percentage in [*change.added.items(), *change.changed.items()]:
+                postings[key] = postings.get(key, PostingList()).added(change.movie_id, percentage)
+            self.percentage_postings[name] = postings
+
+            movie_items = self.movie_items[name]
+            keys = [key for key in movie_items.get(change.movie_id, []) if key not in change.removed]
+            movie_items[change.movie_id] = keys + [key for key in change.added if key not in keys]
+            self.item_sizes.pop(name, None)
+        with self.facets_lock:
+            self.facets_generation += 1
+            self.facets_cache.clear()
+
+    def update_movie_rating(self, movie_id: int, average_rating: float, ratings_count: int):
+        sort_keys = self.movies.get(movie_id)
+        if sort_keys:
+            self.movies[movie_id] = replace(sort_keys, average_rating=average_rating, ratings_count=ratings_count)
+
+
+class SuperSearchIndexHolder:
+    """Lazily (re)builds the process-local index when it is stale or older than SUPER_SEARCH_INDEX_TTL"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._index: SuperSearchIndex | None = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self, index: SuperSearchIndex) -> bool:
+        return time.monotonic() - index.loaded_at <= self.ttl
+
+    def get(self, session: Session) -> SuperSearchIndex:
+        """The index, (re)built with the session when needed. Only for sync code, which runs in the threadpool"""
+
+        index = self._index
+        if index and self.is_fresh(index):
+            return index
+
+        with self._lock:
+            index = self._index
+            if not index or not self.is_fresh(index):
+                start = time.perf_counter()
+                index = SuperSearchIndex.load(session)
+                self._index = index
+                log(
+                    log.INFO,
+                    "Super search index loaded: [%s] movies in [%.3f] sec",
+                    len(index.movies),
+                    time.perf_counter() - start,
+                )
+        return index
+
+    async def get_async(self) -> SuperSearchIndex:
+        """The index for async routes: it is (re)built in the threadpool with its own session.
+
+        Not with the route session, because `AsyncSession.run_sync` runs on the event loop, where
+        the build would block the loop and waiting for the lock could deadlock it.
+        """
+
+        index = self._index
+        if index and self.is_fresh(index):
+            return index
+        return await run_in_threadpool(self._load)
+
+    def _load(self) -> SuperSearchIndex:
+        with db.Session() as session:
+            return self.get(session)
+
+    def mark_stale(self):
+        self._index = None
+
+    def update_movie_rating(self, movie_id: int, average_rating: float, ratings_count: int):
+        if self._index:
+            self._index.update_movie_rating(movie_id, average_rating, ratings_count)
+
+    def update_movie_filter(self, change: AssociationChange):
+        if self._index:
+            self._index.update_movie_filter(change)
+
+
+super_search_index = SuperSearchIndexHolder(ttl=CFG.SUPER_SEARCH_INDEX_TTL)
+on_association_change(super_search_index.update_movie_filter)
+
+
+def is_super_search_index_enabled() -> bool:
+    return CFG.SUPER_SEARCH_BACKEND == "memory"
+
+
+def paginate_movie_ids(
+    db: Session,
+    movie_ids: list[int],
+    params: Params,
+    transformer: Callable[[Sequence[m.Movie]], Sequence[s.MoviePreviewOut]],
+):
+    """Fetch only the requested page of already filtered and sorted movie ids"""
+
+    raw_params = params.to_raw_params().as_limit_offset()
+    offset = raw_params.offset or 0
+    page_ids = movie_ids[offset : offset + (raw_params.limit or len(movie_ids))]
+
+    movies = db.scalars(sa.select(m.Movie).options(selectinload(m.Movie.ratings)).where(m.Movie.id.in_(page_ids))).all()
+    movies_by_id = {movie.id: movie for movie in movies}
+
+    items = transformer([movies_by_id[movie_id] for movie_id in page_ids if movie_id in movies_by_id])
+    return create_page(items, total=len(movie_ids), params=params)
@@ -0,0 +1,248 @@
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import app.models as m
+import app.schema as s
+from app.logger import log
+from config import config
+
+CFG = config()
+
+# Session.info key of translation owners changed in the transaction: entity -> ids
+PENDING_OWNERS_KEY = "translation_owners"
+
+
+@dataclass(frozen=True)
+class TranslationSource:
+    model: type[Any]
+    owner_column: str
+    name_columns: tuple[str, ...]
+    description_column: str | None = None
+
+
+# Entity -> translation table. Movie descriptions are left out: they are only shown on the movie page
+TRANSLATION_SOURCES = {
+    "movie": TranslationSource(m.MovieTranslation, "movie_id", ("title",)),
+    "actor": TranslationSource(m.ActorTranslation, "actor_id", ("first_name", "last_name")),
+    "director": TranslationSource(m.DirectorTranslation, "director_id", ("first_name", "last_name")),
+    "character": TranslationSource(m.CharacterTranslation, "character_id", ("name",)),
+    "genre": TranslationSource(m.GenreTranslation, "genre_id", ("name",), "description"),
+    "subgenre": TranslationSource(m.SubgenreTranslation, "subgenre_id", ("name",), "description"),
+    "specification": TranslationSource(m.SpecificationTranslation, "specification_id", ("name",), "description"),
+    "keyword": TranslationSource(m.KeywordTranslation, "keyword_id", ("name",), "description"),
+    "action_time": TranslationSource(m.ActionTimeTranslation, "action_time_id", ("name",), "description"),
+    "shared_universe": TranslationSource(m.SharedUniverseTranslation, "shared_universe_id", ("name",), "description"),
+    "visual_profile_category": TranslationSource(
+        m.VPCategoryTranslation, "title_category_id", ("name",), "description"
+    ),
+}
+
+SOURCE_ENTITIES = {source.model: entity for entity, source in TRANSLATION_SOURCES.items()}
+
+
+def get_memory_size(value: object) -> int:
+    """Approximate deep size of dicts of strings, in bytes"""
+
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(get_memory_size(key) + get_memory_size(item) for key, item in value.items())
+    return size
+
+
+# language -> entity id -> text
+Texts = dict[str, dict[int, str]]
+
+
+@dataclass
+class TranslationMap:
+    """Names and descriptions of one entity type: language -> entity id -> text"""
+
+    names: Texts = field(default_factory=dict)
+    descriptions: Texts = field(default_factory=dict)
+    # Ids loaded without any translation, not reloaded as missing until the next full load
+    absent: frozenset[int] = frozenset()
+    version: int = 0
+    loaded_at: float = 0.0
+
+    def load(self, db: Session, source: TranslationSource, ids: set[int] | None = None) -> tuple[Texts, Texts]:
+        """New names and descriptions with all (or the given) items reloaded. The map itself is not changed"""
+
+        owner_column = getattr(source.model, source.owner_column)
+        columns = [owner_column, source.model.language] + [getattr(source.model, c) for c in source.name_columns]
+        if source.description_column:
+            columns.append(getattr(source.model, source.description_column))
+
+        query = sa.select(*columns)
+        names: Texts = {}
+        descriptions: Texts = {}
+        if ids is not None:
+            query = query.where(owner_column.in_(ids))
+            names = {language: self._without(texts, ids) for language, texts in self.names.items()}
+            descriptions = {language: self._without(texts, ids) for language, texts in self.descriptions.items()}
+
+        names_count = len(source.name_columns)
+        for row in db.execute(query):
+            item_id, language = row[0], row[1]
+            names.setdefault(language, {})[item_id] = " ".join(row[2 : 2 + names_count])
+            if source.description_column:
+                descriptions.setdefault(language, {})[item_id] = row[-1]
+        return names, descriptions
+
+    def swap(self, names: Texts, descriptions: Texts, absent: frozenset[int], is_full: bool):
+        # Readers get either the old or the new dicts, never a partially updated one
+        self.names = names
+        self.descriptions = descriptions
+        self.absent = absent
+        self.version += 1
+        if is_full:
+            self.loaded_at = time.monotonic()
+
+    def get_missing(self, ids: Iterable[int]) -> set[int]:
+        """Ids without translations in the map, like created by another process"""
+
+        names = self.names
+        return {
+            item_id
+            for item_id in ids
+            if item_id not in self.absent and not any(item_id in texts for texts in names.values())
+        }
+
+    @staticmethod
+    def _without(texts: dict[int, str], ids: set[int]) -> dict[int, str]:
+        return {item_id: text for item_id, text in texts.items() if item_id not in ids}
+
+    def _get(self, texts: dict[str, dict[int, str]], item_id: int, lang: s.Language) -> str:
+        text = texts.get(lang.value, {}).get(item_id)
+        if text is not None:
+            return text
+        # Fallback to any other language, like the models do
+        return next((by_id[item_id] for by_id in texts.values() if item_id in by_id), "")
+
+    def get_name(self, item_id: int, lang: s.Language) -> str:
+        return self._get(self.names, item_id, lang)
+
+    def get_description(self, item_id: int, lang: s.Language) -> str:
+        return self._get(self.descriptions, item_id, lang)
+
+    @property
+    def memory_size(self) -> int:
+        return get_memory_size(self.names) + get_memory_size(self.descriptions)
+
+
+class Translations:
+    """Process-local translation maps, loaded once per entity type and refreshed for changed entities only.
+
+    Response builders resolve names by id here instead of loading `*Translation` objects and
+    scanning them with `get_name`/`get_title` for every object.
+
+    Commits in this process refresh the changed entities. Changes of other processes (other workers,
+    CLI commands) are picked up for looked up ids missing in the map, and by a full reload after the TTL.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._maps: dict[str, TranslationMap] = {}
+        self._pending: dict[str, set[int]] = {}
+        self._lock = threading.Lock()
+
+    def is_fresh(self, translation_map: TranslationMap) -> bool:
+        return time.monotonic() - translation_map.loaded_at <= self.ttl
+
+    def get(self, db: Session, entity: str, ids: Iterable[int] = ()) -> TranslationMap:
+        """Translation map of the entity type. `ids` (the items to be looked up) missing in the map are loaded"""
+
+        translation_map = self._maps.get(entity)
+        if translation_map and self.is_fresh(translation_map):
+            missing = translation_map.get_missing(ids)
+            if missing:
+                self.invalidate(entity, missing)
+            elif entity not in self._pending:
+                return translation_map
+
+        # The lock is never held across I/O: async routes run this on the event loop (AsyncSession.run_sync),
+        # where waiting for a lock held by another request that is waiting for the database blocks the loop
+        with self._lock:
+            reload_ids = self._pending.pop(entity, None)
+            translation_map = self._maps.get(entity)
+            is_full = not translation_map or not self.is_fresh(translation_map)
+            version = translation_map.version if translation_map else 0
+        if translation_map and not is_full and reload_ids is None:
+            # Refreshed by another request
+            return translation_map
+
+        source = TRANSLATION_SOURCES[entity]
+        start = time.perf_counter()
+        new_map = translation_map or TranslationMap()
+        if is_full or reload_ids is None:
+            names, descriptions = new_map.load(db, source)
+            absent: frozenset[int] = frozenset()
+        else:
+            names, descriptions = new_map.load(db, source, reload_ids)
+            absent = (new_map.absent - reload_ids) | {
+                item_id for item_id in reload_ids if not any(item_id in texts for texts in names.values())
+            }
+
+        with self._lock:
+            current_map = self._maps.get(entity)
+            if current_map is translation_map and new_map.version == version:
+                new_map.swap(names, descriptions, absent, is_full)
+                self._maps[entity] = current_map = new_map
+            elif reload_ids:
+                # Refreshed concurrently, the ids are reloaded from the newer map by the next request
+                self._pending.setdefault(entity, set()).update(reload_ids)
+        if is_full:
+            log(
+                log.INFO,
+                "Translations [%s] loaded: [%s] items, [%.1f] KB in [%.3f] sec",
+                entity,
+                sum(len(texts) for texts in names.values()),
+                (get_memory_size(names) + get_memory_size(descriptions)) / 1024,
+                time.perf_counter() - start,
+            )
+        return current_map or new_map
+
+    def invalidate(self, entity: str, ids: set[int]):
+        with self._lock:
+            # Also kept for a map being loaded: its rows may be read before the change
+            self._pending.setdefault(entity, set()).update(ids)
+
+    def clear(self):
+        with self._lock:
+            self._maps.clear()
+            self._pending.clear()
+
+    @property
+    def memory_size(self) -> int:
+        return sum(translation_map.memory_size for translation_map in self._maps.values())
+
+
+translations = Translations(ttl=CFG.TRANSLATIONS_CACHE_TTL)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_translations(session: Session, flush_context):
+    pending: dict[str, set[int]] = session.info.setdefault(PENDING_OWNERS_KEY, {})
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        entity = SOURCE_ENTITIES.get(type(instance))
+        if entity:
+            owner_id = getattr(instance, TRANSLATION_SOURCES[entity].owner_column)
+            if owner_id is not None:
+                pending.setdefault(entity, set()).add(owner_id)
+
+
+@event.listens_for(Session, "after_commit")
+def refresh_changed_translations(session: Session):
+    for entity, ids in session.info.pop(PENDING_OWNERS_KEY, {}).items():
+        translations.invalidate(entity, ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_translations(session: Session):
+    session.info.pop(PENDING_OWNERS_KEY, None)
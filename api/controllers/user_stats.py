@@ -0,0 +1,213 @@
+from collections import defaultdict
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from api.controllers.movie_associations import AssociationChange
+import app.models as m
+from app.logger import log
+
+# Movies in the user top rated list
+USER_TOP_MOVIES_COUNT = 3
+
+
+def get_top_rated_query(user_ids: list[int] | None = None) -> sa.Select:
+    """(user_id, movie_id, rating) of the best rated movies of each user, ties broken by the rating id"""
+
+    position = (
+        sa.func.row_number()
+        .over(partition_by=m.Rating.user_id, order_by=(m.Rating.rating.desc(), m.Rating.id))
+        .label("position")
+    )
+    ranked_query = sa.select(m.Rating.user_id, m.Rating.movie_id, m.Rating.rating, position)
+    if user_ids is not None:
+        ranked_query = ranked_query.where(m.Rating.user_id.in_(user_ids))
+    ranked = ranked_query.subquery()
+
+    return (
+        sa.select(ranked.c.user_id, ranked.c.movie_id, ranked.c.rating)
+        .where(ranked.c.position <= USER_TOP_MOVIES_COUNT)
+        .order_by(ranked.c.user_id, ranked.c.position)
+    )
+
+
+def recalculate_users_stats(db: Session, user_ids: list[int] | None = None) -> int:
+    """Rebuild stats of all users (or the given ones) from ratings with a few GROUP BY queries.
+
+    Returns number of users with stats.
+    """
+
+    stats: dict[int, dict] = {}
+    if user_ids is not None:
+        # Users without ratings get empty stats
+        stats = {
+            user_id: dict(user_id=user_id, ratings_count=0, last_rated_at=None, top_rated=[]) for user_id in user_ids
+        }
+
+    counts_query = sa.select(
+        m.Rating.user_id,
+        sa.func.count(m.Rating.id),
+        sa.func.max(m.Rating.created_at),
+        sa.func.max(m.Rating.updated_at),
+    ).group_by(m.Rating.user_id)
+    genres_query = (
+        sa.select(m.Rating.user_id, m.movie_genres.c.genre_id, sa.func.count(sa.distinct(m.Rating.movie_id)))
+        .join(m.movie_genres, m.movie_genres.c.movie_id == m.Rating.movie_id)
+        .group_by(m.Rating.user_id, m.movie_genres.c.genre_id)
+    )
+    if user_ids is not None:
+        counts_query = counts_query.where(m.Rating.user_id.in_(user_ids))
+        genres_query = genres_query.where(m.Rating.user_id.in_(user_ids))
+
+    for user_id, ratings_count, last_created_at, last_updated_at in db.execute(counts_query):
+        dates = [date for date in (last_created_at, last_updated_at) if date]
+        stats[user_id] = dict(
+            user_id=user_id, ratings_count=ratings_count, last_rated_at=max(dates, default=None), top_rated=[]
+        )
+    for user_id, movie_id, rating in db.execute(get_top_rated_query(user_ids)):
+        stats[user_id]["top_rated"].append((movie_id, rating))
+
+    genre_rows = [
+        dict(user_id=user_id, genre_id=genre_id, movies_count=movies_count)
+        for user_id, genre_id, movies_count in db.execute(genres_query)
+    ]
+
+    for table in (m.UserStats.__table__, m.user_genre_stats):
+        delete = sa.delete(table)
+        if user_ids is not None:
+            delete = delete.where(table.c.user_id.in_(user_ids))
+        db.execute(delete)
+
+    if stats:
+        db.execute(sa.insert(m.UserStats), list(stats.values()))
+    if genre_rows:
+        db.execute(sa.insert(m.user_genre_stats), genre_rows)
+
+    log(log.DEBUG, "Stats recalculated for [%s] users", len(stats))
+    return len(stats)
+
+
+def get_users_stats(db: Session, user_ids: list[int]) -> dict[int, m.UserStats]:
+    """Stats by user id, read only. Users without stats (nothing rated yet) get empty unsaved stats.
+
+    Stats are written on rating changes, imports and by `flask calculate-user-stats`.
+    """
+
+    users_stats = {
+        stats.user_id: stats for stats in db.scalars(sa.select(m.UserStats).where(m.UserStats.user_id.in_(user_ids)))
+    }
+    for user_id in user_ids:
+        if user_id not in users_stats:
+            users_stats[user_id] = m.UserStats(user_id=user_id, ratings_count=0, last_rated_at=None, top_rated=[])
+    return users_stats
+
+
+def get_user_genres_stats(db: Session, user_id: int) -> list[tuple[int, int]]:
+    """(genre_id, movies_count) of the user, the most rated genres first"""
+
+    return [
+        (genre_id, movies_count)
+        for genre_id, movies_count in db.execute(
+            sa.select(m.user_genre_stats.c.genre_id, m.user_genre_stats.c.movies_count)
+            .where(m.user_genre_stats.c.user_id == user_id, m.user_genre_stats.c.movies_count > 0)
+            .order_by(m.user_genre_stats.c.movies_count.desc(), m.user_genre_stats.c.genre_id)
+        )
+    ]
+
+
+def add_genres_count(db: Session, counts: dict[tuple[int, int], int]):
+    """Add `count` to movies_count of (user_id, genre_id) pairs, creating missing rows"""
+
+    counts = {pair: count for pair, count in counts.items() if count}
+    if not counts:
+        return
+
+    table = m.user_genre_stats
+    existing = set(
+        db.execute(
+            sa.select(table.c.user_id, table.c.genre_id).where(
+                sa.tuple_(table.c.user_id, table.c.genre_id).in_(list(counts))
+            )
+        ).tuples()
+    )
+
+    if existing:
+        db.execute(
+            sa.update(table)
+            .where(table.c.user_id == sa.bindparam("b_user_id"), table.c.genre_id == sa.bindparam("b_genre_id"))
+            .values(movies_count=table.c.movies_count + sa.bindparam("b_count")),
+            [
+                dict(b_user_id=user_id, b_genre_id=genre_id, b_count=counts[(user_id, genre_id)])
+                for user_id, genre_id in existing
+            ],
+        )
+    new_rows = [
+        dict(user_id=user_id, genre_id=genre_id, movies_count=count)
+        for (user_id, genre_id), count in counts.items()
+        if (user_id, genre_id) not in existing and count > 0
+    ]
+    if new_rows:
+        db.execute(sa.insert(table), new_rows)
+
+
+def apply_user_rating_change(db: Session, user_id: int, movie_id: int, is_new: bool):
+    """Update user stats after the user rated the movie (`is_new`) or changed the rating.
+
+    Call after the rating is flushed. Counters are incremented in SQL; the top rated list is
+    re-read from the (user_id, rating) index only when the rating can change it.
+    """
+
+    stats = db.scalar(sa.select(m.UserStats).where(m.UserStats.user_id == user_id))
+    if not stats:
+        # The new rating is already in the database, so it's counted by the recalculation
+        recalculate_users_stats(db, [user_id])
+        return
+
+    values: dict = dict(last_rated_at=sa.func.now())
+    if is_new:
+        values["ratings_count"] = m.UserStats.ratings_count + 1
+        genre_ids = db.scalars(sa.select(m.movie_genres.c.genre_id).where(m.movie_genres.c.movie_id == movie_id))
+        add_genres_count(db, {(user_id, genre_id): 1 for genre_id in genre_ids})
+
+    rating = db.scalar(sa.select(m.Rating.rating).where(m.Rating.user_id == user_id, m.Rating.movie_id == movie_id))
+    top_rated = stats.top_rated or []
+    if (
+        len(top_rated) < USER_TOP_MOVIES_COUNT
+        or any(top_movie_id == movie_id for top_movie_id, _ in top_rated)
+        or (rating is not None and rating >= top_rated[-1][1])
+    ):
+        values["top_rated"] = [
+            (top_movie_id, top_rating) for _, top_movie_id, top_rating in db.execute(get_top_rated_query([user_id]))
+        ]
+
+    db.execute(sa.update(m.UserStats).where(m.UserStats.user_id == user_id).values(**values))
+    db.expire(stats)
+
+
+def apply_movie_genres_change(db: Session, change: AssociationChange):
+    """Update genre counts of all users who rated the movie after its genres were changed"""
+
+    if change.field_name != "genres" or not (change.added or change.removed):
+        return
+
+    genre_ids = {
+        key: genre_id
+        for key, genre_id in db.execute(
+            sa.select(m.Genre.key, m.Genre.id).where(m.Genre.key.in_([*change.added, *change.removed]))
+        )
+    }
+
+    counts: dict[tuple[int, int], int] = defaultdict(int)
+    for user_id in db.scalars(sa.select(m.Rating.user_id).where(m.Rating.movie_id == change.movie_id).distinct()):
+        for key in change.added:
+            counts[(user_id, genre_ids[key])] += 1
+        for key in change.removed:
+            counts[(user_id, genre_ids[key])] -= 1
+    add_genres_count(db, counts)
+
+
+def delete_user_stats(db: Session, user_id: int):
+    """Drop stats of a user whose ratings were deleted"""
+
+    db.execute(sa.delete(m.user_genre_stats).where(m.user_genre_stats.c.user_id == user_id))
+    db.execute(sa.delete(m.UserStats).where(m.UserStats.user_id == user_id))
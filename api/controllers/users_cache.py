@@ -0,0 +1,190 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.orm import InstanceState, Session, make_transient_to_detached
+
+import app.models as m
+import app.schema as s
+from app.logger import log
+from config import config
+
+CFG = config()
+
+# Session.info key of user uuids changed in the transaction
+PENDING_USERS_KEY = "changed_users"
+# Marker in the pending set: the owner may have changed
+OWNER_CHANGED = None
+
+# User columns kept in the cache; changing any of them invalidates the cached identity
+IDENTITY_COLUMNS = ("uuid", "role", "is_deleted", "preferred_language")
+
+
+@dataclass(frozen=True)
+class UserIdentity:
+    id: int
+    uuid: str
+    role: str
+    is_deleted: bool
+    preferred_language: str
+    created_at: float
+
+    @classmethod
+    def from_user(cls, user: m.User) -> "UserIdentity":
+        return cls(
+            id=user.id,
+            uuid=user.uuid,
+            role=user.role,
+            is_deleted=user.is_deleted,
+            preferred_language=user.preferred_language,
+            created_at=time.monotonic(),
+        )
+
+
+class UsersCache:
+    """Process-local LRU of user identities by uuid, plus the owner identity.
+
+    Entries are invalidated after commits that change an identity column. The TTL bounds staleness
+    of changes made by other processes (admin panel, other workers).
+    """
+
+    def __init__(self, ttl: int, max_size: int):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._identities: OrderedDict[str, UserIdentity] = OrderedDict()
+        self._owner: UserIdentity | None = None
+        self._lock = threading.Lock()
+
+    def is_fresh(self, identity: UserIdentity) -> bool:
+        return time.monotonic() - identity.created_at <= self.ttl
+
+    def get(self, uuid: str) -> UserIdentity | None:
+        with self._lock:
+            identity = self._identities.get(uuid)
+            if not identity:
+                return None
+            if not self.is_fresh(identity):
+                del self._identities[uuid]
+                return None
+            self._identities.move_to_end(uuid)
+            return identity
+
+    def add(self, user: m.User) -> UserIdentity:
+        identity = UserIdentity.from_user(user)
+        with self._lock:
+            self._identities[identity.uuid] = identity
+            self._identities.move_to_end(identity.uuid)
+            while len(self._identities) > self.max_size:
+                self._identities.popitem(last=False)
+        return identity
+
+    @property
+    def owner(self) -> UserIdentity | None:
+        owner = self._owner
+        return owner if owner and self.is_fresh(owner) else None
+
+    def set_owner(self, user: m.User) -> UserIdentity:
+        self._owner = UserIdentity.from_user(user)
+        return self._owner
+
+    def invalidate(self, uuids: set[str | None]):
+        with self._lock:
+            for uuid in uuids:
+                if uuid is not None:
+                    self._identities.pop(uuid, None)
+            if self._owner and (OWNER_CHANGED in uuids or self._owner.uuid in uuids):
+                self._owner = None
+
+    def clear(self):
+        with self._lock:
+            self._identities.clear()
+            self._owner = None
+
+
+users_cache = UsersCache(ttl=CFG.USERS_CACHE_TTL, max_size=CFG.USERS_CACHE_SIZE)
+
+
+def attach_user(db: Session, identity: UserIdentity) -> m.User:
+    """User of the cached identity in the session, without a query.
+
+    Identity columns are loaded; other attributes are expired and loaded by primary key on first access.
+    """
+
+    user = m.User(
+        id=identity.id,
+        uuid=identity.uuid,
+        role=identity.role,
+        is_deleted=identity.is_deleted,
+        preferred_language=identity.preferred_language,
+    )
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+def get_cached_user(db: Session, user_uuid: str) -> m.User | None:
+    """Not deleted user by uuid, queried only on a cache miss"""
+
+    identity = users_cache.get(user_uuid)
+    if identity:
+        return attach_user(db, identity)
+
+    user = db.scalar(sa.select(m.User).where(m.User.is_deleted.is_(False), m.User.uuid == user_uuid))
+    if user:
+        users_cache.add(user)
+        log(log.DEBUG, "User [%s] identity cached", user_uuid)
+    return user
+
+
+def get_cached_owner(db: Session) -> m.User | None:
+    """The owner user, resolved once per process (until the owner changes or the TTL expires)"""
+
+    identity = users_cache.owner
+    if identity:
+        return attach_user(db, identity)
+
+    owner = db.scalar(sa.select(m.User).where(m.User.role == s.UserRole.OWNER.value))
+    if owner:
+        users_cache.set_owner(owner)
+    return owner
+
+
+@event.listens_for(Session, "after_flush")
+def collect_changed_users(session: Session, flush_context):
+    pending: set[str | None] = session.info.setdefault(PENDING_USERS_KEY, set())
+    for instance in [*session.new, *session.dirty, *session.deleted]:
+        if not isinstance(instance, m.User):
+            continue
+
+        state: InstanceState[m.User] = sa.inspect(instance)
+        if instance in session.new:
+            if instance.role == s.UserRole.OWNER.value:
+                pending.add(OWNER_CHANGED)
+            continue
+
+        changed = instance in session.deleted
+        for column in IDENTITY_COLUMNS:
+            history = state.attrs[column].history
+            if history.has_changes():
+                changed = True
+                if column == "uuid":
+                    # The old uuid is the cache key
+                    pending.update(history.deleted)
+        if changed:
+            pending.add(instance.uuid)
+            if state.attrs.role.history.has_changes() or instance in session.deleted:
+                pending.add(OWNER_CHANGED)
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_changed_users(session: Session):
+    uuids = session.info.pop(PENDING_USERS_KEY, set())
+    if uuids:
+        users_cache.invalidate(uuids)
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_changed_users(session: Session):
+    session.info.pop(PENDING_USERS_KEY, None)
@@ -0,0 +1,129 @@
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+import app.models as m
+import app.schema as s
+from app.logger import log
+
+
+class VisualProfileNotFoundError(Exception):
+    """Category, criterion or criterion rating of a visual profile is missing"""
+
+    def __init__(self, name: str, key: str):
+        super().__init__(f"{name} [{key}] not found")
+        self.detail = f"{name} not found"
+        self.key = key
+
+
+def get_category_id(db: Session, category_key: str) -> int:
+    category_id = db.scalar(sa.select(m.VisualProfileCategory.id).where(m.VisualProfileCategory.key == category_key))
+    if not category_id:
+        log(log.ERROR, "Category [%s] not found", category_key)
+        raise VisualProfileNotFoundError("Category", category_key)
+    return category_id
+
+
+def get_criteria_ids(db: Session, criteria: list[s.VisualProfileCriterionData]) -> list[int]:
+    """Ids of the criteria (in the given order), resolved with one query"""
+
+    ids = {
+        key: criterion_id
+        for key, criterion_id in db.execute(
+            sa.select(m.VisualProfileCategoryCriterion.key, m.VisualProfileCategoryCriterion.id).where(
+                m.VisualProfileCategoryCriterion.key.in_([criterion.key for criterion in criteria])
+            )
+        )
+    }
+    for criterion in criteria:
+        if criterion.key not in ids:
+            log(log.ERROR, "Criterion [%s] not found", criterion.key)
+            raise VisualProfileNotFoundError("Criterion", criterion.key)
+    return [ids[criterion.key] for criterion in criteria]
+
+
+def insert_visual_profile_ratings(db: Session, rows: list[dict]):
+    """Insert ratings rows (title_visual_profile_id, criterion_id, rating, order) with one statement"""
+
+    if rows:
+        db.execute(sa.insert(m.VisualProfileRating), rows)
+
+
+def get_ratings_rows(
+    visual_profile_id: int, criteria: list[s.VisualProfileCriterionData], criteria_ids: list[int]
+) -> list[dict]:
+    return [
+        dict(
+            title_visual_profile_id=visual_profile_id, criterion_id=criterion_id, rating=criterion.rating, order=idx + 1
+        )
+        for idx, (criterion, criterion_id) in enumerate(zip(criteria, criteria_ids))
+    ]
+
+
+def create_visual_profile(
+    db: Session, movie_id: int, user_id: int, category_key: str, criteria: list[s.VisualProfileCriterionData]
+) -> int:
+    """Add the user visual profile of the movie with its criteria ratings (in the caller's transaction).
+
+    Returns the visual profile id.
+    """
+
+    category_id = get_category_id(db, category_key)
+    criteria_ids = get_criteria_ids(db, criteria)
+
+    visual_profile_id = db.scalar(
+        sa.insert(m.VisualProfile)
+        .values(movie_id=movie_id, user_id=user_id, category_id=category_id)
+        .returning(m.VisualProfile.id)
+    )
+    assert visual_profile_id
+    insert_visual_profile_ratings(db, get_ratings_rows(visual_profile_id, criteria, criteria_ids))
+
+    log(log.DEBUG, "Visual profile [%s] created for movie [%s]", visual_profile_id, movie_id)
+    return visual_profile_id
+
+
+def update_visual_profile(
+    db: Session, visual_profile: m.VisualProfile, category_key: str, criteria: list[s.VisualProfileCriterionData]
+) -> bool:
+    """Write new criteria ratings of the visual profile (in the caller's transaction).
+
+    With the same category existing ratings are updated in one statement; a new category replaces
+    all the ratings. Returns True if the category was changed.
+    """
+
+    criteria_ids = get_criteria_ids(db, criteria)
+    rows = get_ratings_rows(visual_profile.id, criteria, criteria_ids)
+
+    if visual_profile.category.key != category_key:
+        category_id = get_category_id(db, category_key)
+        db.execute(
+            sa.update(m.VisualProfile).where(m.VisualProfile.id == visual_profile.id).values(category_id=category_id)
+        )
+        db.execute(
+            sa.delete(m.VisualProfileRating).where(m.VisualProfileRating.title_visual_profile_id == visual_profile.id)
+        )
+        insert_visual_profile_ratings(db, rows)
+        db.expire(visual_profile)
+        return True
+
+    ratings_ids = {
+        criterion_id: rating_id
+        for criterion_id, rating_id in db.execute(
+            sa.select(m.VisualProfileRating.criterion_id, m.VisualProfileRating.id).where(
+                m.VisualProfileRating.title_visual_profile_id == visual_profile.id,
+                m.VisualProfileRating.criterion_id.in_(criteria_ids),
+            )
+        )
+    }
+    for criterion, criterion_id in zip(criteria, criteria_ids):
+        if criterion_id not in ratings_ids:
+            log(log.ERROR, "Criterion rating [%s] of visual profile [%s] not found", criterion.key, visual_profile.id)
+            raise VisualProfileNotFoundError("Criterion rating", criterion.key)
+
+    if rows:
+        db.execute(
+            sa.update(m.VisualProfileRating),
+            [dict(id=ratings_ids[row["criterion_id"]], rating=row["rating"], order=row["order"]) for row in rows],
+        )
+    db.expire(visual_profile)
+    return False
@@ -1,8 +1,8 @@
 from fastapi import Depends, HTTPException, status
 
 from sqlalchemy.orm import Session
-import sqlalchemy as sa
 
+from api.controllers.users_cache import get_cached_user
 from app.database import get_db
 import app.models as m
 import app.schema as s
@@ -18,12 +18,7 @@ def get_current_user(
     if not user_uuid:
         return None
 
-    user = db.scalar(
-        sa.select(m.User).where(
-            m.User.is_deleted.is_(False),
-            m.User.uuid == user_uuid,
-        )
-    )
+    user = get_cached_user(db, user_uuid)
 
     if not user:
         log(log.INFO, "User wasn`t authorized")
@@ -46,12 +41,7 @@ def get_admin(
 ) -> m.User:
     """Raises an exception if the current user is not admin or owner"""
 
-    user = db.scalar(
-        sa.select(m.User).where(
-            m.User.is_deleted.is_(False),
-            m.User.uuid == user_uuid,
-        )
-    )
+    user = get_cached_user(db, user_uuid)
 
     if not user:
         log(log.INFO, "User [%s] not found", user_uuid)
@@ -77,12 +67,7 @@ def get_owner(
     """Only owner is allowed to work with Add Movie, Quickly add Movie, Visual Profile (post, put).
     Raises an exception if the current user is not owner"""
 
-    user = db.scalar(
-        sa.select(m.User).where(
-            m.User.is_deleted.is_(False),
-            m.User.uuid == user_uuid,
-        )
-    )
+    user = get_cached_user(db, user_uuid)
 
     if not user:
         log(log.INFO, "User [%s] not found", user_uuid)
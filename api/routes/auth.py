@@ -1,6 +1,7 @@
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, Depends, status
-from api.controllers.create_movie import get_movies_data_from_file
+from api.controllers.quick_movies import count_quick_movies
+from api.controllers.user_stats import delete_user_stats
 from api.dependency.user import get_current_user
 import app.models as m
 import sqlalchemy as sa
@@ -49,10 +50,7 @@ def google_auth(
     new_movies_to_add_count = 0
 
     if s.UserRole(user.role).is_owner():
-        quick_movies = get_movies_data_from_file()
-
-        if quick_movies:
-            new_movies_to_add_count = len(quick_movies)
+        new_movies_to_add_count = count_quick_movies(db)
 
     return s.GoogleAuthOut(
         uuid=user.uuid,
@@ -84,6 +82,7 @@ def delete_google_profile(
     # The synchronize_session=False argument ensures that the session does not attempt to synchronize
     # the in-memory state with the database after the bulk delete.
     db.query(m.Rating).filter(m.Rating.user_id == current_user.id).delete(synchronize_session=False)
+    delete_user_stats(db, current_user.id)
 
     db.commit()
     log(log.DEBUG, "User [%s] deleted", current_user.email)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Body, HTTPException, Depends, status
 
+from api.controllers.filters_cache import bump_filters_version
 from api.dependency.user import get_admin
 from api.utils import get_all_items
 import app.models as m
@@ -139,6 +140,7 @@ def create_specification(
 
         db.add(new_specification)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Specification [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error creating specification [%s]: %s", form_data.key, e)
@@ -196,6 +198,7 @@ def create_keyword(
 
         db.add(new_keyword)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Keyword [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error creating keyword [%s]: %s", form_data.key, e)
@@ -253,6 +256,7 @@ def create_action_time(
 
         db.add(new_action_time)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "ActionTime [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error creating action time [%s]: %s", form_data.key, e)
@@ -321,6 +325,7 @@ def update_filter_item(
         existing[s.Language.UK.value].description = form_data.description_uk
 
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Filter item [%s] successfully updated by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error updating filter item [%s]: %s", form_data.key, e)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Body, HTTPException, Depends, status
 
+from api.controllers.filters_cache import bump_filters_version
 from api.dependency.user import get_admin
 from api.utils import get_all_items
 import app.models as m
@@ -109,6 +110,7 @@ def create_genre(
 
         db.add(new_genre)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Genre [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error creating genre [%s]: %s", form_data.key, e)
@@ -171,6 +173,7 @@ def create_subgenre(
 
         db.add(new_subgenre)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Subgenre [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error creating subgenre [%s]: %s", form_data.key, e)
@@ -233,6 +236,7 @@ def update_genre_item(
         existing[s.Language.UK.value].description = form_data.description_uk
 
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Genre item [%s] successfully updated by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error updating genre item [%s]: %s", form_data.key, e)
@@ -2,8 +2,9 @@ from datetime import datetime
 from typing import Annotated
 from fastapi import APIRouter, Body, File, HTTPException, Depends, Query, UploadFile, status
 from api.controllers.people import add_avatar_to_new_actor, add_avatar_to_new_director
+from api.controllers.filters_cache import bump_filters_version
 from api.dependency.user import get_admin
-from api.utils import normalize_query
+from api.controllers.search import search_by_name
 import app.models as m
 import sqlalchemy as sa
 
@@ -66,6 +67,7 @@ def create_actor(
 
         db.add(new_actor)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Actor [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         db.rollback()
@@ -200,6 +202,7 @@ def create_character(
 
         db.add(new_character)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Character [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         db.rollback()
@@ -261,6 +264,7 @@ def create_director(
 
         db.add(new_director)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Director [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         db.rollback()
@@ -298,26 +302,13 @@ def search_actors(
         log(log.ERROR, "Query is empty")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Query is empty")
 
-    normalized_query = normalize_query(query)
-
-    name_search_pattern = (
-        sa.func.lower(m.ActorTranslation.first_name) + " " + sa.func.lower(m.ActorTranslation.last_name)
-    )
-
-    actors = (
-        db.scalars(
-            sa.select(m.Actor)
-            .where(
-                m.Actor.translations.any(
-                    sa.func.regexp_replace(name_search_pattern, r"[^a-zA-Zа-яА-Я0-9 ]", "", "g").ilike(
-                        f"%{normalized_query}%"
-                    )
-                )
-            )
-            .limit(5)
-        )
-        .unique()
-        .all()
+    actors = search_by_name(
+        db,
+        m.Actor,
+        m.ActorTranslation,
+        m.ActorTranslation.actor_id,
+        query,
+        [selectinload(m.Actor.translations), selectinload(m.Actor.movies)],
     )
 
     return s.SearchResults(
@@ -350,26 +341,13 @@ def search_directors(
         log(log.ERROR, "Query is empty")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Query is empty")
 
-    normalized_query = normalize_query(query)
-
-    name_search_pattern = (
-        sa.func.lower(m.DirectorTranslation.first_name) + " " + sa.func.lower(m.DirectorTranslation.last_name)
-    )
-
-    directors = (
-        db.scalars(
-            sa.select(m.Director)
-            .where(
-                m.Director.translations.any(
-                    sa.func.regexp_replace(name_search_pattern, r"[^a-zA-Zа-яА-Я0-9 ]", "", "g").ilike(
-                        f"%{normalized_query}%"
-                    )
-                )
-            )
-            .limit(5)
-        )
-        .unique()
-        .all()
+    directors = search_by_name(
+        db,
+        m.Director,
+        m.DirectorTranslation,
+        m.DirectorTranslation.director_id,
+        query,
+        [selectinload(m.Director.translations), selectinload(m.Director.movies)],
     )
 
     return s.SearchResults(
@@ -402,24 +380,13 @@ def search_characters(
         log(log.ERROR, "Query is empty")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Query is empty")
 
-    normalized_query = normalize_query(query)
-
-    name_search_pattern = sa.func.lower(m.CharacterTranslation.name)
-
-    characters = (
-        db.scalars(
-            sa.select(m.Character)
-            .where(
-                m.Character.translations.any(
-                    sa.func.regexp_replace(name_search_pattern, r"[^a-zA-Zа-яА-Я0-9 ]", "", "g").ilike(
-                        f"%{normalized_query}%"
-                    )
-                )
-            )
-            .limit(5)
-        )
-        .unique()
-        .all()
+    characters = search_by_name(
+        db,
+        m.Character,
+        m.CharacterTranslation,
+        m.CharacterTranslation.character_id,
+        query,
+        [selectinload(m.Character.translations)],
     )
 
     return s.SearchResults(
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Body, HTTPException, Depends, status
 
+from api.controllers.filters_cache import bump_filters_version
 from api.dependency.user import get_admin
 import app.models as m
 import sqlalchemy as sa
@@ -55,6 +56,7 @@ def create_shared_universe(
 
         db.add(new_su)
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Shared universe [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error creating Shared universe [%s]: %s", form_data.key, e)
@@ -1,13 +1,17 @@
 from datetime import timedelta
 from fastapi import APIRouter, HTTPException, Depends, status
+from api.controllers.movie_rating import apply_rating_change, get_rating_values
+from api.controllers.super_search_index import super_search_index
+from api.controllers.translations import translations
+from api.controllers.user_stats import apply_user_rating_change, get_user_genres_stats, get_users_stats
+from api.controllers.visual_profiles import VisualProfileNotFoundError, update_visual_profile
 from api.dependency.user import get_admin, get_current_user
-from api.utils import process_movie_rating
 import app.models as m
 import sqlalchemy as sa
 
 import app.schema as s
 from app.logger import log
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy.orm import Session
 from app.database import get_db
 from config import config
 
@@ -62,9 +66,11 @@ def rate_movie(
     db.flush()
     log(log.DEBUG, "Rating for movie [%s] created", movie.key)
 
-    process_movie_rating(movie)
+    apply_rating_change(db, movie, None, get_rating_values(new_rating))
+    apply_user_rating_change(db, current_user.id, movie.id, is_new=True)
 
     db.commit()
+    super_search_index.update_movie_rating(movie.id, movie.average_rating, movie.ratings_count)
 
     log(log.DEBUG, "Rating for movie [%s] updated", movie.key)
 
@@ -96,6 +102,7 @@ def update_rate_movie(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Rating not found")
 
     rating_data = data.rating_criteria
+    old_rating_values = get_rating_values(rating)
 
     rating.rating = data.rating
     rating.acting = rating_data.acting
@@ -108,12 +115,13 @@ def update_rate_movie(
     rating.scare_factor = rating_data.scare_factor if rating_data.scare_factor else None
     rating.humor = rating_data.humor if rating_data.humor else None
     rating.animation_cartoon = rating_data.animation_cartoon if rating_data.animation_cartoon else None
+    db.flush()
 
-    db.commit()
-
-    process_movie_rating(movie)
+    apply_rating_change(db, movie, old_rating_values, get_rating_values(rating))
+    apply_user_rating_change(db, current_user.id, movie.id, is_new=False)
 
     db.commit()
+    super_search_index.update_movie_rating(movie.id, movie.average_rating, movie.ratings_count)
 
     log(log.DEBUG, "Rating for movie [%s] updated", data.movie_key)
 
@@ -131,26 +139,24 @@ def get_time_rate_movie(
 ):
     """Get data for time rate movies chart"""
 
-    data = []
-
-    recent_rated_movies = db.scalars(
-        sa.select(m.Rating)
-        .options(selectinload(m.Rating.movie).selectinload(m.Movie.translations))
+    # Served by the (user_id, updated_at) index
+    recent_ratings = db.execute(
+        sa.select(m.Rating.movie_id, m.Rating.rating, m.Rating.created_at, m.Rating.updated_at)
         .where(m.Rating.user_id == current_user.id)
         .order_by(m.Rating.updated_at.desc())
         .limit(30)
     ).all()
-
-    for rating in recent_rated_movies:
-        created_at = rating.created_at if rating.created_at > rating.updated_at else rating.updated_at
-        data.append(
-            s.TimeRateMovieOut(
-                # TODO: Implement Timezone
-                created_at=created_at + +timedelta(hours=3),
-                rating=rating.rating,
-                movie_title=rating.movie.get_title(lang),
-            )
+    titles = translations.get(db, "movie", [row.movie_id for row in recent_ratings])
+
+    data = [
+        s.TimeRateMovieOut(
+            # TODO: Implement Timezone
+            created_at=max(created_at, updated_at) + timedelta(hours=3),
+            rating=rating,
+            movie_title=titles.get_name(movie_id, lang),
         )
+        for movie_id, rating, created_at, updated_at in recent_ratings
+    ]
 
     return s.MovieChartData(movie_chart_data=data[::-1])  # Reverse the order to show the most recent in the end
 
@@ -168,50 +174,28 @@ def get_info_report(
 ):
     """Get user info report"""
 
-    ratings = sorted(current_user.ratings, key=lambda x: x.rating, reverse=True)[:3]
+    stats = get_users_stats(db, [current_user.id])[current_user.id]
 
+    top_movie_ids = [movie_id for movie_id, _ in stats.top_rated]
+    top_movies = {movie.id: movie for movie in db.scalars(sa.select(m.Movie).where(m.Movie.id.in_(top_movie_ids)))}
+    titles = translations.get(db, "movie", top_movies)
     top_rated_movies = [
         s.TopMyMoviesOut(
-            key=rating.movie.key, title=rating.movie.get_title(lang), rating=rating.rating, poster=rating.movie.poster
+            key=top_movies[movie_id].key,
+            title=titles.get_name(movie_id, lang),
+            rating=rating,
+            poster=top_movies[movie_id].poster,
         )
-        for rating in ratings
+        for movie_id, rating in stats.top_rated
+        if movie_id in top_movies
     ]
 
     # Most popular genres
-    # TODO: hardcode genres keys, or get them from somewhere
-    genres_keys = ["action", "adventure", "comedy", "drama", "fantasy", "sci-fi", "horror", "romance"]
-
-    # separate route?
-    stmt = (
-        sa.select(m.Genre)
-        .options(selectinload(m.Genre.translations), selectinload(m.Genre.movies))
-        .join(m.Genre.movies)
-        .join(m.Movie.ratings)
-        .where(m.Rating.user_id == current_user.id)
-        .where(m.Genre.key.in_(genres_keys))
-        .group_by(m.Genre.id)  # Grouping by ID since we're returning Genre objects
-    )
-
-    result = db.scalars(stmt).all()
-
-    genre_movie_counts = []
-
-    for genre in result:
-        count = sum(1 for movie in genre.movies if any(r.user_id == current_user.id for r in movie.ratings))
-        genre_movie_counts.append(
-            s.GenreChartDataOut(
-                name=genre.get_name(lang),
-                count=count,
-            )
-        )
-
-    last_rating_date = None
-
-    if current_user.ratings:
-        create_date = current_user.ratings[-1].created_at
-        update_date = current_user.ratings[-1].updated_at
-        # Compare the two dates and assign the later one to last_rating_date
-        last_rating_date = create_date if create_date > update_date else update_date
+    genres_stats = get_user_genres_stats(db, current_user.id)
+    genre_names = translations.get(db, "genre", [genre_id for genre_id, _ in genres_stats])
+    genre_movie_counts = [
+        s.GenreChartDataOut(name=genre_names.get_name(genre_id, lang), count=count) for genre_id, count in genres_stats
+    ]
 
     actors_count = None
     directors_count = None
@@ -224,8 +208,8 @@ def get_info_report(
         genre_data=genre_movie_counts,
         top_rated_movies=top_rated_movies,
         joined_date=current_user.created_at,
-        movies_rated=len(current_user.ratings),
-        last_movie_rate_date=last_rating_date,
+        movies_rated=stats.ratings_count,
+        last_movie_rate_date=stats.last_rated_at,
         total_actors_count=actors_count,
         total_directors_count=directors_count,
     )
@@ -244,14 +228,14 @@ def get_all_users(
 ):
     """Get all users"""
 
-    users = db.scalars(
-        sa.select(m.User).options(selectinload(m.User.ratings)).where(m.User.is_deleted.is_(False))
-    ).all()
+    users = db.scalars(sa.select(m.User).where(m.User.is_deleted.is_(False))).all()
 
     if not users:
         log(log.ERROR, "Users not found")
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Users not found")
 
+    users_stats = get_users_stats(db, [user.id for user in users])
+
     users_out = [
         s.UserOut(
             uuid=user.uuid,
@@ -259,10 +243,8 @@ def get_all_users(
             email=user.email,
             role=s.UserRole(user.role),
             created_at=user.created_at,
-            ratings_count=len(user.ratings),
-            last_movie_rate_date=max(
-                (rating.created_at for rating in user.ratings), default=None, key=lambda x: x or 0
-            ),
+            ratings_count=users_stats[user.id].ratings_count,
+            last_movie_rate_date=users_stats[user.id].last_rated_at,
         )
         for user in users
         if user != current_user or not s.UserRole(user.role).is_owner()
@@ -308,65 +290,24 @@ def update_title_visual_profile(
         log(log.ERROR, "Movie [%s] not found", data.movie_key)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Movie not found")
 
-    user_vp = next((vp for vp in movie.visual_profiles if vp.user_id == current_user.id), None)
+    user_vp = db.scalar(
+        sa.select(m.VisualProfile).where(
+            m.VisualProfile.movie_id == movie.id, m.VisualProfile.user_id == current_user.id
+        )
+    )
     if not user_vp:
         log(log.ERROR, "User [%s] has no visual profile for movie [%s]", current_user.email, data.movie_key)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User has no visual profile for this movie")
 
-    # Change category and its criteria
-    if user_vp.category.key != data.category_key:
-        category = db.scalar(sa.select(m.VisualProfileCategory).where(m.VisualProfileCategory.key == data.category_key))
-        if not category:
-            log(log.ERROR, "Category [%s] not found", data.category_key)
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-
-        user_vp.category_id = category.id
-        user_vp.ratings.clear()
-
-        for idx, criterion in enumerate(data.criteria):
-            criterion_db = db.scalar(
-                sa.select(m.VisualProfileCategoryCriterion).where(m.VisualProfileCategoryCriterion.key == criterion.key)
-            )
-
-            if not criterion_db:
-                log(log.ERROR, "Criterion [%s] not found", criterion.key)
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Criterion not found")
-
-            new_rating = m.VisualProfileRating(
-                title_visual_profile_id=user_vp.id,
-                criterion_id=criterion_db.id,
-                rating=criterion.rating,
-                order=idx + 1,
-            )
-            db.add(new_rating)
-        db.commit()
-        log(log.DEBUG, "Title visual profile for movie [%s] updated with new category", data.movie_key)
+    try:
+        category_changed = update_visual_profile(db, user_vp, data.category_key, data.criteria)
+    except VisualProfileNotFoundError as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=e.detail)
+    db.commit()
 
-    # Update existing criteria ratings
-    else:
-        # enumerate for order
-        for idx, criterion in enumerate(data.criteria):
-            criterion_db = db.scalar(
-                sa.select(m.VisualProfileCategoryCriterion).where(m.VisualProfileCategoryCriterion.key == criterion.key)
-            )
-
-            if not criterion_db:
-                log(log.ERROR, "Criterion [%s] not found", criterion.key)
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Criterion not found")
-
-            criterion_rating = db.scalar(
-                sa.select(m.VisualProfileRating).where(
-                    m.VisualProfileRating.title_visual_profile_id == user_vp.id,
-                    m.VisualProfileRating.criterion_id == criterion_db.id,
-                )
-            )
-
-            if not criterion_rating:
-                log(log.ERROR, "Criterion rating for movie [%s] not found", data.movie_key)
-                raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Criterion rating not found")
-
-            criterion_rating.rating = criterion.rating
-            criterion_rating.order = idx + 1
-            db.commit()
+    if category_changed:
+        super_search_index.mark_stale()
+        log(log.DEBUG, "Title visual profile for movie [%s] updated with new category", data.movie_key)
 
     log(log.DEBUG, "Title visual profile for movie [%s] updated", data.movie_key)
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, Body, HTTPException, Depends, status
 
+from api.controllers.filters_cache import bump_filters_version
 from api.dependency.user import get_admin, get_owner
 import app.models as m
 import sqlalchemy as sa
@@ -144,6 +145,7 @@ def create_visual_profile(
             new_category.criteria.append(new_criterion)
 
         db.commit()
+        bump_filters_version()
 
         log(log.INFO, "Category [%s] successfully created by user [%s]", form_data.key, current_user.email)
     except Exception as e:
@@ -183,6 +185,7 @@ def update_category(
         existing[s.Language.UK.value].description = form_data.description_uk
 
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Category [%s] successfully updated by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error updating category [%s]: %s", form_data.key, e)
@@ -223,6 +226,7 @@ def update_criterion(
         existing[s.Language.UK.value].description = form_data.description_uk
 
         db.commit()
+        bump_filters_version()
         log(log.INFO, "Criterion [%s] successfully updated by user [%s]", form_data.key, current_user.email)
     except Exception as e:
         log(log.ERROR, "Error updating criterion [%s]: %s", form_data.key, e)
@@ -1,4 +1,3 @@
-import json
 from datetime import datetime
 import re
 from boto3 import Session
@@ -8,9 +7,9 @@ import filetype
 from fastapi import UploadFile, HTTPException, status
 from fastapi.routing import APIRoute
 from app import schema as s
-from app import models as m
 
 from app.logger import log
+from app.models.mixins import normalize_search_text
 
 
 def custom_generate_unique_id(route: APIRoute):
@@ -66,53 +65,6 @@ def extract_word(input_string: List[str]) -> List[str]:
     return words_list
 
 
-def calculate_average_rating(ratings: list[m.Rating], attribute: str) -> float:
-    """
-    Calculate the average of a specific attribute from a list of ratings.
-
-    :param ratings: List of Rating objects.
-    :param attribute: The name of the attribute to calculate the average for.
-    :return: The average value rounded to 2 decimal places.
-    """
-    if not ratings:
-        return 0.0
-
-    # Use getattr to dynamically access the attribute
-    values = [getattr(rating, attribute, 0) for rating in ratings if getattr(rating, attribute, None) is not None]
-    return round(sum(values) / len(values), 2) if values else 0.0
-
-
-def process_movie_rating(movie: m.Movie):
-    """
-    Process the movie rating and calculate averages for various criteria.
-    """
-    movie_ratings = movie.ratings
-
-    movie.average_rating = calculate_average_rating(movie_ratings, "rating")
-    movie.ratings_count = len(movie_ratings)
-
-    movie.average_by_criteria = {
-        "acting": calculate_average_rating(movie_ratings, "acting"),
-        "plot_storyline": calculate_average_rating(movie_ratings, "plot_storyline"),
-        "script_dialogue": calculate_average_rating(movie_ratings, "script_dialogue"),
-        "music": calculate_average_rating(movie_ratings, "music"),
-        "enjoyment": calculate_average_rating(movie_ratings, "enjoyment"),
-        "production_design": calculate_average_rating(movie_ratings, "production_design"),
-        "visual_effects": calculate_average_rating(movie_ratings, "visual_effects")
-        if movie.rating_criterion == s.RatingCriterion.VISUAL_EFFECTS
-        else None,
-        "scare_factor": calculate_average_rating(movie_ratings, "scare_factor")
-        if movie.rating_criterion == s.RatingCriterion.SCARE_FACTOR
-        else None,
-        "humor": calculate_average_rating(movie_ratings, "humor")
-        if movie.rating_criterion == s.RatingCriterion.HUMOR
-        else None,
-        "animation_cartoon": calculate_average_rating(movie_ratings, "animation_cartoon")
-        if movie.rating_criterion == s.RatingCriterion.ANIMATION_CARTOON
-        else None,
-    }
-
-
 def get_all_items(db: Session, items_select: sa.Select, lang: s.Language):
     items = db.scalars(items_select).all()
 
@@ -135,37 +87,5 @@ def get_all_items(db: Session, items_select: sa.Select, lang: s.Language):
 
 def normalize_query(query: str) -> str:
     """Normalize the query for multilingual support."""
-    # Remove special characters and normalize for Ukrainian and English
-    return re.sub(r"[^a-zA-Zа-яА-Я0-9 ]", "", query.lower())
-
-
-def find_project_root(marker_files=("pyproject.toml", ".git")):
-    from pathlib import Path
-
-    current = Path(__file__).resolve().parent
-    while current != current.parent:
-        if any((current / marker).exists() for marker in marker_files):
-            return current
-        current = current.parent
-    raise RuntimeError("Project root not found.")
-
-
-def get_quick_movie_file_path():
-    """Check if a file exists for quick movies. If not, create the directory and file."""
-
-    folder_name = "movie_data"
-    file_name = "quick_movies.json"
-    project_root = find_project_root()
-
-    folder_path = project_root / folder_name
-    file_path = folder_path / file_name
-
-    # Create folder if it doesn't exist
-    folder_path.mkdir(parents=True, exist_ok=True)
-
-    # Create file with empty JSON structure if it doesn't exist
-    if not file_path.exists():
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump({"movies": []}, f, indent=4)
-
-    return str(file_path)
+    # Same normalization as the stored translations `search_name`
+    return normalize_search_text(query)
@@ -59,11 +59,12 @@ def init(app: Flask):
         print("done")
 
     @app.cli.command()
-    def fill_db_with_movies():
+    @click.option("--row-by-row", is_flag=True, help="Write movies one by one (slow, for debugging)")
+    def fill_db_with_movies(row_by_row: bool):
         """Fill movies with movies data from google spreadsheets"""
         from .export_movies import export_movies_from_google_spreadsheets
 
-        export_movies_from_google_spreadsheets()
+        export_movies_from_google_spreadsheets(row_by_row=row_by_row)
         print("done")
 
     @app.cli.command()
@@ -234,11 +235,87 @@ def init(app: Flask):
         print("done")
 
     @app.cli.command()
-    def calculate_movie_rating():
+    @click.option("--movie-key", default=None, help="Recalculate only this movie")
+    def calculate_movie_rating(movie_key: str | None):
         """Calculate average rating for each movie"""
         from .calculate_movie_rating import calculate_movie_rating
 
-        calculate_movie_rating()
+        calculate_movie_rating(movie_key)
+        print("done")
+
+    @app.cli.command()
+    def calculate_user_stats():
+        """Rebuild rating stats of every user (after importing ratings)"""
+        from .calculate_user_stats import calculate_user_stats
+
+        calculate_user_stats()
+        print("done")
+
+    @app.cli.command()
+    def calculate_similar_movies():
+        """Recalculate top similar movies for each movie"""
+        from .calculate_similar_movies import calculate_similar_movies
+
+        calculate_similar_movies()
+        print("done")
+
+    @app.cli.command()
+    @click.option("--count", default=50000, help="Number of synthetic movies")
+    @click.option("--queries", default=20, help="Number of search queries")
+    @click.option("--repeat", default=5, help="Runs of each query")
+    def benchmark_search(count: int, queries: int, repeat: int):
+        """Compare movie search latency before and after the precomputed search name"""
+        from .benchmark_search import benchmark_search
+
+        benchmark_search(count, queries, repeat)
+        print("done")
+
+    @app.cli.command()
+    @click.option("--url", default="http://127.0.0.1:8000", help="Running API server")
+    @click.option("--clients", default=200, help="Number of concurrent clients")
+    @click.option("--requests", "requests_count", default=25, help="Requests per client")
+    def benchmark_api(url: str, clients: int, requests_count: int):
+        """Load test of the hot read endpoints (compare sync and async database sessions)"""
+        from .benchmark_api import benchmark_api
+
+        benchmark_api(url, clients, requests_count)
+        print("done")
+
+    @app.cli.command()
+    @click.option("--repeat", default=50, help="Requests to each endpoint in each mode")
+    def benchmark_serialization(repeat: int):
+        """Compare per-request CPU of the heavy list endpoints with and without the serialization fast path"""
+        from .benchmark_serialization import benchmark_serialization
+
+        benchmark_serialization(repeat)
+        print("done")
+
+    @app.cli.command()
+    @click.option("--count", default=50000, help="Number of synthetic movies")
+    @click.option("--repeat", default=20, help="Runs of each query")
+    @click.option("--dedicated-db", is_flag=True, help="Run on a non-empty database that serves no traffic")
+    def index_advisor(count: int, repeat: int, dedicated_db: bool):
+        """Compare plans of the hot route queries without and with the covering indexes"""
+        from .index_advisor import index_advisor
+
+        index_advisor(count, repeat, dedicated_db)
+        print("done")
+
+    @app.cli.command()
+    @click.option("--path", default="./data/synthetic/", help="Directory for the JSON files")
+    @click.option("--movies", default=10000, help="Number of movies")
+    @click.option("--people", default=5000, help="Number of actors and of directors")
+    @click.option("--users", default=1000, help="Number of users")
+    @click.option("--ratings", default=100000, help="Number of ratings")
+    @click.option("--seed", default=1, help="Random seed")
+    @click.option("--load", is_flag=True, help="Fill the database with the generated catalogue")
+    def generate_catalogue(path: str, movies: int, people: int, users: int, ratings: int, seed: int, load: bool):
+        """Generate a synthetic catalogue in the data/*.json format from the seed files"""
+        from .generate_catalogue import generate_catalogue, load_catalogue
+
+        generate_catalogue(path, movies, people, users, ratings, seed)
+        if load:
+            load_catalogue(path)
         print("done")
 
     @app.cli.command()
@@ -283,7 +360,8 @@ def init(app: Flask):
     #     print("done")
 
     @app.cli.command()
-    def execute_all():
+    @click.option("--row-by-row", is_flag=True, help="Write movies one by one (slow, for debugging)")
+    def execute_all(row_by_row: bool):
         """Execute all commands that related to movies"""
         from .export_users import export_users_from_google_spreadsheets
         from .export_actors import export_actors_from_google_spreadsheets
@@ -301,6 +379,7 @@ def init(app: Flask):
         from .export_vp_categories import export_title_categories_from_google_spreadsheets
         from .create_visual_profiles import create_visual_profiles
         from .calculate_movie_rating import calculate_movie_rating
+        from .calculate_user_stats import calculate_user_stats
 
         export_users_from_google_spreadsheets()
         export_actors_from_google_spreadsheets()
@@ -311,13 +390,14 @@ def init(app: Flask):
         export_keywords_from_google_spreadsheets()
         export_action_times_from_google_spreadsheets()
         export_su_from_google_spreadsheets()
-        export_movies_from_google_spreadsheets()
+        export_movies_from_google_spreadsheets(row_by_row=row_by_row)
         export_ratings_from_google_spreadsheets()
         export_characters_from_google_spreadsheets()
         export_title_criteria_from_google_spreadsheets()
         export_title_categories_from_google_spreadsheets()
         create_visual_profiles()
         calculate_movie_rating()
+        calculate_user_stats()
 
         print("===============================================================")
         print("DATABASE SUCCESSFULLY FILLED WITH DATA FROM GOOGLE SPREADSHEETS")
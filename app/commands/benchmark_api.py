@@ -0,0 +1,78 @@
+import asyncio
+import time
+from collections import defaultdict
+
+import httpx
+
+from app.logger import log
+
+# Hot read endpoints served by async routes
+ENDPOINTS = [
+    "/api/movies/",
+    "/api/movies/random/",
+    "/api/movies/filters/",
+    "/api/movies/super-search/",
+    "/api/movies/search/?query=the",
+]
+
+
+async def run_client(
+    client: httpx.AsyncClient, requests_count: int, timings: dict[str, list[float]], errors: dict[str, int]
+):
+    for i in range(requests_count):
+        endpoint = ENDPOINTS[i % len(ENDPOINTS)]
+        start_time = time.perf_counter()
+        try:
+            response = await client.get(endpoint)
+            response.raise_for_status()
+        except httpx.HTTPError:
+            errors[endpoint] += 1
+            continue
+        timings[endpoint].append(time.perf_counter() - start_time)
+
+
+async def load_api(url: str, clients: int, requests_count: int) -> tuple[dict[str, list[float]], dict[str, int], float]:
+    timings: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        start_time = time.perf_counter()
+        await asyncio.gather(*[run_client(client, requests_count, timings, errors) for _ in range(clients)])
+        total_time = time.perf_counter() - start_time
+
+    return timings, errors, total_time
+
+
+def benchmark_api(url: str, clients: int, requests_count: int):
+    """Load test of the hot read endpoints with concurrent clients against a running API server.
+
+    Run it against the server with and without ASYNC_DATABASE_URL to compare the throughput.
+    """
+
+    timings, errors, total_time = asyncio.run(load_api(url, clients, requests_count))
+
+    total_requests = sum(len(endpoint_timings) for endpoint_timings in timings.values())
+    log(
+        log.INFO,
+        "[%s] clients: [%s] requests in [%.2f] s, [%.1f] req/s, [%s] errors",
+        clients,
+        total_requests,
+        total_time,
+        total_requests / total_time,
+        sum(errors.values()),
+    )
+
+    for endpoint in ENDPOINTS:
+        endpoint_timings = sorted(timings[endpoint])
+        if not endpoint_timings:
+            log(log.WARNING, "[%s]: no successful requests", endpoint)
+            continue
+        log(
+            log.INFO,
+            "[%s]: p50 [%.1f] ms, p95 [%.1f] ms, errors [%s]",
+            endpoint,
+            endpoint_timings[len(endpoint_timings) // 2] * 1000,
+            endpoint_timings[int(len(endpoint_timings) * 0.95)] * 1000,
+            errors[endpoint],
+        )
@@ -0,0 +1,96 @@
+import random
+import re
+import time
+
+import sqlalchemy as sa
+
+from api.controllers.search import search_by_name
+from app import models as m
+from app.database import db
+from app.logger import log
+
+WORDS = [
+    "dark", "night", "return", "king", "star", "war", "lost", "city", "ghost", "shadow",
+    "last", "train", "silent", "river", "iron", "dream", "storm", "black", "golden", "empire",
+    "темна", "ніч", "король", "зоряні", "війни", "місто", "привид", "тінь", "мрія", "буря",
+]  # fmt: skip
+
+
+def legacy_search(session, query: str) -> list[int]:
+    """Movie search before the precomputed search_name (regexp_replace + ILIKE on every row)"""
+
+    return session.scalars(
+        sa.select(m.Movie.id)
+        .where(
+            m.Movie.translations.any(
+                sa.func.regexp_replace(sa.func.lower(m.MovieTranslation.title), r"[^a-zA-Zа-яА-Я0-9 ]", "", "g").ilike(
+                    f"%{query}%"
+                )
+            )
+        )
+        .limit(5)
+    ).all()
+
+
+def register_sqlite_regexp_replace(session):
+    connection = session.connection().connection.dbapi_connection
+    if connection.__class__.__module__.startswith("sqlite3"):
+        connection.create_function(
+            "regexp_replace", 4, lambda text, pattern, replacement, flags: re.sub(pattern, replacement, text or "")
+        )
+
+
+def benchmark_search(count: int, queries_count: int, repeat: int):
+    """Compare movie search latency before and after search_name on a synthetic catalogue.
+
+    Synthetic movies are inserted in a transaction which is rolled back at the end.
+    """
+
+    rnd = random.Random(count)
+
+    with db.begin() as session:
+        register_sqlite_regexp_replace(session)
+
+        movies_ids = session.scalars(
+            sa.insert(m.Movie).returning(m.Movie.id, sort_by_parameter_order=True),
+            [dict(key=f"benchmark-movie-{i}", duration=90, budget=0) for i in range(count)],
+        ).all()
+
+        titles = [f"{' '.join(rnd.sample(WORDS, 3)).title()}: Part {rnd.randint(1, 999)}" for _ in movies_ids]
+        session.execute(
+            sa.insert(m.MovieTranslation),
+            [
+                dict(movie_id=movie_id, language=language, title=title, description="", location="")
+                for movie_id, title in zip(movies_ids, titles)
+                for language in ("uk", "en")
+            ],
+        )
+        log(log.INFO, "Synthetic catalogue: [%s] movies", count)
+
+        queries = [" ".join(rnd.choice(titles).lower().split()[:2])[: rnd.randint(3, 12)] for _ in range(queries_count)]
+
+        for name, search in (
+            ("legacy", lambda query: legacy_search(session, query)),
+            (
+                "search_name",
+                lambda query: search_by_name(session, m.Movie, m.MovieTranslation, m.MovieTranslation.movie_id, query),
+            ),
+        ):
+            timings = []
+            for query in queries:
+                for _ in range(repeat):
+                    start_time = time.perf_counter()
+                    search(query)
+                    timings.append(time.perf_counter() - start_time)
+
+            timings.sort()
+            log(
+                log.INFO,
+                "[%s] search: avg [%.2f] ms, p50 [%.2f] ms, p95 [%.2f] ms",
+                name,
+                sum(timings) / len(timings) * 1000,
+                timings[len(timings) // 2] * 1000,
+                timings[int(len(timings) * 0.95)] * 1000,
+            )
+
+        session.rollback()
@@ -0,0 +1,80 @@
+import time
+
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+
+from api import app
+from api.controllers.filters_cache import filters_cache
+from api.dependency.user import get_owner
+from app import models as m
+from app import schema as s
+from app.database import db
+from app.logger import log
+from config import config
+
+CFG = config()
+
+# Heavy list endpoints with the serialization fast path
+ENDPOINTS = [
+    "/api/movies/?size=100",
+    "/api/movies/super-search/?size=100",
+    "/api/movies/filters/",
+    "/api/movies/pre-create/",
+]
+
+# Mode name -> (FAST_JSON_RESPONSES, RESPONSE_COMPRESSION_MIN_SIZE)
+MODES = {
+    "response_model": (False, 0),
+    "fast_json": (True, 0),
+    "fast_json_compressed": (True, CFG.RESPONSE_COMPRESSION_MIN_SIZE or 1024),
+}
+
+
+def benchmark_serialization(repeat: int):
+    """Compare per-request CPU time of the heavy list endpoints with and without the fast path.
+
+    Requests are made in process against the configured database; pre-create runs as the first owner.
+    """
+
+    with db.Session() as session:
+        owner = session.scalar(
+            sa.select(m.User).where(m.User.role == s.UserRole.OWNER.value).order_by(m.User.id).limit(1)
+        )
+
+    saved_settings = CFG.FAST_JSON_RESPONSES, CFG.RESPONSE_COMPRESSION_MIN_SIZE
+    if owner:
+        app.dependency_overrides[get_owner] = lambda: owner
+    try:
+        with TestClient(app, headers={"Accept-Encoding": "gzip, br"}) as client:
+            for endpoint in ENDPOINTS:
+                if endpoint.startswith("/api/movies/pre-create/") and not owner:
+                    log(log.WARNING, "[%s]: skipped, no owner user", endpoint)
+                    continue
+
+                for mode, (fast_json, min_size) in MODES.items():
+                    CFG.FAST_JSON_RESPONSES, CFG.RESPONSE_COMPRESSION_MIN_SIZE = fast_json, min_size
+                    # The filters payload is cached, so compressed variants are built once per mode
+                    filters_cache.clear()
+
+                    timings = []
+                    size = 0
+                    for _ in range(repeat):
+                        start_time = time.process_time()
+                        response = client.get(endpoint)
+                        timings.append(time.process_time() - start_time)
+                        response.raise_for_status()
+                        size = int(response.headers.get("content-length", len(response.content)))
+
+                    timings.sort()
+                    log(
+                        log.INFO,
+                        "[%s] [%s]: CPU p50 [%.2f] ms, p95 [%.2f] ms, [%s] bytes sent",
+                        endpoint,
+                        mode,
+                        timings[len(timings) // 2] * 1000,
+                        timings[int(len(timings) * 0.95)] * 1000,
+                        size,
+                    )
+    finally:
+        CFG.FAST_JSON_RESPONSES, CFG.RESPONSE_COMPRESSION_MIN_SIZE = saved_settings
+        app.dependency_overrides.pop(get_owner, None)
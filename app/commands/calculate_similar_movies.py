@@ -0,0 +1,11 @@
+from api.controllers.similar_movies import refresh_similar_movies
+from app.database import db
+from app.logger import log
+
+
+def calculate_similar_movies():
+    with db.begin() as session:
+        movies_count = refresh_similar_movies(session)
+        session.commit()
+
+    log(log.INFO, "Similar movies calculated for [%s] movies", movies_count)
@@ -0,0 +1,11 @@
+from api.controllers.user_stats import recalculate_users_stats
+from app.database import db
+from app.logger import log
+
+
+def calculate_user_stats():
+    with db.begin() as session:
+        users_count = recalculate_users_stats(session)
+        session.commit()
+
+    log(log.INFO, "Stats recalculated for [%s] users", users_count)
@@ -1,5 +1,6 @@
 import sqlalchemy as sa
 
+from api.controllers.visual_profiles import insert_visual_profile_ratings
 from app import models as m
 from app import schema as s
 from app.database import db
@@ -17,49 +18,49 @@ CATEGORY_ID = "category_id"
 LAST_SHEET_COLUMN = "E"
 TITLE_VP_RANGE_NAME = f"Title Visual Profile!A1:{LAST_SHEET_COLUMN}"
 
+# Visual profiles inserted per statement
+BATCH_SIZE = 1000
+
 
 def create_visual_profiles():
-    with db.begin() as session:
-        movies = session.scalars(sa.select(m.Movie)).all()
+    """Default owner visual profile (first category, rating 3 for every criterion) for movies without one"""
 
-        if not movies:
+    with db.begin() as session:
+        if not session.scalar(sa.select(sa.func.count(m.Movie.id))):
             log(log.ERROR, "Movie table is empty")
             log(log.ERROR, "Please run `flask fill-db-with-***` first")
             raise Exception("Movie table is empty. Please run `flask fill-db-with-***` first")
 
-        for movie in movies:
-            if movie.visual_profiles:
-                print(f"Movie {movie.key} has already visual profiles")
-                continue
+        owner = session.scalar(sa.select(m.User).where(m.User.role == s.UserRole.OWNER.value))
+        if not owner:
+            log(log.ERROR, "Owner user not found")
+            raise Exception("Owner user not found")
 
-            owner = session.scalar(sa.select(m.User).where(m.User.role == s.UserRole.OWNER.value))
-            if not owner:
-                log(log.ERROR, "Owner user not found")
-                raise Exception("Owner user not found")
+        category = session.scalar(sa.select(m.VisualProfileCategory))
+        if not category:
+            log(log.ERROR, "Category table is empty")
+            log(log.ERROR, "Please run `flask fill-db-with-genres` first")
+            raise Exception("Category table is empty. Please run `flask fill-db-with-genres` first")
 
-            category = session.scalar(sa.select(m.VisualProfileCategory))
-            if not category:
-                log(log.ERROR, "Category table is empty")
-                log(log.ERROR, "Please run `flask fill-db-with-genres` first")
-                raise Exception("Category table is empty. Please run `flask fill-db-with-genres` first")
+        movie_ids = session.scalars(
+            sa.select(m.Movie.id).where(~sa.exists().where(m.VisualProfile.movie_id == m.Movie.id)).order_by(m.Movie.id)
+        ).all()
+        criteria_ids = [criterion.id for criterion in category.criteria]
 
-            new_vp = m.VisualProfile(
-                movie_id=movie.id,
-                user_id=owner.id,
-                category_id=category.id,
+        for chunk_start in range(0, len(movie_ids), BATCH_SIZE):
+            chunk = movie_ids[chunk_start : chunk_start + BATCH_SIZE]
+            visual_profiles_ids = session.scalars(
+                sa.insert(m.VisualProfile).returning(m.VisualProfile.id, sort_by_parameter_order=True),
+                [dict(movie_id=movie_id, user_id=owner.id, category_id=category.id) for movie_id in chunk],
+            ).all()
+            insert_visual_profile_ratings(
+                session,
+                [
+                    dict(title_visual_profile_id=visual_profile_id, criterion_id=criterion_id, rating=3, order=idx + 1)
+                    for visual_profile_id in visual_profiles_ids
+                    for idx, criterion_id in enumerate(criteria_ids)
+                ],
             )
-            session.add(new_vp)
-            session.flush()
-
-            for idx, criterion in enumerate(category.criteria):
-                new_rating = m.VisualProfileRating(
-                    title_visual_profile_id=new_vp.id,
-                    criterion_id=criterion.id,
-                    rating=3,
-                    order=idx + 1,
-                )
-                session.add(new_rating)
-                session.flush()
 
-        log(log.INFO, "Visual profiles created successfully")
+        log(log.INFO, "Visual profiles created successfully for [%s] movies", len(movie_ids))
         session.commit()
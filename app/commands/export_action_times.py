@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 
 from googleapiclient.discovery import build
@@ -128,7 +129,7 @@ def export_action_times_from_google_spreadsheets(with_print: bool = True, in_jso
 def export_action_times_from_json_file(max_action_times_limit: int | None = None):
     """Fill action_times with data from json file"""
 
-    with open("data/action_times.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "action_times.json"), "r") as file:
         file_data = s.FilterJSONFile.model_validate(json.load(file))
 
     action_times = file_data.items
@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 
 from googleapiclient.discovery import build
@@ -177,7 +178,7 @@ def export_characters_from_google_spreadsheets(with_print: bool = True, in_json:
 def export_characters_from_json_file(max_characters_limit: int | None = None):
     """Fill characters with data from json file"""
 
-    with open("data/characters.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "characters.json"), "r") as file:
         file_data = s.CharactersJSONFile.model_validate(json.load(file))
 
     characters = file_data.characters
@@ -1,4 +1,5 @@
 import json
+import os
 from datetime import datetime
 from googleapiclient.discovery import build
 
@@ -157,7 +158,7 @@ def export_directors_from_google_spreadsheets(with_print: bool = True, in_json:
 def export_directors_from_json_file(max_directors_limit: int | None = None):
     """Fill directors with data from json file"""
 
-    with open("data/directors.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "directors.json"), "r") as file:
         file_data = s.PersonJSONFile.model_validate(json.load(file))
 
     directors = file_data.people
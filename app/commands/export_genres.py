@@ -1,4 +1,5 @@
 import json
+import os
 
 from googleapiclient.discovery import build
 
@@ -122,7 +123,7 @@ def export_genres_from_google_spreadsheets(with_print: bool = True, in_json: boo
 def export_genres_from_json_file(max_genres_limit: int | None = None):
     """Fill genres with data from json file"""
 
-    with open("data/genres.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "genres.json"), "r") as file:
         file_data = s.GenresJSONFile.model_validate(json.load(file))
 
     genres = file_data.items
@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 
 from googleapiclient.discovery import build
@@ -128,7 +129,7 @@ def export_keywords_from_google_spreadsheets(with_print: bool = True, in_json: b
 def export_keywords_from_json_file(max_keywords_limit: int | None = None):
     """Fill keywords with data from json file"""
 
-    with open("data/keywords.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "keywords.json"), "r") as file:
         file_data = s.FilterJSONFile.model_validate(json.load(file))
 
     keywords = file_data.items
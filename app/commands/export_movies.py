@@ -1,11 +1,16 @@
 import json
+import os
 import ast
+import time
 from datetime import datetime
 import sqlalchemy as sa
+from sqlalchemy import orm
 
 from googleapiclient.discovery import build
 
-from api.utils import process_movie_rating
+from api.controllers.movie_rating import get_empty_rating_values, recalculate_movie_rating, recalculate_movies_rating
+from api.controllers.similar_movies import refresh_similar_movies
+from api.controllers.user_stats import recalculate_users_stats
 from app import models as m
 from app import schema as s
 from app.database import db
@@ -51,21 +56,247 @@ LAST_SHEET_COLUMN = "AB"
 MOVIES_RANGE_NAME = f"Movies!A1:{LAST_SHEET_COLUMN}"
 
 
-def write_movies_in_db(movies: list[s.MovieExportCreate]):
+# Movies inserted per statement in batch mode
+BATCH_SIZE = 500
+
+MIN_RATE = 0.01
+MIN_RATING = 0.08
+DEFAULT_USER_ID = 1
+
+
+def check_reference_tables(session: orm.Session):
+    if not session.scalar(sa.select(m.Actor)):
+        log(log.ERROR, "Actor table is empty")
+        log(log.ERROR, "Please run `flask fill-db-with-actors` first")
+        raise Exception("Actor table is empty. Please run `flask fill-db-with-actors` first")
+    if not session.scalar(sa.select(m.Director)):
+        log(log.ERROR, "Director table is empty")
+        log(log.ERROR, "Please run `flask fill-db-with-directors` first")
+        raise Exception("Director table is empty. Please run `flask fill-db-with-directors` first")
+    if not session.scalar(sa.select(m.Genre)):
+        log(log.ERROR, "Genre table is empty")
+        log(log.ERROR, "Please run `flask fill-db-with-genres` first")
+        raise Exception("Genre table is empty. Please run `flask fill-db-with-genres` first")
+
+
+def get_default_rating(movie: s.MovieExportCreate) -> dict:
+    """Minimal owner rating that every imported movie gets"""
+
+    min_rating = MIN_RATING
+
+    ve_rate = MIN_RATE if movie.rating_criterion == s.RatingCriterion.VISUAL_EFFECTS else None
+    sf_rate = MIN_RATE if movie.rating_criterion == s.RatingCriterion.SCARE_FACTOR else None
+    humor_rate = MIN_RATE if movie.rating_criterion == s.RatingCriterion.HUMOR else None
+    ac_rate = MIN_RATE if movie.rating_criterion == s.RatingCriterion.ANIMATION_CARTOON else None
+
+    for rate in (ve_rate, sf_rate, humor_rate, ac_rate):
+        if rate:
+            min_rating += rate
+
+    return dict(
+        user_id=DEFAULT_USER_ID,
+        rating=min_rating,
+        acting=MIN_RATE,
+        plot_storyline=MIN_RATE,
+        script_dialogue=MIN_RATE,
+        music=MIN_RATE,
+        enjoyment=MIN_RATE,
+        production_design=MIN_RATE,
+        visual_effects=ve_rate,
+        scare_factor=sf_rate,
+        humor=humor_rate,
+        animation_cartoon=ac_rate,
+    )
+
+
+def get_percentage_matches(ids: list[int] | None, percentages: list[dict[int, float]] | None) -> dict[int, float]:
+    """Percentage match for every linked id (0.0 if the id has no percentage in the sheet)"""
+
+    merged: dict[int, float] = {}
+    for percentage_match_dict in percentages or []:
+        merged.update(percentage_match_dict)
+    return {item_id: merged.get(item_id, 0.0) for item_id in ids or []}
+
+
+def write_movies_in_db(movies: list[s.MovieExportCreate], row_by_row: bool = False, batch_size: int = BATCH_SIZE):
+    """Write movies with their translations, default rating and relations.
+
+    By default movies are written in batches: all reference tables are loaded once and rows are
+    inserted with one executemany statement per table and chunk. `row_by_row` keeps the old
+    per-movie behaviour, which is slow but handy for debugging a single broken row.
+    """
+
+    if row_by_row:
+        write_movies_in_db_row_by_row(movies)
+        return
+
+    start = time.perf_counter()
+    inserted_rows = 0
+
+    with db.begin() as session:
+        check_reference_tables(session)
+
+        existing_keys = set(session.scalars(sa.select(m.Movie.key)))
+        new_movies: list[s.MovieExportCreate] = []
+        new_keys: set[str] = set()
+        for movie in movies:
+            if movie.key in new_keys:
+                # Only the first row of a repeated key is imported, as in the row by row mode
+                log(log.WARNING, "Movie [%s] is repeated in the sheet, see MOVIE [%s]", movie.key, movie.title_en)
+            elif movie.key not in existing_keys:
+                new_keys.add(movie.key)
+                new_movies.append(movie)
+        skipped_movies = len(movies) - len(new_movies)
+
+        actors_ids = set(session.scalars(sa.select(m.Actor.id)))
+        directors_ids = set(session.scalars(sa.select(m.Director.id)))
+        genres_ids = set(session.scalars(sa.select(m.Genre.id)))
+        subgenres_parents: dict[int, int] = {
+            subgenre_id: genre_id
+            for subgenre_id, genre_id in session.execute(sa.select(m.Subgenre.id, m.Subgenre.genre_id))
+        }
+        specifications_ids = set(session.scalars(sa.select(m.Specification.id)))
+        keywords_ids = set(session.scalars(sa.select(m.Keyword.id)))
+        action_times_ids = set(session.scalars(sa.select(m.ActionTime.id)))
+
+        # Validate all rows before inserting anything
+        for movie in new_movies:
+            for name, ids, existing_ids in (
+                ("Actor", movie.actors_ids, actors_ids),
+                ("Director", movie.directors_ids, directors_ids),
+                ("Genre", movie.genres_ids, genres_ids),
+                ("Subgenre", movie.subgenres_ids or [], subgenres_parents),
+                ("Specification", movie.specifications_ids, specifications_ids),
+                ("Keyword", movie.keywords_ids, keywords_ids),
+                ("Action Time", movie.action_times_ids, action_times_ids),
+            ):
+                for item_id in ids:
+                    if item_id not in existing_ids:
+                        log(log.ERROR, "%s [%s] not found, see MOVIE [%s]", name, item_id, movie.title_en)
+                        raise Exception(f"{name} [{item_id}] not found")
+
+            for subgenre_id in movie.subgenres_ids or []:
+                if subgenres_parents[subgenre_id] not in movie.genres_ids:
+                    log(
+                        log.ERROR,
+                        "Subgenre [%s] has not parent genre, see MOVIE [%s] table column!",
+                        subgenre_id,
+                        movie.title_en,
+                    )
+                    raise Exception(
+                        f"Subgenre [{subgenre_id}] has not parent genre, see MOVIE [{movie.title_en}] table column!"
+                    )
+
+        for chunk_start in range(0, len(new_movies), batch_size):
+            chunk = new_movies[chunk_start : chunk_start + batch_size]
+
+            default_ratings = [get_default_rating(movie) for movie in chunk]
+            movies_rows = []
+            for movie, default_rating in zip(chunk, default_ratings):
+                movies_rows.append(
+                    dict(
+                        key=movie.key,
+                        poster=movie.poster,
+                        release_date=movie.release_date,
+                        duration=movie.duration,
+                        budget=movie.budget,
+                        domestic_gross=movie.domestic_gross,
+                        worldwide_gross=movie.worldwide_gross,
+                        rating_criterion=movie.rating_criterion.value,
+                        relation_type=movie.relation_type.value if movie.relation_type else None,
+                        collection_base_movie_id=movie.base_movie_id,
+                        collection_order=movie.collection_order,
+                        shared_universe_id=movie.shared_universe_id,
+                        shared_universe_order=movie.shared_universe_order,
+                        **get_empty_rating_values(movie.rating_criterion.value),
+                    )
+                )
+
+            movies_ids = session.scalars(
+                sa.insert(m.Movie).returning(m.Movie.id, sort_by_parameter_order=True), movies_rows
+            ).all()
+
+            translations_rows = []
+            ratings_rows = []
+            relations_rows: dict[sa.Table, list[dict]] = {
+                m.movie_actors: [],
+                m.movie_directors: [],
+                m.movie_genres: [],
+                m.movie_subgenres: [],
+                m.movie_specifications: [],
+                m.movie_keywords: [],
+                m.movie_action_times: [],
+            }
+
+            for movie_id, movie, default_rating in zip(movies_ids, chunk, default_ratings):
+                translations_rows += [
+                    dict(
+                        movie_id=movie_id,
+                        language=s.Language.UK.value,
+                        title=movie.title_uk,
+                        description=movie.description_uk,
+                        location=movie.location_uk,
+                    ),
+                    dict(
+                        movie_id=movie_id,
+                        language=s.Language.EN.value,
+                        title=movie.title_en,
+                        description=movie.description_en,
+                        location=movie.location_en,
+                    ),
+                ]
+                ratings_rows.append(dict(movie_id=movie_id, **default_rating))
+
+                relations_rows[m.movie_actors] += [
+                    dict(movie_id=movie_id, actor_id=actor_id) for actor_id in movie.actors_ids
+                ]
+                relations_rows[m.movie_directors] += [
+                    dict(movie_id=movie_id, director_id=director_id) for director_id in movie.directors_ids
+                ]
+                for table, column, ids, percentages in (
+                    (m.movie_genres, "genre_id", movie.genres_ids, movie.genres_list),
+                    (m.movie_subgenres, "subgenre_id", movie.subgenres_ids or [], movie.subgenres_list),
+                    (m.movie_specifications, "specification_id", movie.specifications_ids, movie.specifications_list),
+                    (m.movie_keywords, "keyword_id", movie.keywords_ids, movie.keywords_list),
+                    (m.movie_action_times, "action_time_id", movie.action_times_ids, movie.action_times_list),
+                ):
+                    relations_rows[table] += [
+                        {"movie_id": movie_id, column: item_id, "percentage_match": percentage}
+                        for item_id, percentage in get_percentage_matches(ids, percentages).items()
+                    ]
+
+            session.execute(sa.insert(m.MovieTranslation), translations_rows)
+            session.execute(sa.insert(m.Rating), ratings_rows)
+            recalculate_movies_rating(session, list(movies_ids))
+            for table, rows in relations_rows.items():
+                if rows:
+                    session.execute(table.insert(), rows)
+
+            inserted_rows += (
+                len(movies_rows) + len(translations_rows) + len(ratings_rows) + sum(map(len, relations_rows.values()))
+            )
+            log(log.DEBUG, "Movies chunk [%s-%s] inserted", chunk_start + 1, chunk_start + len(chunk))
+
+        # Imported ratings belong to the default user
+        recalculate_users_stats(session, [DEFAULT_USER_ID])
+        refresh_similar_movies(session)
+
+    duration = time.perf_counter() - start
+    log(
+        log.INFO,
+        "Movies imported: [%s], skipped: [%s], rows: [%s] in [%.2f] sec ([%.0f] rows/sec)",
+        len(new_movies),
+        skipped_movies,
+        inserted_rows,
+        duration,
+        inserted_rows / duration if duration else inserted_rows,
+    )
+
+
+def write_movies_in_db_row_by_row(movies: list[s.MovieExportCreate]):
     skipped_movies = 0
     with db.begin() as session:
-        if not session.scalar(sa.select(m.Actor)):
-            log(log.ERROR, "Actor table is empty")
-            log(log.ERROR, "Please run `flask fill-db-with-actors` first")
-            raise Exception("Actor table is empty. Please run `flask fill-db-with-actors` first")
-        if not session.scalar(sa.select(m.Director)):
-            log(log.ERROR, "Director table is empty")
-            log(log.ERROR, "Please run `flask fill-db-with-directors` first")
-            raise Exception("Director table is empty. Please run `flask fill-db-with-directors` first")
-        if not session.scalar(sa.select(m.Genre)):
-            log(log.ERROR, "Genre table is empty")
-            log(log.ERROR, "Please run `flask fill-db-with-genres` first")
-            raise Exception("Genre table is empty. Please run `flask fill-db-with-genres` first")
+        check_reference_tables(session)
 
         for movie in movies:
             if session.scalar(sa.select(m.Movie).where(m.Movie.key == movie.key)):
@@ -162,48 +393,12 @@ def write_movies_in_db(movies: list[s.MovieExportCreate]):
             #     log(log.ERROR, "User [%s] not found", user_id)
             #     raise Exception(f"User [{user_id}] not found")
 
-            min_rate = 0.01
-            min_rating = 0.08
-            default_user_id = 1
-
-            ve_rate = min_rate if movie.rating_criterion == s.RatingCriterion.VISUAL_EFFECTS else None
-            sf_rate = min_rate if movie.rating_criterion == s.RatingCriterion.SCARE_FACTOR else None
-
-            humor_rate = min_rate if movie.rating_criterion == s.RatingCriterion.HUMOR else None
-
-            ac_rate = min_rate if movie.rating_criterion == s.RatingCriterion.ANIMATION_CARTOON else None
-
-            if ve_rate:
-                min_rating += ve_rate
-
-            if sf_rate:
-                min_rating += sf_rate
-
-            if humor_rate:
-                min_rating += humor_rate
-
-            if ac_rate:
-                min_rating += ac_rate
-
-            new_rating = m.Rating(
-                user_id=default_user_id,
-                movie_id=new_movie.id,
-                rating=min_rating,
-                acting=min_rate,
-                plot_storyline=min_rate,
-                script_dialogue=min_rate,
-                music=min_rate,
-                enjoyment=min_rate,
-                production_design=min_rate,
-                visual_effects=ve_rate,
-                scare_factor=sf_rate,
-                humor=humor_rate,
-                animation_cartoon=ac_rate,
-            )
+            new_rating = m.Rating(movie_id=new_movie.id, **get_default_rating(movie))
 
             session.add(new_rating)
+            session.flush()
 
-            process_movie_rating(new_movie)
+            recalculate_movie_rating(session, new_movie)
 
             for percentage_match_dict in movie.genres_list:
                 for genre_id, percentage in percentage_match_dict.items():
@@ -295,6 +490,8 @@ def write_movies_in_db(movies: list[s.MovieExportCreate]):
                     )
                     session.execute(movie_action_time)
 
+        recalculate_users_stats(session, [DEFAULT_USER_ID])
+        refresh_similar_movies(session)
         session.commit()
 
     log(log.INFO, "Skipped movies: %s", skipped_movies)
@@ -305,7 +502,7 @@ def convert_string_to_list_of_integers(input_string):
     return [int(num) for num in string_numbers]
 
 
-def export_movies_from_google_spreadsheets(with_print: bool = True, in_json: bool = False):
+def export_movies_from_google_spreadsheets(with_print: bool = True, in_json: bool = False, row_by_row: bool = False):
     """Fill movies with data from google spreadsheets"""
 
     credentials = authorized_user_in_google_spreadsheets()
@@ -521,17 +718,17 @@ def export_movies_from_google_spreadsheets(with_print: bool = True, in_json: boo
         json.dump(s.MoviesJSONFile(movies=movies).model_dump(mode="json"), file, indent=4)
         print("Movies data saved to [data/movies.json] file")
 
-    write_movies_in_db(movies)
+    write_movies_in_db(movies, row_by_row=row_by_row)
     log(log.INFO, "Movies data SUCCESSFULLY saved to database")
 
 
-def export_movies_from_json_file(max_movies_limit: int | None = None):
+def export_movies_from_json_file(max_movies_limit: int | None = None, row_by_row: bool = False):
     """Fill movies with data from json file"""
 
-    with open("data/movies.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "movies.json"), "r") as file:
         file_data = s.MoviesJSONFile.model_validate(json.load(file))
 
     movies = file_data.movies
     if max_movies_limit:
         movies = movies[:max_movies_limit]
-    write_movies_in_db(movies)
+    write_movies_in_db(movies, row_by_row=row_by_row)
@@ -1,9 +1,15 @@
 from datetime import datetime
 import json
-import sqlalchemy as sa
+import os
+import time
 
 from googleapiclient.discovery import build
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import Insert
 
+from api.controllers.movie_rating import recalculate_movies_rating
+from api.controllers.user_stats import recalculate_users_stats
 from app import models as m
 from app import schema as s
 from app.database import db
@@ -36,64 +42,102 @@ UPDATED_AT = "updated_at"
 LAST_SHEET_COLUMN = "R"
 RATING_RANGE_NAME = f"Rating!A1:{LAST_SHEET_COLUMN}"
 
+# Ratings written per upsert statement
+BATCH_SIZE = 1000
+
+# Values replaced when the user already rated the movie
+UPSERT_FIELDS = (
+    RATING,
+    ACTING,
+    PLOT_STORYLINE,
+    SCRIPT_DIALOGUE,
+    MUSIC,
+    ENJOYMENT,
+    PRODUCTION_DESIGN,
+    VISUAL_EFFECTS,
+    SCARE_FACTOR,
+    HUMOR,
+    ANIMATION_CARTOON,
+    COMMENT,
+    CREATED_AT,
+    UPDATED_AT,
+)
+
+
+def get_rating_row(rating: s.RatingExportCreate) -> dict:
+    return dict(
+        movie_id=rating.movie_id,
+        user_id=rating.user_id,
+        rating=rating.rating,
+        acting=rating.acting,
+        plot_storyline=rating.plot_storyline,
+        script_dialogue=rating.script_dialogue,
+        music=rating.music,
+        enjoyment=rating.enjoyment,
+        production_design=rating.production_design,
+        visual_effects=rating.visual_effects,
+        scare_factor=rating.scare_factor,
+        humor=rating.humor,
+        animation_cartoon=rating.animation_cartoon,
+        comment=rating.comment or "",
+        created_at=rating.created_at,
+        updated_at=rating.updated_at,
+    )
+
+
+def get_upsert_statement(session: Session) -> Insert:
+    """INSERT ... ON CONFLICT (user_id, movie_id) DO UPDATE of all the rating values"""
+
+    dialect = session.get_bind().dialect.name
+    index_elements = [m.Rating.user_id, m.Rating.movie_id]
+    if dialect == "postgresql":
+        pg_insert = postgresql.insert(m.Rating)
+        return pg_insert.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={field: pg_insert.excluded[field] for field in UPSERT_FIELDS},
+        )
+    if dialect == "sqlite":
+        sqlite_insert = sqlite.insert(m.Rating)
+        return sqlite_insert.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={field: sqlite_insert.excluded[field] for field in UPSERT_FIELDS},
+        )
+    raise NotImplementedError(f"Ratings upsert is not supported for [{dialect}]")
 
-def write_ratings_in_db(ratings: list[s.RatingExportCreate]):
-    with db.begin() as session:
-        for rating in ratings:
-            if session.scalar(
-                sa.select(m.Rating).where(m.Rating.user_id == rating.user_id, m.Rating.movie_id == rating.movie_id)
-            ):
-                log(log.DEBUG, "Rating [%s] already exists", rating.id)
-                # Update rating
-                session.execute(
-                    sa.update(m.Rating)
-                    .where(m.Rating.user_id == rating.user_id, m.Rating.movie_id == rating.movie_id)
-                    .values(
-                        rating=rating.rating,
-                        acting=rating.acting,
-                        plot_storyline=rating.plot_storyline,
-                        script_dialogue=rating.script_dialogue,
-                        music=rating.music,
-                        enjoyment=rating.enjoyment,
-                        production_design=rating.production_design,
-                        visual_effects=rating.visual_effects,
-                        scare_factor=rating.scare_factor,
-                        humor=rating.humor,
-                        animation_cartoon=rating.animation_cartoon,
-                        comment=rating.comment if rating.comment else "",
-                        created_at=rating.created_at,
-                        updated_at=rating.updated_at,
-                    )
-                )
-                session.flush()
-                continue
-
-            new_rating = m.Rating(
-                # id=rating.id,
-                movie_id=rating.movie_id,
-                user_id=rating.user_id,
-                rating=rating.rating,
-                acting=rating.acting,
-                plot_storyline=rating.plot_storyline,
-                script_dialogue=rating.script_dialogue,
-                music=rating.music,
-                enjoyment=rating.enjoyment,
-                production_design=rating.production_design,
-                visual_effects=rating.visual_effects,
-                scare_factor=rating.scare_factor,
-                humor=rating.humor,
-                animation_cartoon=rating.animation_cartoon,
-                comment=rating.comment,
-                created_at=rating.created_at,
-                updated_at=rating.updated_at,
-            )
 
-            session.add(new_rating)
-            session.flush()
+def write_ratings_in_db(ratings: list[s.RatingExportCreate], batch_size: int = BATCH_SIZE):
+    """Insert new ratings and update existing ones (by user and movie) with bulk upserts.
 
-            log(log.DEBUG, "Rating [%s] created", rating.id)
+    Aggregates of the touched movies and stats of the touched users are recalculated once,
+    after all chunks are written. For a rating given twice the last one wins.
+    """
 
-        session.commit()
+    start = time.perf_counter()
+
+    rows = {(rating.user_id, rating.movie_id): get_rating_row(rating) for rating in ratings}
+    values = list(rows.values())
+
+    with db.begin() as session:
+        statement = get_upsert_statement(session)
+        for chunk_start in range(0, len(values), batch_size):
+            chunk = values[chunk_start : chunk_start + batch_size]
+            session.execute(statement, chunk)
+            log(log.DEBUG, "Ratings chunk [%s-%s] upserted", chunk_start + 1, chunk_start + len(chunk))
+
+        movie_ids = list({movie_id for _, movie_id in rows})
+        user_ids = list({user_id for user_id, _ in rows})
+        recalculate_movies_rating(session, movie_ids)
+        recalculate_users_stats(session, user_ids)
+
+    duration = time.perf_counter() - start
+    log(
+        log.INFO,
+        "Ratings upserted: [%s] of [%s] movies and [%s] users in [%.2f] sec",
+        len(rows),
+        len(movie_ids),
+        len(user_ids),
+        duration,
+    )
 
 
 def convert_string_to_list_of_integers(input_string):
@@ -238,7 +282,7 @@ def export_ratings_from_google_spreadsheets(with_print: bool = True, in_json: bo
 def export_ratings_from_json_file(max_ratings_limit: int | None = None):
     """Fill ratings with data from json file"""
 
-    with open("data/ratings.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "ratings.json"), "r") as file:
         file_data = s.RatingsJSONFile.model_validate(json.load(file))
 
     ratings = file_data.ratings
@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 
 from googleapiclient.discovery import build
@@ -128,7 +129,7 @@ def export_su_from_google_spreadsheets(with_print: bool = True, in_json: bool =
 def export_su_from_json_file(max_su_limit: int | None = None):
     """Fill SharedUniverse with data from json file"""
 
-    with open("data/shared_universes.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "shared_universes.json"), "r") as file:
         file_data = s.SharedUniversesJSONFile.model_validate(json.load(file))
 
     shared_universes = file_data.shared_universes
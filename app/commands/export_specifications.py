@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 
 from googleapiclient.discovery import build
@@ -128,7 +129,7 @@ def export_specifications_from_google_spreadsheets(with_print: bool = True, in_j
 def export_specifications_from_json_file(max_specifications_limit: int | None = None):
     """Fill specifications with data from json file"""
 
-    with open("data/specifications.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "specifications.json"), "r") as file:
         file_data = s.FilterJSONFile.model_validate(json.load(file))
 
     specifications = file_data.items
@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 
 from googleapiclient.discovery import build
@@ -135,7 +136,7 @@ def export_subgenres_from_google_spreadsheets(with_print: bool = True, in_json:
 def export_subgenres_from_json_file(max_subgenres_limit: int | None = None):
     """Fill subgenres with data from json file"""
 
-    with open("data/subgenres.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "subgenres.json"), "r") as file:
         file_data = s.GenresJSONFile.model_validate(json.load(file))
 
     subgenres = file_data.items
@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 
 from googleapiclient.discovery import build
@@ -116,7 +117,7 @@ def export_users_from_google_spreadsheets(with_print: bool = True, in_json: bool
 def export_users_from_json_file(max_users_limit: int | None = None):
     """Fill users with data from json file"""
 
-    with open("data/users.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "users.json"), "r") as file:
         file_data = s.UsersJSONFile.model_validate(json.load(file))
 
     users = file_data.users
@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 import ast
 
@@ -145,7 +146,7 @@ def export_title_categories_from_google_spreadsheets(with_print: bool = True, in
 def export_title_categories_from_json_file(max_tc_limit: int | None = None):
     """Fill visual_profile_categories with data from json file"""
 
-    with open("data/visual_profile_categories.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "visual_profile_categories.json"), "r") as file:
         file_data = s.VisualProfileJSONFile.model_validate(json.load(file))
 
     visual_profile_categories = file_data.visual_profiles
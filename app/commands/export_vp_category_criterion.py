@@ -1,4 +1,5 @@
 import json
+import os
 import sqlalchemy as sa
 
 from googleapiclient.discovery import build
@@ -130,7 +131,7 @@ def export_title_criteria_from_google_spreadsheets(with_print: bool = True, in_j
 def export_title_criteria_from_json_file(max_limit: int | None = None):
     """Fill vp_category_criteria with data from json file"""
 
-    with open("data/vp_category_criteria.json", "r") as file:
+    with open(os.path.join(CFG.JSON_DATA_PATH, "vp_category_criteria.json"), "r") as file:
         file_data = s.VPCriterionJSONFile.model_validate(json.load(file))
 
     vp_category_criteria = file_data.criteria
@@ -0,0 +1,354 @@
+import json
+import os
+import random
+import shutil
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Sequence
+
+from app import schema as s
+from app.logger import log
+from config import config
+
+CFG = config()
+
+# Vocabularies are copied as is: the catalogue grows, the set of tags does not
+VOCABULARY_FILES = [
+    "genres.json",
+    "subgenres.json",
+    "specifications.json",
+    "keywords.json",
+    "action_times.json",
+    "shared_universes.json",
+    "visual_profile_categories.json",
+    "vp_category_criteria.json",
+]
+
+TAG_FIELDS = ["genres", "subgenres", "specifications", "keywords", "action_times"]
+
+# Part of the people who are directors
+DIRECTORS_SHARE = 0.2
+# Part of the movies that continue an earlier one, and that belong to a shared universe
+SEQUELS_SHARE = 0.05
+SHARED_UNIVERSE_SHARE = 0.02
+MAX_CHARACTERS_PER_MOVIE = 3
+# Spread of user ratings around the seed rating of the template movie
+RATING_DEVIATION = 1.2
+
+
+def read_seed(name: str, schema):
+    with open(os.path.join(CFG.JSON_DATA_PATH, name), "r") as file:
+        return schema.model_validate(json.load(file))
+
+
+def write_json(path: str, name: str, data):
+    with open(os.path.join(path, name), "w") as file:
+        json.dump(data.model_dump(mode="json"), file)
+
+
+def zipf_weights(count: int) -> list[float]:
+    """Cumulative weights of a Zipf-like popularity: a few items are everywhere, most are rare"""
+
+    return list(accumulate(1 / rank for rank in range(1, count + 1)))
+
+
+def pick_unique(rnd: random.Random, population: list[int], cum_weights: Sequence[float], count: int) -> list[int]:
+    """Up to `count` distinct weighted items"""
+
+    count = min(count, len(population))
+    picked: dict[int, None] = {}
+    while len(picked) < count:
+        for item in rnd.choices(population, cum_weights=cum_weights, k=count - len(picked)):
+            picked[item] = None
+    return list(picked)
+
+
+class TagDistribution:
+    """How many tags of a kind movies have, how often each tag is used and its percentage match (from the seed)"""
+
+    def __init__(self, seed_movies: list[s.MovieExportCreate], field: str):
+        self.lengths = [len(getattr(movie, f"{field}_list") or []) for movie in seed_movies]
+        counts: Counter[int] = Counter()
+        self.percentages: list[float] = []
+        for movie in seed_movies:
+            for item in getattr(movie, f"{field}_list") or []:
+                for tag_id, percentage in item.items():
+                    counts[int(tag_id)] += 1
+                    self.percentages.append(percentage)
+        self.counts = counts
+
+    def sample(self, rnd: random.Random, tag_ids: list[int], allowed: set[int] | None = None) -> list[dict[int, float]]:
+        candidates = [tag_id for tag_id in tag_ids if allowed is None or tag_id in allowed]
+        count = min(rnd.choice(self.lengths), len(candidates))
+        if not count:
+            return []
+        # Unused seed tags still appear, just rarely
+        cum_weights = list(accumulate(self.counts[tag_id] + 1 for tag_id in candidates))
+        return [
+            {tag_id: float(min(100, max(1, round(rnd.choice(self.percentages) + rnd.uniform(-5, 5)))))}
+            for tag_id in pick_unique(rnd, candidates, cum_weights, count)
+        ]
+
+
+def generate_people(rnd: random.Random, seed_people: list[s.PersonExportCreate], count: int, prefix: str):
+    people: list[s.PersonExportCreate] = []
+    for i in range(count):
+        template = rnd.choice(seed_people)
+        born = template.born + timedelta(days=rnd.randint(-3650, 3650))
+        people.append(
+            template.model_copy(
+                update=dict(
+                    key=f"{prefix}-{template.key}-{i}",
+                    last_name_uk=f"{template.last_name_uk} {i}",
+                    last_name_en=f"{template.last_name_en} {i}",
+                    born=born,
+                    died=None,
+                )
+            )
+        )
+    return people
+
+
+def generate_catalogue(
+    path: str,
+    movies_count: int,
+    people_count: int,
+    users_count: int,
+    ratings_count: int,
+    seed: int = 1,
+):
+    """Write JSON files in the seed format (data/*.json) scaled to the given sizes.
+
+    Movies are made from the seed ones: tag counts, tag popularity and percentages follow the seed
+    distributions, people and movies have a Zipf-like popularity. The owner rates every movie;
+    the other ratings go to users with a long-tailed activity.
+    """
+
+    rnd = random.Random(seed)
+    os.makedirs(path, exist_ok=True)
+
+    for name in VOCABULARY_FILES:
+        shutil.copy(os.path.join(CFG.JSON_DATA_PATH, name), os.path.join(path, name))
+
+    seed_movies = read_seed("movies.json", s.MoviesJSONFile).movies
+    seed_ratings = read_seed("ratings.json", s.RatingsJSONFile).ratings
+    seed_users = read_seed("users.json", s.UsersJSONFile).users
+    seed_actors = read_seed("actors.json", s.PersonJSONFile).people
+    seed_directors = read_seed("directors.json", s.PersonJSONFile).people
+    seed_characters = read_seed("characters.json", s.CharactersJSONFile).characters
+    vocabularies = {
+        field: read_seed(f"{field}.json", s.GenresJSONFile if field in ("genres", "subgenres") else s.FilterJSONFile)
+        for field in TAG_FIELDS
+    }
+    shared_universes_count = len(read_seed("shared_universes.json", s.SharedUniversesJSONFile).shared_universes)
+
+    # People
+    directors_count = max(1, int(people_count * DIRECTORS_SHARE))
+    actors_count = max(1, people_count - directors_count)
+    write_json(path, "actors.json", s.PersonJSONFile(people=generate_people(rnd, seed_actors, actors_count, "actor")))
+    write_json(
+        path,
+        "directors.json",
+        s.PersonJSONFile(people=generate_people(rnd, seed_directors, directors_count, "director")),
+    )
+    actors_ids = list(range(1, actors_count + 1))
+    directors_ids = list(range(1, directors_count + 1))
+    # Popular people are spread over the ids
+    actors_weights = zipf_weights(actors_count)
+    rnd.shuffle(actors_ids)
+    directors_weights = zipf_weights(directors_count)
+    rnd.shuffle(directors_ids)
+
+    # Movies
+    distributions = {field: TagDistribution(seed_movies, field) for field in TAG_FIELDS}
+    tag_ids = {field: list(range(1, len(vocabularies[field].items) + 1)) for field in TAG_FIELDS}
+    subgenre_parents = {
+        subgenre_id: item.parent_genre_id
+        for subgenre_id, item in zip(tag_ids["subgenres"], vocabularies["subgenres"].items)
+    }
+    title_words = [word for movie in seed_movies for word in movie.title_en.split() if word.isalpha()]
+    title_words_uk = [word for movie in seed_movies for word in movie.title_uk.split() if word.isalpha()]
+
+    movies: list[s.MovieExportCreate] = []
+    characters: list[s.CharacterExportCreate] = []
+    # Base movie id -> collection order of its last sequel
+    collection_orders: dict[int, int] = {}
+    for i in range(movies_count):
+        template = rnd.choice(seed_movies)
+        tags = {field: distributions[field].sample(rnd, tag_ids[field]) for field in TAG_FIELDS if field != "subgenres"}
+        if not tags["genres"]:
+            tags["genres"] = [{rnd.choice(tag_ids["genres"]): 50.0}]
+        genre_ids = {genre_id for item in tags["genres"] for genre_id in item}
+        tags["subgenres"] = distributions["subgenres"].sample(
+            rnd,
+            tag_ids["subgenres"],
+            allowed={subgenre_id for subgenre_id, parent in subgenre_parents.items() if parent in genre_ids},
+        )
+        # Only subgenres are optional in the seed format
+        for field in ("specifications", "keywords", "action_times"):
+            if not tags[field]:
+                tags[field] = [{rnd.choice(tag_ids[field]): 100.0}]
+
+        movie_actors_ids = pick_unique(rnd, actors_ids, actors_weights, max(1, len(template.actors_ids)))
+        base_movie_id = rnd.randint(1, i) if i and rnd.random() < SEQUELS_SHARE else None
+        collection_order = None
+        if base_movie_id:
+            # Sequels of sequels join the collection of their base movie
+            base_movie_id = movies[base_movie_id - 1].base_movie_id or base_movie_id
+            base_movie = movies[base_movie_id - 1]
+            base_movie.relation_type = s.RelatedMovie.BASE
+            base_movie.collection_order = 1
+            collection_orders[base_movie_id] = collection_order = collection_orders.get(base_movie_id, 1) + 1
+        shared_universe_id = (
+            rnd.randint(1, shared_universes_count)
+            if shared_universes_count and rnd.random() < SHARED_UNIVERSE_SHARE
+            else None
+        )
+        words_count = rnd.randint(1, 4)
+        movies.append(
+            template.model_copy(
+                update=dict(
+                    key=f"movie-{i}-{template.key}",
+                    title_en=" ".join(rnd.choices(title_words, k=words_count)).title(),
+                    title_uk=" ".join(rnd.choices(title_words_uk, k=words_count)).capitalize(),
+                    release_date=datetime(1950, 1, 1) + timedelta(days=rnd.randint(0, 365 * 75)),
+                    duration=max(60, template.duration + rnd.randint(-30, 30)),
+                    actors_ids=movie_actors_ids,
+                    directors_ids=pick_unique(
+                        rnd, directors_ids, directors_weights, max(1, len(template.directors_ids))
+                    ),
+                    relation_type=s.RelatedMovie.SEQUEL if base_movie_id else None,
+                    base_movie_id=base_movie_id,
+                    collection_order=collection_order,
+                    shared_universe_id=shared_universe_id,
+                    shared_universe_order=1 if shared_universe_id else None,
+                    **{f"{field}_list": items or None for field, items in tags.items()},
+                    **{
+                        f"{field}_ids": [tag_id for item in items for tag_id in item] or None
+                        for field, items in tags.items()
+                    },
+                )
+            )
+        )
+
+        for actor_id in movie_actors_ids[: rnd.randint(1, MAX_CHARACTERS_PER_MOVIE)]:
+            character = rnd.choice(seed_characters)
+            characters.append(
+                s.CharacterExportCreate(
+                    id=len(characters) + 1,
+                    key=f"character-{len(characters) + 1}-{character.key}",
+                    name_uk=character.name_uk,
+                    name_en=character.name_en,
+                    actors_ids=[actor_id],
+                    movies_ids=[i + 1],
+                )
+            )
+
+    write_json(path, "movies.json", s.MoviesJSONFile(movies=movies))
+    write_json(path, "characters.json", s.CharactersJSONFile(characters=characters))
+
+    # Users: the seed owner first
+    owner = next(user for user in seed_users if user.role == s.UserRole.OWNER)
+    users = [owner.model_copy(update=dict(id=1))] + [
+        s.UserExportCreate(
+            id=user_id,
+            first_name="User",
+            last_name=str(user_id),
+            role=s.UserRole.USER,
+            email=f"user-{user_id}@example.com",
+        )
+        for user_id in range(2, users_count + 1)
+    ]
+    write_json(path, "users.json", s.UsersJSONFile(users=users))
+
+    # Ratings: the owner rates every movie, other users by activity and movie popularity
+    movie_ids = list(range(1, movies_count + 1))
+    movies_weights = zipf_weights(movies_count)
+    rnd.shuffle(movie_ids)
+    user_ids = list(range(2, users_count + 1))
+    others_count = max(0, ratings_count - movies_count)
+    per_user: Counter[int] = Counter(
+        rnd.choices(user_ids, cum_weights=zipf_weights(len(user_ids)), k=others_count) if user_ids else []
+    )
+
+    now = datetime.now()
+    ratings: list[s.RatingExportCreate] = []
+    for user_id, count in [(1, movies_count), *per_user.items()]:
+        rated_ids = sorted(movie_ids) if user_id == 1 else pick_unique(rnd, movie_ids, movies_weights, count)
+        for movie_id in rated_ids:
+            template_rating = rnd.choice(seed_ratings)
+            rated_at = now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365 * 3))
+            ratings.append(
+                template_rating.model_copy(
+                    update=dict(
+                        id=len(ratings) + 1,
+                        movie_id=movie_id,
+                        user_id=user_id,
+                        rating=round(min(10, max(1, rnd.gauss(template_rating.rating, RATING_DEVIATION))), 1),
+                        created_at=rated_at,
+                        updated_at=rated_at,
+                    )
+                )
+            )
+    write_json(path, "ratings.json", s.RatingsJSONFile(ratings=ratings))
+
+    log(
+        log.INFO,
+        "Catalogue in [%s]: [%s] movies, [%s] actors, [%s] directors, [%s] characters, [%s] users, [%s] ratings",
+        path,
+        len(movies),
+        actors_count,
+        directors_count,
+        len(characters),
+        len(users),
+        len(ratings),
+    )
+
+
+def load_catalogue(path: str):
+    """Fill the database from JSON files in the seed format (like the test database)"""
+
+    from .calculate_movie_rating import calculate_movie_rating
+    from .calculate_similar_movies import calculate_similar_movies
+    from .calculate_user_stats import calculate_user_stats
+    from .create_visual_profiles import create_visual_profiles
+    from .export_action_times import export_action_times_from_json_file
+    from .export_actors import export_actors_from_json_file
+    from .export_characters import export_characters_from_json_file
+    from .export_directors import export_directors_from_json_file
+    from .export_genres import export_genres_from_json_file
+    from .export_keywords import export_keywords_from_json_file
+    from .export_movies import export_movies_from_json_file
+    from .export_rating import export_ratings_from_json_file
+    from .export_shared_universe import export_su_from_json_file
+    from .export_specifications import export_specifications_from_json_file
+    from .export_subgenres import export_subgenres_from_json_file
+    from .export_users import export_users_from_json_file
+    from .export_vp_categories import export_title_categories_from_json_file
+    from .export_vp_category_criterion import export_title_criteria_from_json_file
+
+    json_data_path = CFG.JSON_DATA_PATH
+    CFG.JSON_DATA_PATH = path
+    try:
+        export_users_from_json_file()
+        export_actors_from_json_file()
+        export_directors_from_json_file()
+        export_genres_from_json_file()
+        export_subgenres_from_json_file()
+        export_specifications_from_json_file()
+        export_keywords_from_json_file()
+        export_action_times_from_json_file()
+        export_su_from_json_file()
+        export_movies_from_json_file()
+        export_ratings_from_json_file()
+        export_characters_from_json_file()
+        export_title_criteria_from_json_file()
+        export_title_categories_from_json_file()
+    finally:
+        CFG.JSON_DATA_PATH = json_data_path
+
+    create_visual_profiles()
+    calculate_movie_rating()
+    calculate_user_stats()
+    calculate_similar_movies()
@@ -0,0 +1,190 @@
+import random
+import re
+import time
+from uuid import uuid4
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from api.controllers.super_search import get_filter_query_conditions, get_genre_query_conditions
+from app import models as m
+from app import schema as s
+from app.database import db
+from app.logger import log
+
+# Indexes of the 30_covering_indexes migration used by the hot queries: table -> index names
+ADVISED_INDEXES = {
+    "movie_genres": ["ix_movie_genres_genre_id_percentage_match"],
+    "movie_keywords": ["ix_movie_keywords_keyword_id_percentage_match"],
+    "ratings": ["ix_ratings_user_id_movie_id"],
+    "users": ["ix_users_uuid"],
+    "movie_translations": ["ix_movie_translations_movie_id_language"],
+}
+
+TAGS_COUNT = 50
+TAGS_PER_MOVIE = 5
+RATINGS_PER_USER = 100
+
+
+def fill_synthetic_catalogue(session: Session, count: int, rnd: random.Random) -> dict:
+    """Movies with genres, keywords, translations and user ratings (Core inserts, no ORM objects)"""
+
+    movie_ids = session.scalars(
+        sa.insert(m.Movie).returning(m.Movie.id, sort_by_parameter_order=True),
+        [dict(key=f"advisor-movie-{i}", duration=90, budget=0) for i in range(count)],
+    ).all()
+    session.execute(
+        sa.insert(m.MovieTranslation),
+        [
+            dict(movie_id=movie_id, language=language, title=f"Movie {movie_id}", description="", location="")
+            for movie_id in movie_ids
+            for language in (s.Language.UK.value, s.Language.EN.value)
+        ],
+    )
+
+    tag_tables: tuple[tuple[type[m.Genre] | type[m.Keyword], sa.Table, str], ...] = (
+        (m.Genre, m.movie_genres, "genre_id"),
+        (m.Keyword, m.movie_keywords, "keyword_id"),
+    )
+    tags = {}
+    for model, table, column in tag_tables:
+        keys = [f"advisor-{model.__tablename__}-{i}" for i in range(TAGS_COUNT)]
+        tag_ids = session.scalars(
+            sa.insert(model).returning(model.id, sort_by_parameter_order=True), [dict(key=key) for key in keys]
+        ).all()
+        session.execute(
+            sa.insert(table),
+            [
+                {"movie_id": movie_id, column: tag_id, "percentage_match": rnd.randint(1, 100)}
+                for movie_id in movie_ids
+                for tag_id in rnd.sample(tag_ids, TAGS_PER_MOVIE)
+            ],
+        )
+        tags[model.__tablename__] = list(zip(keys, tag_ids))
+
+    users = session.execute(
+        sa.insert(m.User).returning(m.User.id, m.User.uuid, sort_by_parameter_order=True),
+        [dict(email=f"advisor-{i}@example.com", uuid=str(uuid4())) for i in range(max(count // 50, 1))],
+    ).all()
+    criteria = dict(acting=5, plot_storyline=5, script_dialogue=5, music=5, enjoyment=5, production_design=5)
+    session.execute(
+        sa.insert(m.Rating),
+        [
+            dict(movie_id=movie_id, user_id=user_id, rating=rnd.randint(1, 10), **criteria)
+            for user_id, _ in users
+            for movie_id in rnd.sample(movie_ids, min(RATINGS_PER_USER, len(movie_ids)))
+        ],
+    )
+
+    return dict(movie_ids=movie_ids, tags=tags, users=users)
+
+
+def get_hot_queries(session: Session, catalogue: dict, rnd: random.Random) -> dict[str, sa.Select]:
+    """Statements of the hot routes, with literal values from the synthetic catalogue"""
+
+    genre_key, genre_id = rnd.choice(catalogue["tags"]["genres"])
+    keyword_key, _ = rnd.choice(catalogue["tags"]["keywords"])
+    user_id, user_uuid = rnd.choice(catalogue["users"])
+    movie_ids = rnd.sample(catalogue["movie_ids"], 30)
+
+    genre_conditions, _ = get_genre_query_conditions([f"{genre_key}(40,80)"], [], session)
+    _, keyword_conditions, _ = get_filter_query_conditions([], [f"{keyword_key}(20,100)"], [], session)
+
+    return {
+        "super search by genre range": sa.select(m.Movie.id).where(*genre_conditions).order_by(m.Movie.id).limit(30),
+        "super search by keyword range": sa.select(m.Movie.id)
+        .where(*keyword_conditions)
+        .order_by(m.Movie.id)
+        .limit(30),
+        "movies of a genre (tag side)": sa.select(m.movie_genres.c.movie_id).where(
+            m.movie_genres.c.genre_id == genre_id, m.movie_genres.c.percentage_match >= 50
+        ),
+        "current user by uuid": sa.select(m.User).where(m.User.is_deleted.is_(False), m.User.uuid == user_uuid),
+        "user rating of a movie": sa.select(m.Rating).where(
+            m.Rating.user_id == user_id, m.Rating.movie_id == movie_ids[0]
+        ),
+        "movie titles of a page": sa.select(m.MovieTranslation.movie_id, m.MovieTranslation.title).where(
+            m.MovieTranslation.movie_id.in_(movie_ids), m.MovieTranslation.language == s.Language.EN.value
+        ),
+    }
+
+
+def explain(session: Session, statement: sa.Select) -> list[str]:
+    """Query plan lines without costs and timings, so plans can be compared"""
+
+    sql = statement.compile(dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True})
+    if session.get_bind().dialect.name == "postgresql":
+        rows = session.execute(sa.text(f"EXPLAIN (ANALYZE, COSTS OFF, TIMING OFF, SUMMARY OFF) {sql}")).scalars()
+        return [re.sub(r"\s*\(actual [^)]*\)", "", row) for row in rows]
+    return [row[-1] for row in session.execute(sa.text(f"EXPLAIN QUERY PLAN {sql}"))]
+
+
+def measure(session: Session, statement: sa.Select, repeat: int) -> float:
+    """Median execution time, in ms"""
+
+    timings = []
+    for _ in range(repeat):
+        start_time = time.perf_counter()
+        session.execute(statement).all()
+        timings.append(time.perf_counter() - start_time)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def get_advised_indexes() -> list[sa.Index]:
+    tables = db.Model.metadata.tables
+    return [index for table, names in ADVISED_INDEXES.items() for index in tables[table].indexes if index.name in names]
+
+
+def is_database_empty(session: Session) -> bool:
+    return not any(session.scalar(sa.select(model.id).limit(1)) for model in (m.Movie, m.User))
+
+
+def index_advisor(count: int, repeat: int, dedicated_db: bool = False):
+    """Compare plans and latency of the hot route queries without and with the covering indexes.
+
+    A synthetic catalogue is inserted and indexes are dropped and created in a transaction which
+    is rolled back at the end, so the database is left as it was. Dropping an index takes an
+    ACCESS EXCLUSIVE lock on its table (on PostgreSQL) until the rollback, so the advisor runs only
+    on an empty database or on one marked as dedicated.
+    """
+
+    with db.Session() as session:
+        if not dedicated_db and not is_database_empty(session):
+            raise Exception(
+                "Database is not empty. Run the index advisor on a dedicated database with `--dedicated-db`"
+            )
+
+    rnd = random.Random(count)
+
+    with db.begin() as session:
+        catalogue = fill_synthetic_catalogue(session, count, rnd)
+        queries = get_hot_queries(session, catalogue, rnd)
+        log(log.INFO, "Synthetic catalogue: [%s] movies, [%s] users", count, len(catalogue["users"]))
+
+        results: dict[str, dict[str, tuple[list[str], float]]] = {}
+        for mode in ("without", "with"):
+            for index in get_advised_indexes():
+                if mode == "without":
+                    index.drop(session.connection(), checkfirst=True)
+                else:
+                    index.create(session.connection(), checkfirst=True)
+            session.execute(sa.text("ANALYZE"))
+
+            for name, statement in queries.items():
+                results.setdefault(name, {})[mode] = explain(session, statement), measure(session, statement, repeat)
+
+        for name, modes in results.items():
+            (plan_without, time_without), (plan_with, time_with) = modes["without"], modes["with"]
+            log(
+                log.INFO,
+                "[%s]: [%.2f] ms -> [%.2f] ms, plan %s",
+                name,
+                time_without,
+                time_with,
+                "changed" if plan_without != plan_with else "unchanged",
+            )
+            if plan_without != plan_with:
+                log(log.INFO, "  without indexes:\n    %s", "\n    ".join(plan_without))
+                log(log.INFO, "  with indexes:\n    %s", "\n    ".join(plan_with))
+
+        session.rollback()
@@ -1,6 +1,9 @@
-from typing import Generator
+from typing import AsyncGenerator, Callable, Concatenate, Generator, ParamSpec, TypeVar
 
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from starlette.concurrency import run_in_threadpool
 
 from config import config
 
@@ -16,7 +19,58 @@ db = Alchemical()
 if CFG.IS_API:
     db.initialize(url=CFG.ALCHEMICAL_DATABASE_URL)
 
+# Optional asyncio engine (like postgresql+asyncpg://...) for async routes
+async_engine = None
+async_session_maker: async_sessionmaker[AsyncSession] | None = None
+
+if CFG.IS_API and CFG.ASYNC_DATABASE_URL:
+    async_engine = create_async_engine(
+        CFG.ASYNC_DATABASE_URL,
+        # aiosqlite connections can't be shared between event loops
+        poolclass=NullPool if CFG.ASYNC_DATABASE_URL.startswith("sqlite") else None,
+    )
+    async_session_maker = async_sessionmaker(async_engine, expire_on_commit=False)
+
 
 def get_db() -> Generator[Session, None, None]:
     with db.Session() as session:
         yield session
+
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class AsyncDB:
+    """Database access for async routes.
+
+    Sync query code runs with `AsyncSession.run_sync` when the async engine is configured
+    (ASYNC_DATABASE_URL), so the event loop is not blocked by DB I/O. Otherwise it runs
+    with the regular session in the threadpool, like sync routes do.
+
+    With the async engine the code runs on the event loop itself, so it must not do CPU heavy
+    work or wait for a lock that is held across I/O: such caches (like the super search index)
+    are built in the threadpool before `run`.
+    """
+
+    def __init__(self, session: Session | AsyncSession):
+        self.session = session
+
+    @property
+    def is_async(self) -> bool:
+        return isinstance(self.session, AsyncSession)
+
+    async def run(self, fn: Callable[Concatenate[Session, P], T], *args: P.args, **kwargs: P.kwargs) -> T:
+        if isinstance(self.session, AsyncSession):
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncDB, None]:
+    if async_session_maker:
+        async with async_session_maker() as async_session:
+            yield AsyncDB(async_session)
+        return
+
+    with db.Session() as session:
+        yield AsyncDB(session)
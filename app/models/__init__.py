@@ -3,7 +3,7 @@ from .user import User
 from .admin import Admin, AnonymousUser
 from .movie import Movie
 from .movie_translation import MovieTranslation
-from .mixins import CreatableMixin, UpdatableMixin
+from .mixins import CreatableMixin, UpdatableMixin, KeyedModel
 from .actor import Actor
 from .movie_actors import movie_actors
 from .actor_translation import ActorTranslation
@@ -31,6 +31,9 @@ from .movie_filters.keyword import Keyword
 from .movie_filters.action_time_translation import ActionTimeTranslation
 from .movie_filters.action_time import ActionTime
 from .movie_filters.movie_action_times import movie_action_times
+from .similar_movies import similar_movies
+from .user_stats import UserStats, user_genre_stats
+from .quick_movie import QuickMovie
 from .shared_universe import SharedUniverse
 from .shared_universe_i18n import SharedUniverseTranslation
 from .movie_actor_character import MovieActorCharacter
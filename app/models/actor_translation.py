@@ -4,11 +4,13 @@ from sqlalchemy import orm
 from app.database import db
 from app.schema.language import Language
 
+from .mixins import SearchableMixin
 from .utils import ModelMixin
 
 
-class ActorTranslation(db.Model, ModelMixin):
+class ActorTranslation(db.Model, ModelMixin, SearchableMixin):
     __tablename__ = "actor_translations"
+    __search_fields__ = ("first_name", "last_name")
 
     id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
     actor_id: orm.Mapped[int] = orm.mapped_column(sa.ForeignKey("actors.id"), nullable=False)
@@ -24,3 +26,6 @@ class ActorTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<ActorTranslation [{self.id}] - {self.full_name}>"
+
+
+sa.Index("ix_actor_translations_actor_id_language", ActorTranslation.actor_id, ActorTranslation.language)
@@ -2,11 +2,12 @@ import sqlalchemy as sa
 from app.database import db
 from sqlalchemy import orm
 
-from app.models.mixins import CreatableMixin, UpdatableMixin
+from app.models.mixins import CreatableMixin, SearchableMixin, UpdatableMixin
 
 
-class CharacterTranslation(db.Model, CreatableMixin, UpdatableMixin):
+class CharacterTranslation(db.Model, CreatableMixin, UpdatableMixin, SearchableMixin):
     __tablename__ = "character_translations"
+    __search_fields__ = ("name",)
 
     id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
     character_id: orm.Mapped[int] = orm.mapped_column(sa.ForeignKey("characters.id"), nullable=False)
@@ -17,3 +18,8 @@ class CharacterTranslation(db.Model, CreatableMixin, UpdatableMixin):
 
     def __repr__(self):
         return f"<CharacterTranslation [{self.id}] - {self.name}>"
+
+
+sa.Index(
+    "ix_character_translations_character_id_language", CharacterTranslation.character_id, CharacterTranslation.language
+)
@@ -4,6 +4,7 @@ from sqlalchemy import orm
 from app.database import db
 from app.schema.language import Language
 
+from .mixins import SearchableMixin
 from .utils import ModelMixin
 from typing import TYPE_CHECKING
 
@@ -11,8 +12,9 @@ if TYPE_CHECKING:
     from .director import Director
 
 
-class DirectorTranslation(db.Model, ModelMixin):
+class DirectorTranslation(db.Model, ModelMixin, SearchableMixin):
     __tablename__ = "director_translations"
+    __search_fields__ = ("first_name", "last_name")
 
     id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
     director_id: orm.Mapped[int] = orm.mapped_column(sa.ForeignKey("directors.id"), nullable=False)
@@ -33,3 +35,6 @@ class DirectorTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<DirectorTranslation [{self.id}] - {self.full_name}>"
+
+
+sa.Index("ix_director_translations_director_id_language", DirectorTranslation.director_id, DirectorTranslation.language)
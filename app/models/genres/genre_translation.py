@@ -19,3 +19,6 @@ class GenreTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<GenreTranslation [{self.id}]>"
+
+
+sa.Index("ix_genre_translations_genre_id_language", GenreTranslation.genre_id, GenreTranslation.language)
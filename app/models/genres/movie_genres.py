@@ -9,4 +9,6 @@ movie_genres = sa.Table(
     sa.Column("movie_id", sa.ForeignKey("movies.id"), primary_key=True),
     sa.Column("genre_id", sa.ForeignKey("genres.id"), primary_key=True),
     sa.Column("percentage_match", sa.Float, nullable=False, default=0.0),
+    # Super search range filters by tag (covering, the table is not read)
+    sa.Index("ix_movie_genres_genre_id_percentage_match", "genre_id", "percentage_match", "movie_id"),
 )
@@ -8,4 +8,5 @@ movie_subgenres = sa.Table(
     sa.Column("movie_id", sa.ForeignKey("movies.id"), primary_key=True),
     sa.Column("subgenre_id", sa.ForeignKey("subgenres.id"), primary_key=True),
     sa.Column("percentage_match", sa.Float, nullable=False, default=0.0),
+    sa.Index("ix_movie_subgenres_subgenre_id_percentage_match", "subgenre_id", "percentage_match", "movie_id"),
 )
@@ -19,3 +19,6 @@ class SubgenreTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<SubgenreTranslation [{self.id}]>"
+
+
+sa.Index("ix_subgenre_translations_subgenre_id_language", SubgenreTranslation.subgenre_id, SubgenreTranslation.language)
@@ -1,4 +1,6 @@
+import re
 from datetime import UTC, datetime
+from typing import Protocol, cast
 
 import sqlalchemy as sa
 from sqlalchemy.ext.declarative import as_declarative
@@ -28,3 +30,122 @@ class UpdatableMixin:
     )
 
     # updated_by: orm.Mapped[str] = orm.mapped_column(sa.String(128), nullable=False)
+
+
+class KeyedModel(Protocol):
+    """Model of a filter item or a person, looked up by its unique key"""
+
+    id: orm.Mapped[int]
+    key: orm.Mapped[str]
+
+
+def normalize_search_text(text: str) -> str:
+    """Lowercase and keep only letters, digits and spaces (for Ukrainian and English)"""
+    return re.sub(r"[^a-zA-Zа-яА-Я0-9 ]", "", text.lower())
+
+
+class SearchableMixin:
+    """Translation with a precomputed `search_name`, filled on write and indexed with pg_trgm.
+
+    `__search_fields__` are joined with a space and normalized, like the search query. The name is
+    set by the insert default, on ORM flush and after ORM UPDATE statements (bulk or with criteria);
+    Core updates of the translation tables have to call `refresh_search_names`.
+    """
+
+    __tablename__: str
+    __table_args__: tuple | dict
+    __search_fields__: tuple[str, ...]
+
+    def __init_subclass__(cls, **kwargs):
+        # The search index is merged into own __table_args__ of a model (mixin ones would be hidden by them)
+        table_args = cls.__dict__.get("__table_args__", ())
+        if isinstance(table_args, dict):
+            setattr(cls, "__table_args__", (cls.get_search_index(), table_args))
+        elif isinstance(table_args, tuple):
+            if table_args and isinstance(table_args[-1], dict):
+                setattr(cls, "__table_args__", (*table_args[:-1], cls.get_search_index(), table_args[-1]))
+            else:
+                setattr(cls, "__table_args__", (*table_args, cls.get_search_index()))
+        super().__init_subclass__(**kwargs)
+
+    @classmethod
+    def get_search_name(cls, values: dict) -> str:
+        return normalize_search_text(" ".join(values.get(field) or "" for field in cls.__search_fields__))
+
+    @classmethod
+    def get_search_index(cls) -> sa.Index:
+        return sa.Index(
+            f"ix_{cls.__tablename__}_search_name_trgm",
+            "search_name",
+            postgresql_using="gin",
+            postgresql_ops={"search_name": "gin_trgm_ops"},
+        )
+
+    @orm.declared_attr
+    def search_name(cls) -> orm.Mapped[str]:
+        # Context-sensitive default also covers bulk (Core) inserts
+        return orm.mapped_column(
+            sa.String(255),
+            nullable=False,
+            server_default="",
+            default=lambda context: cls.get_search_name(context.get_current_parameters()),
+        )
+
+
+@sa.event.listens_for(SearchableMixin, "before_update", propagate=True)
+def update_search_name(mapper, connection, target: SearchableMixin):
+    target.search_name = target.get_search_name({field: getattr(target, field) for field in target.__search_fields__})
+
+
+def refresh_search_names(session: orm.Session, model: type[SearchableMixin], ids: list[int] | None = None) -> int:
+    """Recalculate `search_name` of the translations (all, or with the given ids) from their fields.
+
+    Only changed names are written, with one executemany UPDATE. Returns number of updated rows.
+    """
+
+    table = cast(sa.Table, orm.class_mapper(model).local_table)
+    query = sa.select(table.c.id, table.c.search_name, *[table.c[field] for field in model.__search_fields__])
+    if ids is not None:
+        query = query.where(table.c.id.in_(ids))
+
+    rows = []
+    for row in session.execute(query).mappings():
+        search_name = model.get_search_name(dict(row))
+        if search_name != row["search_name"]:
+            rows.append(dict(row_id=row["id"], new_search_name=search_name))
+
+    if rows:
+        session.execute(
+            table.update()
+            .where(table.c.id == sa.bindparam("row_id"))
+            .values(search_name=sa.bindparam("new_search_name")),
+            rows,
+        )
+    return len(rows)
+
+
+@sa.event.listens_for(orm.Session, "do_orm_execute")
+def refresh_updated_search_names(orm_execute_state: orm.ORMExecuteState):
+    """ORM UPDATE statements skip `before_update`, so search names of the updated rows are refreshed after them"""
+
+    mapper = orm_execute_state.bind_mapper
+    if not orm_execute_state.is_update or not mapper or not issubclass(mapper.class_, SearchableMixin):
+        return None
+
+    session = orm_execute_state.session
+    table = mapper.local_table
+    parameters = orm_execute_state.parameters
+    if isinstance(parameters, list):
+        # Bulk UPDATE by primary key
+        ids = [row["id"] for row in parameters]
+    else:
+        statement = orm_execute_state.statement
+        assert isinstance(statement, sa.Update)
+        query = sa.select(table.c.id)
+        if statement.whereclause is not None:
+            query = query.where(statement.whereclause)
+        ids = list(session.scalars(query))
+
+    result = orm_execute_state.invoke_statement()
+    refresh_search_names(session, mapper.class_, ids)
+    return result
@@ -1,3 +1,4 @@
+import random
 from datetime import datetime
 from functools import cached_property
 
@@ -35,6 +36,14 @@ if TYPE_CHECKING:
     from .title_visual_profile.visual_profile import VisualProfile
 
 
+# Movie.random_key is uniformly distributed in [0, RANDOM_KEY_MODULUS)
+RANDOM_KEY_MODULUS = 2**31 - 1
+
+
+def generate_random_key() -> int:
+    return random.randrange(RANDOM_KEY_MODULUS)
+
+
 # Questions/Ideas:
 # 1. add future releases? will watch list be implemented?
 # 2. Add Notes - only for me. Not visible to others. There will be some notes about the movie, where to watch, etc.
@@ -136,6 +145,14 @@ class Movie(db.Model, ModelMixin, CreatableMixin, UpdatableMixin):
 
     is_deleted: orm.Mapped[bool] = orm.mapped_column(sa.Boolean, default=False)
 
+    # Uniformly distributed key for random sampling and seeded random order
+    random_key: orm.Mapped[int] = orm.mapped_column(
+        sa.Integer, nullable=False, index=True, default=generate_random_key, server_default="0"
+    )
+
+    # Norm of the weighted tags vector, for the similar movies (see api/controllers/similar_movies.py)
+    similarity_norm: orm.Mapped[float] = orm.mapped_column(sa.Float, nullable=False, default=0.0, server_default="0")
+
     def __repr__(self):
         return f"<Movie [{self.id}]: {self.translations[0].title}>"
 
@@ -20,3 +20,10 @@ class ActionTimeTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<ActionTimeTranslation [{self.id}]>"
+
+
+sa.Index(
+    "ix_action_time_translations_action_time_id_language",
+    ActionTimeTranslation.action_time_id,
+    ActionTimeTranslation.language,
+)
@@ -20,3 +20,6 @@ class KeywordTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<KeywordTranslation [{self.id}]>"
+
+
+sa.Index("ix_keyword_translations_keyword_id_language", KeywordTranslation.keyword_id, KeywordTranslation.language)
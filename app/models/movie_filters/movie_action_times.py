@@ -8,4 +8,5 @@ movie_action_times = sa.Table(
     sa.Column("movie_id", sa.ForeignKey("movies.id"), primary_key=True),
     sa.Column("action_time_id", sa.ForeignKey("action_times.id"), primary_key=True),
     sa.Column("percentage_match", sa.Float, nullable=False, default=0.0),
+    sa.Index("ix_movie_action_times_action_time_id_percentage_match", "action_time_id", "percentage_match", "movie_id"),
 )
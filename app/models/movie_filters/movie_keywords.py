@@ -8,4 +8,5 @@ movie_keywords = sa.Table(
     sa.Column("movie_id", sa.ForeignKey("movies.id"), primary_key=True),
     sa.Column("keyword_id", sa.ForeignKey("keywords.id"), primary_key=True),
     sa.Column("percentage_match", sa.Float, nullable=False, default=0.0),
+    sa.Index("ix_movie_keywords_keyword_id_percentage_match", "keyword_id", "percentage_match", "movie_id"),
 )
@@ -8,4 +8,7 @@ movie_specifications = sa.Table(
     sa.Column("movie_id", sa.ForeignKey("movies.id"), primary_key=True),
     sa.Column("specification_id", sa.ForeignKey("specifications.id"), primary_key=True),
     sa.Column("percentage_match", sa.Float, nullable=False, default=0.0),
+    sa.Index(
+        "ix_movie_specifications_specification_id_percentage_match", "specification_id", "percentage_match", "movie_id"
+    ),
 )
@@ -20,3 +20,10 @@ class SpecificationTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<SpecificationTranslation [{self.id}]>"
+
+
+sa.Index(
+    "ix_specification_translations_specification_id_language",
+    SpecificationTranslation.specification_id,
+    SpecificationTranslation.language,
+)
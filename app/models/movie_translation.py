@@ -4,11 +4,13 @@ from sqlalchemy import orm
 from app.database import db
 from app.schema.language import Language
 
+from .mixins import SearchableMixin
 from .utils import ModelMixin
 
 
-class MovieTranslation(db.Model, ModelMixin):
+class MovieTranslation(db.Model, ModelMixin, SearchableMixin):
     __tablename__ = "movie_translations"
+    __search_fields__ = ("title",)
 
     id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
     movie_id: orm.Mapped[int] = orm.mapped_column(sa.ForeignKey("movies.id"), nullable=False)
@@ -20,3 +22,6 @@ class MovieTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<MovieTranslation [{self.id}] - {self.title}>"
+
+
+sa.Index("ix_movie_translations_movie_id_language", MovieTranslation.movie_id, MovieTranslation.language)
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+from app.database import db
+
+from .utils import ModelMixin
+
+
+class QuickMovie(db.Model, ModelMixin):
+    """Movie quickly rated by the owner, to be fully added later"""
+
+    __tablename__ = "quick_movies"
+
+    id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
+    key: orm.Mapped[str] = orm.mapped_column(sa.String(255), unique=True, nullable=False)
+    title_en: orm.Mapped[str] = orm.mapped_column(sa.String(255), nullable=False)
+
+    rating: orm.Mapped[float] = orm.mapped_column(sa.Float, nullable=False)
+    rating_criterion: orm.Mapped[str] = orm.mapped_column(sa.String(36), nullable=False)
+    rating_criteria: orm.Mapped[dict[str, float | None]] = orm.mapped_column(sa.JSON, nullable=False)
+
+    created_at: orm.Mapped[datetime] = orm.mapped_column(sa.DateTime, server_default=sa.func.now())
+
+    def __repr__(self):
+        return f"<QuickMovie [{self.id}] - {self.key}>"
@@ -17,6 +17,13 @@ if TYPE_CHECKING:
 
 class Rating(db.Model, ModelMixin, CreatableMixin, UpdatableMixin):
     __tablename__ = "ratings"
+    __table_args__ = (
+        # User top rated and recently rated movies
+        sa.Index("ix_ratings_user_id_rating", "user_id", "rating"),
+        sa.Index("ix_ratings_user_id_updated_at", "user_id", "updated_at"),
+        # One rating of the user for a movie (the conflict target of the ratings import upsert)
+        sa.Index("ix_ratings_user_id_movie_id", "user_id", "movie_id", unique=True),
+    )
 
     id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
     uuid: orm.Mapped[str] = orm.mapped_column(sa.String(36), default=lambda: str(uuid4()))
@@ -19,3 +19,10 @@ class SharedUniverseTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<SU: [{self.id}] - {self.name}>"
+
+
+sa.Index(
+    "ix_shared_universe_translations_shared_universe_id_language",
+    SharedUniverseTranslation.shared_universe_id,
+    SharedUniverseTranslation.language,
+)
@@ -0,0 +1,13 @@
+import sqlalchemy as sa
+
+from app.database import db
+
+# Precomputed top-K nearest movies by tags (see api/controllers/similar_movies.py)
+similar_movies = sa.Table(
+    "similar_movies",
+    db.Model.metadata,
+    sa.Column("movie_id", sa.ForeignKey("movies.id"), primary_key=True),
+    sa.Column("similar_movie_id", sa.ForeignKey("movies.id"), primary_key=True),
+    sa.Column("score", sa.Float, nullable=False, default=0.0),
+    sa.Index("ix_similar_movies_movie_id_score", "movie_id", "score"),
+)
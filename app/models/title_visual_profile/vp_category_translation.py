@@ -22,3 +22,10 @@ class VPCategoryTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<VPCategoryTranslation [{self.id}]>"
+
+
+sa.Index(
+    "ix_vp_category_translations_title_category_id_language",
+    VPCategoryTranslation.title_category_id,
+    VPCategoryTranslation.language,
+)
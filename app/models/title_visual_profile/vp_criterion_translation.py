@@ -22,3 +22,10 @@ class VPCriterionTranslation(db.Model, ModelMixin):
 
     def __repr__(self):
         return f"<VPCriterionTranslation [{self.id}]>"
+
+
+sa.Index(
+    "ix_vp_criterion_translations_title_criterion_id_language",
+    VPCriterionTranslation.title_criterion_id,
+    VPCriterionTranslation.language,
+)
@@ -25,7 +25,7 @@ class User(db.Model, ModelMixin, CreatableMixin, UpdatableMixin):
     __tablename__ = "users"
 
     id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
-    uuid: orm.Mapped[str] = orm.mapped_column(sa.String(36), default=lambda: str(uuid4()))
+    uuid: orm.Mapped[str] = orm.mapped_column(sa.String(36), default=lambda: str(uuid4()), index=True)
 
     email: orm.Mapped[str] = orm.mapped_column(sa.String(128), unique=True)  # get from google
     first_name: orm.Mapped[str] = orm.mapped_column(sa.String(64), default="")  # get from google
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+from app.database import db
+
+from .utils import ModelMixin
+
+
+class UserStats(db.Model, ModelMixin):
+    """Rating aggregates of a user, kept up to date on every rating change (see api/controllers/user_stats.py)"""
+
+    __tablename__ = "user_stats"
+
+    user_id: orm.Mapped[int] = orm.mapped_column(sa.ForeignKey("users.id"), primary_key=True)
+
+    ratings_count: orm.Mapped[int] = orm.mapped_column(sa.Integer, default=0, server_default="0")
+    # Last rating created or updated
+    last_rated_at: orm.Mapped[datetime | None] = orm.mapped_column(sa.DateTime, nullable=True)
+    # Best rated movies: [(movie_id, rating), ...]
+    top_rated: orm.Mapped[list[tuple[int, float]]] = orm.mapped_column(sa.JSON, default=list)
+
+    def __repr__(self):
+        return f"<UserStats [{self.user_id}] - {self.ratings_count}>"
+
+
+# Number of movies of the genre rated by the user
+user_genre_stats = sa.Table(
+    "user_genre_stats",
+    db.Model.metadata,
+    sa.Column("user_id", sa.ForeignKey("users.id"), primary_key=True),
+    sa.Column("genre_id", sa.ForeignKey("genres.id"), primary_key=True),
+    sa.Column("movies_count", sa.Integer, nullable=False, default=0),
+)
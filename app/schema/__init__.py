@@ -1,7 +1,7 @@
 # ruff: noqa: F401
 from .admin import Admin
 
-from .general import SearchType, SortOrder, SortBy, SearchResult, SearchResults, MainItemMenu
+from .general import SearchType, SortOrder, SortBy, PaginationMode, SearchResult, SearchResults, MainItemMenu
 
 from .exception import NotFound
 
@@ -34,7 +34,6 @@ from .movie import (
     ActorCharacterKey,
     MovieFormData,
     QuickMovieFormData,
-    QuickMovieJSON,
     QuickMovie,
     MovieCarousel,
     MovieCarouselList,
@@ -48,6 +47,10 @@ from .movie import (
     SimilarMovieOutList,
     QuickMovieList,
     PaginationDataOut,
+    CursorPaginationDataOut,
+    SuperSearchFacetsOut,
+    MovieProjection,
+    MovieBatchOut,
 )
 from .people import (
     PersonExportCreate,
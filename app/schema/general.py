@@ -30,6 +30,11 @@ class SortBy(Enum):
     ID = "id"
 
 
+class PaginationMode(Enum):
+    OFFSET = "offset"
+    CURSOR = "cursor"
+
+
 class SearchResult(BaseModel):
     key: str
     name: str
@@ -184,6 +184,30 @@ class PaginationDataOut(BasePagination):
     items: list[MoviePreviewOut]
 
 
+class CursorPaginationDataOut(BaseModel):
+    items: list[MoviePreviewOut]
+    size: int
+    next_cursor: str | None = None  # None on the last page
+    total: int | None = None  # only with with_total
+
+
+class SuperSearchFacetsOut(BaseModel):
+    total: int
+    # Filter name (as in the super search query) -> item key -> movies found with the item added
+    facets: dict[str, dict[str, int]]
+
+
+class MovieProjection(Enum):
+    PREVIEW = "preview"
+    FULL = "full"
+
+
+class MovieBatchOut(BaseModel):
+    # In the order of the requested keys
+    items: list[MovieOut] | list[MoviePreviewOut]
+    not_found: list[str] = []
+
+
 class QuickMovie(BaseModel):
     key: str
     title_en: str
@@ -224,10 +248,6 @@ class QuickMovieFormData(BaseModel):
     rating: float
 
 
-class QuickMovieJSON(BaseModel):
-    movies: list[QuickMovieFormData]
-
-
 class MoviePreCreateData(BaseModel):
     visual_profile_categories: list[VisualProfileData]
     actors: list[MainItemMenu]
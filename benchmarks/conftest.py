@@ -0,0 +1,125 @@
+"""Endpoint benchmarks on a synthetic catalogue (pytest-benchmark).
+
+Save a baseline, then compare later runs with it (fails on a regression of the median):
+
+    pytest benchmarks --benchmark-storage=benchmarks/baselines --benchmark-save=baseline
+    pytest benchmarks --benchmark-storage=benchmarks/baselines --benchmark-compare --benchmark-compare-fail=median:20%
+
+The database is BENCHMARK_DATABASE_URL (a local SQLite file by default, or a local Postgres).
+It is filled once with a catalogue of the `--catalogue-*` sizes and reused while the size matches.
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+# Never the development database: the benchmark one is dropped and refilled
+os.environ["ALCHEMICAL_DATABASE_URL"] = os.environ.get("BENCHMARK_DATABASE_URL", "sqlite:///database-benchmark.sqlite3")
+os.environ["APP_ENV"] = "testing"
+load_dotenv("test_api/test.env")
+
+from typing import Generator
+
+import pytest
+import sqlalchemy as sa
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from api import app
+from api.controllers.filters_cache import filters_cache
+from api.controllers.super_search_index import super_search_index
+from api.controllers.translations import translations
+from api.controllers.users_cache import users_cache
+from app import models as m
+from app import schema as s
+from app.commands.generate_catalogue import generate_catalogue, load_catalogue
+from app.database import db
+from app.logger import log
+from test_api.utils import regexp_replace
+
+# ruff: noqa: E402
+
+
+def pytest_addoption(parser: pytest.Parser):
+    group = parser.getgroup("catalogue", "Synthetic catalogue for the benchmarks")
+    group.addoption("--catalogue-movies", type=int, default=2000, help="Number of movies")
+    group.addoption("--catalogue-people", type=int, default=1000, help="Number of actors and directors")
+    group.addoption("--catalogue-users", type=int, default=200, help="Number of users")
+    group.addoption("--catalogue-ratings", type=int, default=20000, help="Number of ratings")
+    group.addoption("--catalogue-seed", type=int, default=1, help="Random seed")
+
+
+@event.listens_for(Engine, "connect")
+def register_sqlite_functions(dbapi_connection, connection_record):
+    if dbapi_connection.__class__.__module__.startswith("sqlite3"):
+        dbapi_connection.create_function("regexp_replace", 4, regexp_replace)
+
+
+@pytest.fixture(scope="session")
+def catalogue(request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory) -> dict:
+    """Database filled with the synthetic catalogue, and keys to drive the endpoints with"""
+
+    option = request.config.getoption
+    movies_count = option("--catalogue-movies")
+
+    engine = db.get_engine()
+    db.Model.metadata.create_all(engine)
+    with db.Session() as session:
+        if session.scalar(sa.select(sa.func.count(m.Movie.id))) != movies_count:
+            db.Model.metadata.drop_all(engine)
+            db.Model.metadata.create_all(engine)
+            path = str(tmp_path_factory.mktemp("catalogue"))
+            generate_catalogue(
+                path,
+                movies_count,
+                option("--catalogue-people"),
+                option("--catalogue-users"),
+                option("--catalogue-ratings"),
+                option("--catalogue-seed"),
+            )
+            load_catalogue(path)
+        else:
+            log(log.INFO, "Benchmark database has the catalogue of [%s] movies, reused", movies_count)
+
+        filters_cache.clear()
+        super_search_index.mark_stale()
+        translations.clear()
+        users_cache.clear()
+
+        owner = session.scalar(sa.select(m.User).where(m.User.role == s.UserRole.OWNER.value))
+        assert owner
+        # The least active user has movies left to rate
+        user_id = session.scalar(
+            sa.select(m.User.id)
+            .outerjoin(m.Rating, m.Rating.user_id == m.User.id)
+            .where(m.User.role == s.UserRole.USER.value)
+            .group_by(m.User.id)
+            .order_by(sa.func.count(m.Rating.id), m.User.id)
+            .limit(1)
+        )
+        rated_ids = sa.select(m.Rating.movie_id).where(m.Rating.user_id == user_id)
+        return dict(
+            owner_uuid=owner.uuid,
+            user_uuid=session.scalar(sa.select(m.User.uuid).where(m.User.id == user_id)),
+            movie_keys=session.scalars(sa.select(m.Movie.key).order_by(sa.func.random()).limit(100)).all(),
+            unrated_movie_keys=session.scalars(
+                sa.select(m.Movie.key).where(m.Movie.id.not_in(rated_ids)).order_by(m.Movie.id).limit(100)
+            ).all(),
+            genre_keys=session.scalars(sa.select(m.Genre.key)).all(),
+            keyword_keys=session.scalars(sa.select(m.Keyword.key)).all(),
+            title_words=[
+                title.split()[0].lower()
+                for title in session.scalars(
+                    sa.select(m.MovieTranslation.title)
+                    .where(m.MovieTranslation.language == s.Language.EN.value)
+                    .limit(100)
+                )
+            ],
+        )
+
+
+@pytest.fixture(scope="session")
+def client(catalogue: dict) -> Generator[TestClient, None, None]:
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,95 @@
+from itertools import cycle
+
+from fastapi import status
+from fastapi.testclient import TestClient
+
+from app import schema as s
+
+
+def test_get_movies(benchmark, client: TestClient, catalogue: dict):
+    response = benchmark(client.get, "/api/movies/", params={"size": 50, "user_uuid": catalogue["owner_uuid"]})
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_get_movie(benchmark, client: TestClient, catalogue: dict):
+    keys = cycle(catalogue["movie_keys"])
+    response = benchmark(lambda: client.get(f"/api/movies/{next(keys)}"))
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_super_search_movies(benchmark, client: TestClient, catalogue: dict):
+    genres = cycle(catalogue["genre_keys"])
+    keywords = cycle(catalogue["keyword_keys"])
+    response = benchmark(
+        lambda: client.get(
+            "/api/movies/super-search/",
+            params={"genre": [f"{next(genres)}(30,100)"], "keyword": [f"{next(keywords)}(1,100)"], "size": 50},
+        )
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_super_search_facets(benchmark, client: TestClient, catalogue: dict):
+    genres = cycle(catalogue["genre_keys"])
+    keywords = cycle(catalogue["keyword_keys"])
+    response = benchmark(
+        lambda: client.get(
+            "/api/movies/super-search/facets/",
+            params={"genre": [f"{next(genres)}(30,100)"], "keyword": [f"{next(keywords)}(1,100)"]},
+        )
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_search(benchmark, client: TestClient, catalogue: dict):
+    words = cycle(catalogue["title_words"])
+    response = benchmark(lambda: client.get("/api/movies/search/", params={"query": next(words)}))
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_get_similar_movies(benchmark, client: TestClient, catalogue: dict):
+    keys = cycle(catalogue["movie_keys"])
+    response = benchmark(lambda: client.get("/api/movies/similar/", params={"movie_key": next(keys)}))
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_get_movie_filters(benchmark, client: TestClient):
+    response = benchmark(client.get, "/api/movies/filters/")
+    assert response.status_code == status.HTTP_200_OK
+
+
+def rate_movie_data(user_uuid: str, movie_key: str, rating: float) -> dict:
+    return s.UserRateMovieIn(
+        uuid=user_uuid,
+        movie_key=movie_key,
+        rating=rating,
+        rating_criteria=s.RatingCriteria(
+            acting=2.5, plot_storyline=2.0, script_dialogue=2.0, music=1.4, enjoyment=1.0, production_design=0.4
+        ),
+    ).model_dump()
+
+
+def test_rate_movie(benchmark, client: TestClient, catalogue: dict):
+    """New ratings: every round rates another movie"""
+
+    user_uuid = catalogue["user_uuid"]
+    keys = iter(catalogue["unrated_movie_keys"])
+
+    def rate_movie():
+        return client.post(f"/api/users/rate-movie/{user_uuid}", json=rate_movie_data(user_uuid, next(keys), 7.5))
+
+    responses = []
+    benchmark.pedantic(lambda: responses.append(rate_movie()), rounds=len(catalogue["unrated_movie_keys"]) // 2)
+    assert {response.status_code for response in responses} == {status.HTTP_201_CREATED}
+
+
+def test_update_rate_movie(benchmark, client: TestClient, catalogue: dict):
+    owner_uuid = catalogue["owner_uuid"]
+    keys = cycle(catalogue["movie_keys"])
+    ratings = cycle([6.5, 8.5])
+    response = benchmark(
+        lambda: client.put(
+            f"/api/users/rate-movie/{owner_uuid}", json=rate_movie_data(owner_uuid, next(keys), next(ratings))
+        )
+    )
+    assert response.status_code == status.HTTP_200_OK
@@ -1,5 +1,6 @@
 import os
 from functools import lru_cache
+from typing import Literal
 import tomllib
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -63,9 +64,49 @@ class BaseConfig(BaseSettings):
     AWS_S3_BUCKET_URL: str
 
     TEST_DATA_PATH: str = "./test_api/test_data/"
+    # Directory of the JSON seed files read by the `*_from_json_file` commands
+    JSON_DATA_PATH: str = "./data/"
+
+    # Posters and avatars outside production (production keeps them in the S3 bucket)
+    IMAGES_DIRECTORY: str = "./uploads/"
+    # Background threads generating resized image variants
+    IMAGE_WORKERS: int = 2
 
     UNIQUE_CRITERION_KEY: str = "impact"
 
+    # Seconds the cached movie filters payload is served before it is rebuilt
+    FILTERS_CACHE_TTL: int = 300
+
+    # Seconds before the translation maps are fully reloaded (picks up changes made by other processes)
+    TRANSLATIONS_CACHE_TTL: int = 600
+
+    # Seconds a user identity (uuid -> id, role, language) is served without a query, and how many are kept
+    USERS_CACHE_TTL: int = 60
+    USERS_CACHE_SIZE: int = 10000
+
+    # Super search backend: "sql" (EXISTS subqueries) or "memory" (process-local inverted index).
+    # The facets route uses the index with both backends. Every worker keeps its own index: a bitmap
+    # per filter item and the item keys of every movie, roughly tens of MB for 100k movies.
+    SUPER_SEARCH_BACKEND: Literal["sql", "memory"] = "sql"
+    # Seconds before the in-memory super search index is rebuilt
+    SUPER_SEARCH_INDEX_TTL: int = 600
+
+    # Asyncio database URL (like postgresql+asyncpg://...) for async read routes.
+    # Needs the async driver installed; when empty, async routes run queries in the threadpool.
+    ASYNC_DATABASE_URL: str | None = None
+
+    # Heavy list endpoints return JSON serialized once from the built models, without
+    # the response_model validation (False falls back to the regular FastAPI serialization)
+    FAST_JSON_RESPONSES: bool = True
+    # Those responses are compressed (brotli if installed, gzip) from this size in bytes, 0 disables
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+
+    # Per-request SQL statement metrics (Server-Timing header and /metrics endpoint)
+    QUERY_METRICS_ENABLED: bool = False
+    # Requests above any of these thresholds are logged as warnings
+    QUERY_METRICS_MAX_STATEMENTS: int = 50
+    QUERY_METRICS_SLOW_REQUEST_MS: int = 1000
+
     @staticmethod
     def configure(app):
         # Implement this method to do further configuration on your app.
@@ -0,0 +1,70 @@
+"""25_translations_search_name
+
+Revision ID: 5d1f8c3a9e27
+Revises: b098f992f9ff
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d1f8c3a9e27'
+down_revision = 'b098f992f9ff'
+branch_labels = None
+depends_on = None
+
+
+# Table -> columns joined into search_name
+SEARCH_TABLES = {
+    'movie_translations': ('title',),
+    'actor_translations': ('first_name', 'last_name'),
+    'director_translations': ('first_name', 'last_name'),
+    'character_translations': ('name',),
+}
+
+
+def normalize_search_text(text):
+    # Same as app.models.mixins.normalize_search_text at the time of the migration
+    return re.sub(r"[^a-zA-Zа-яА-Я0-9 ]", "", text.lower())
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    for table_name, columns in SEARCH_TABLES.items():
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('search_name', sa.String(length=255), server_default='', nullable=False))
+
+        # Fill with the same normalization as the models use on write
+        table = sa.table(table_name, sa.column('id'), sa.column('search_name'), *[sa.column(c) for c in columns])
+        rows = [
+            dict(row_id=row.id, search_name=normalize_search_text(' '.join(getattr(row, c) or '' for c in columns)))
+            for row in bind.execute(sa.select(table))
+        ]
+        if rows:
+            bind.execute(
+                table.update().where(table.c.id == sa.bindparam('row_id')).values(search_name=sa.bindparam('search_name')),
+                rows,
+            )
+
+        op.create_index(
+            f'ix_{table_name}_search_name_trgm',
+            table_name,
+            ['search_name'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'search_name': 'gin_trgm_ops'},
+        )
+
+
+def downgrade():
+    for table_name in reversed(list(SEARCH_TABLES)):
+        op.drop_index(f'ix_{table_name}_search_name_trgm', table_name=table_name)
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_column('search_name')
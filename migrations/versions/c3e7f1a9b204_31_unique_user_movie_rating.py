@@ -0,0 +1,177 @@
+"""31_unique_user_movie_rating
+
+Revision ID: c3e7f1a9b204
+Revises: a9d4e6b2c815
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3e7f1a9b204'
+down_revision = 'a9d4e6b2c815'
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger('alembic.env')
+
+# Same as api.controllers.movie_rating and api.controllers.user_stats at the time of the migration
+BASE_CRITERIA = ('acting', 'plot_storyline', 'script_dialogue', 'music', 'enjoyment', 'production_design')
+# Counted only for movies with the rating criterion of the same name
+OPTIONAL_CRITERIA = ('visual_effects', 'scare_factor', 'humor', 'animation_cartoon')
+RATING_FIELDS = ('rating', *BASE_CRITERIA, *OPTIONAL_CRITERIA)
+USER_TOP_MOVIES_COUNT = 3
+
+ratings = sa.table(
+    'ratings',
+    sa.column('id'),
+    sa.column('user_id'),
+    sa.column('movie_id'),
+    sa.column('created_at'),
+    sa.column('updated_at'),
+    *[sa.column(field) for field in RATING_FIELDS],
+)
+movies = sa.table(
+    'movies',
+    sa.column('id'),
+    sa.column('rating_criterion'),
+    sa.column('average_rating'),
+    sa.column('ratings_count'),
+    sa.column('average_by_criteria', sa.JSON),
+)
+user_stats = sa.table(
+    'user_stats',
+    sa.column('user_id'),
+    sa.column('ratings_count'),
+    sa.column('last_rated_at'),
+    sa.column('top_rated', sa.JSON),
+)
+
+
+def recalculate_movies(bind, movie_ids: list[int]):
+    """Rating aggregates of the movies from one grouped query, written with a bulk UPDATE"""
+
+    rows = []
+    for movie_id, rating_criterion, ratings_count, *averages in bind.execute(
+        sa.select(
+            ratings.c.movie_id,
+            movies.c.rating_criterion,
+            sa.func.count(ratings.c.id),
+            *[sa.func.avg(ratings.c[field]) for field in RATING_FIELDS],
+        )
+        .join(movies, movies.c.id == ratings.c.movie_id)
+        .where(ratings.c.movie_id.in_(movie_ids))
+        .group_by(ratings.c.movie_id, movies.c.rating_criterion)
+    ):
+        values = dict(zip(RATING_FIELDS, [round(average, 2) if average is not None else 0.0 for average in averages]))
+        rows.append(
+            dict(
+                b_id=movie_id,
+                b_average_rating=values['rating'],
+                b_ratings_count=ratings_count,
+                b_average_by_criteria={
+                    **{criterion: values[criterion] for criterion in BASE_CRITERIA},
+                    **{
+                        criterion: values[criterion] if rating_criterion == criterion else None
+                        for criterion in OPTIONAL_CRITERIA
+                    },
+                },
+            )
+        )
+    if rows:
+        bind.execute(
+            movies.update()
+            .where(movies.c.id == sa.bindparam('b_id'))
+            .values(
+                average_rating=sa.bindparam('b_average_rating'),
+                ratings_count=sa.bindparam('b_ratings_count'),
+                average_by_criteria=sa.bindparam('b_average_by_criteria', type_=sa.JSON),
+            ),
+            rows,
+        )
+
+
+def recalculate_users(bind, user_ids: list[int]):
+    """Ratings count, last rating date and top rated movies of the users with stats"""
+
+    user_ratings = ratings.alias('user_ratings')
+    last_rated_at = sa.case(
+        (user_ratings.c.updated_at > user_ratings.c.created_at, user_ratings.c.updated_at),
+        else_=user_ratings.c.created_at,
+    )
+    bind.execute(
+        user_stats.update()
+        .where(user_stats.c.user_id.in_(user_ids))
+        .values(
+            ratings_count=sa.select(sa.func.count(user_ratings.c.id))
+            .where(user_ratings.c.user_id == user_stats.c.user_id)
+            .scalar_subquery(),
+            last_rated_at=sa.select(sa.func.max(last_rated_at))
+            .where(user_ratings.c.user_id == user_stats.c.user_id)
+            .scalar_subquery(),
+        )
+    )
+
+    position = (
+        sa.func.row_number()
+        .over(partition_by=ratings.c.user_id, order_by=(ratings.c.rating.desc(), ratings.c.id))
+        .label('position')
+    )
+    ranked = (
+        sa.select(ratings.c.user_id, ratings.c.movie_id, ratings.c.rating, position)
+        .where(ratings.c.user_id.in_(user_ids))
+        .subquery()
+    )
+    top_rated = {user_id: [] for user_id in user_ids}
+    for user_id, movie_id, rating in bind.execute(
+        sa.select(ranked.c.user_id, ranked.c.movie_id, ranked.c.rating)
+        .where(ranked.c.position <= USER_TOP_MOVIES_COUNT)
+        .order_by(ranked.c.user_id, ranked.c.position)
+    ):
+        top_rated[user_id].append((movie_id, rating))
+    bind.execute(
+        user_stats.update()
+        .where(user_stats.c.user_id == sa.bindparam('b_user_id'))
+        .values(top_rated=sa.bindparam('b_top_rated', type_=sa.JSON)),
+        [dict(b_user_id=user_id, b_top_rated=top) for user_id, top in top_rated.items()],
+    )
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Keep the latest rating of a user for a movie
+    kept_ids = sa.select(sa.func.max(ratings.c.id)).group_by(ratings.c.user_id, ratings.c.movie_id)
+    duplicates = bind.execute(
+        sa.select(ratings.c.user_id, ratings.c.movie_id).where(ratings.c.id.not_in(kept_ids))
+    ).all()
+    if duplicates:
+        logger.info(
+            'Deleting %s duplicate ratings of %s (user, movie) pairs',
+            len(duplicates),
+            len(set(duplicates)),
+        )
+        bind.execute(ratings.delete().where(ratings.c.id.not_in(kept_ids)))
+        # Aggregates still count the deleted ratings
+        recalculate_movies(bind, sorted({movie_id for _, movie_id in duplicates}))
+        recalculate_users(bind, sorted({user_id for user_id, _ in duplicates}))
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_ratings_user_id_movie_id')
+        batch_op.create_index('ix_ratings_user_id_movie_id', ['user_id', 'movie_id'], unique=True)
+
+    # ### end Alembic commands ###
+
+
+def downgrade():
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('ratings', schema=None) as batch_op:
+        batch_op.drop_index('ix_ratings_user_id_movie_id')
+        batch_op.create_index('ix_ratings_user_id_movie_id', ['user_id', 'movie_id'], unique=False)
+
+    # ### end Alembic commands ###
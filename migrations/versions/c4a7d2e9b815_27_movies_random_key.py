@@ -0,0 +1,48 @@
+"""27_movies_random_key
+
+Revision ID: c4a7d2e9b815
+Revises: 8b2e4f6a1c93
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+import random
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a7d2e9b815'
+down_revision = '8b2e4f6a1c93'
+branch_labels = None
+depends_on = None
+
+
+# Same as app.models.movie.RANDOM_KEY_MODULUS at the time of the migration
+RANDOM_KEY_MODULUS = 2**31 - 1
+
+
+def upgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('random_key', sa.Integer(), server_default='0', nullable=False))
+
+    bind = op.get_bind()
+    movies = sa.table('movies', sa.column('id'), sa.column('random_key'))
+    rows = [
+        dict(movie_id=movie_id, random_key=random.randrange(RANDOM_KEY_MODULUS))
+        for movie_id in bind.scalars(sa.select(movies.c.id))
+    ]
+    if rows:
+        bind.execute(
+            movies.update().where(movies.c.id == sa.bindparam('movie_id')).values(random_key=sa.bindparam('random_key')),
+            rows,
+        )
+
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_movies_random_key'), ['random_key'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_movies_random_key'))
+        batch_op.drop_column('random_key')
@@ -0,0 +1,55 @@
+"""32_movies_similarity_norm
+
+Revision ID: d8f2b6e4a190
+Revises: c3e7f1a9b204
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+import math
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8f2b6e4a190'
+down_revision = 'c3e7f1a9b204'
+branch_labels = None
+depends_on = None
+
+
+# Same as api.controllers.similar_movies.FILTER_WEIGHTS at the time of the migration: table -> weight
+FILTER_WEIGHTS = {
+    'movie_genres': 1.0,
+    'movie_subgenres': 0.8,
+    'movie_specifications': 0.6,
+    'movie_keywords': 0.5,
+    'movie_action_times': 0.3,
+}
+
+
+def upgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('similarity_norm', sa.Float(), server_default='0', nullable=False))
+
+    bind = op.get_bind()
+    squares = {}
+    for table_name, weight in FILTER_WEIGHTS.items():
+        table = sa.table(table_name, sa.column('movie_id'), sa.column('percentage_match'))
+        for movie_id, percentage_match in bind.execute(sa.select(table.c.movie_id, table.c.percentage_match)):
+            if percentage_match:
+                movie_weight = weight * percentage_match / 100
+                squares.setdefault(movie_id, []).append(movie_weight * movie_weight)
+
+    movies = sa.table('movies', sa.column('id'), sa.column('similarity_norm'))
+    rows = [dict(movie_id=movie_id, norm=math.sqrt(math.fsum(values))) for movie_id, values in squares.items()]
+    if rows:
+        bind.execute(
+            movies.update().where(movies.c.id == sa.bindparam('movie_id')).values(similarity_norm=sa.bindparam('norm')),
+            rows,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.drop_column('similarity_norm')
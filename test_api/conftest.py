@@ -22,6 +22,11 @@ from fastapi.testclient import TestClient
 from sqlalchemy import orm, select
 
 from api import app
+from api.controllers import images
+from api.controllers.filters_cache import filters_cache
+from api.controllers.super_search_index import super_search_index
+from api.controllers.translations import translations
+from api.controllers.users_cache import users_cache
 from app import models as m
 from app import schema as s
 
@@ -76,6 +81,10 @@ def db() -> Generator[orm.Session, None, None]:
             yield session
 
         app.dependency_overrides[get_db] = override_get_db
+        filters_cache.clear()
+        super_search_index.mark_stale()
+        translations.clear()
+        users_cache.clear()
         yield session
 
         # Clean up
@@ -104,12 +113,17 @@ def register_sqlite_functions(dbapi_connection, connection_record):
 
 
 @pytest.fixture
-def client(db, monkeypatch) -> Generator[TestClient, None, None]:
+def client(db, monkeypatch, tmp_path) -> Generator[TestClient, None, None]:
     """Returns a non-authorized test client for the API"""
 
+    # Uploaded images go to a temporary directory
+    monkeypatch.setattr(images, "image_storage", images.LocalImageStorage(str(tmp_path)))
+
     with TestClient(app) as c:
         yield c
 
+    images.wait_for_image_variants()
+
 
 @pytest.fixture
 def auth_user_owner(
@@ -1,9 +1,14 @@
+import hashlib
+
+import boto3
 import sqlalchemy as sa
 import pytest
 
 from fastapi import status
 from fastapi.testclient import TestClient
+from moto import mock_aws
 from sqlalchemy.orm import Session
+from api.controllers import images
 from app import models as m
 
 from config import config
@@ -11,6 +16,11 @@ from config import config
 CFG = config()
 
 
+def get_content_name(file_path: str) -> str:
+    with open(file_path, "rb") as file:
+        return f"{hashlib.sha256(file.read()).hexdigest()[:32]}.png"
+
+
 @pytest.mark.skipif(not CFG.IS_API, reason="API is not enabled")
 def test_get_poster(client: TestClient, db: Session):
     movie: m.Movie | None = db.scalar(sa.select(m.Movie).where(m.Movie.id == 1))
@@ -20,15 +30,42 @@ def test_get_poster(client: TestClient, db: Session):
     test_file = "1_The Shawshank Redemption.png"
     poster_name = "The Shawshank Redemption.png"
     file_path = f"{UPLOAD_DIRECTORY}{test_file}"
+    content_name = get_content_name(file_path)
 
     files = {"file": (poster_name, open(file_path, "rb"))}
     response = client.post(f"/api/file/upload-poster/{movie.id}", files=files)
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"info": "Poster uploaded successfully"}
-    assert movie.poster == test_file
+    assert movie.poster == content_name
+
+    # Same content is stored once
+    files = {"file": ("copy.png", open(file_path, "rb"))}
+    response = client.post(f"/api/file/upload-poster/{movie.id}", files=files)
+    assert response.status_code == status.HTTP_200_OK
+    assert movie.poster == content_name
 
-    response = client.get(f"/api/file/posters/{test_file}")
+    response = client.get(f"/api/file/posters/{content_name}")
     assert response.status_code == status.HTTP_200_OK
+    assert response.headers["cache-control"] == images.IMMUTABLE_CACHE_CONTROL
+    with open(file_path, "rb") as file:
+        assert response.content == file.read()
+
+    images.wait_for_image_variants()
+    response = client.get(f"/api/file/posters/{content_name}", params={"variant": "card"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "image/webp"
+    assert response.headers["cache-control"] == images.IMMUTABLE_CACHE_CONTROL
+    assert len(response.content) < len(open(file_path, "rb").read())
+
+    response = client.get(
+        f"/api/file/posters/{content_name}",
+        params={"variant": "card"},
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+
+    response = client.get(f"/api/file/posters/{content_name}", params={"variant": "huge"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
 
 
 @pytest.mark.skipif(not CFG.IS_API, reason="API is not enabled")
@@ -45,9 +82,9 @@ def test_get_actors(client: TestClient, db: Session):
     response = client.post(f"/api/file/upload-actor-avatar/{actor.id}", files=files)
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"info": "Avatar uploaded successfully"}
-    assert actor.avatar == test_file
+    assert actor.avatar == get_content_name(file_path)
 
-    response = client.get(f"/api/file/actors/{test_file}")
+    response = client.get(f"/api/file/actors/{actor.avatar}")
     assert response.status_code == status.HTTP_200_OK
 
 
@@ -65,7 +102,31 @@ def test_get_director_avatar(client: TestClient, db: Session):
     response = client.post(f"/api/file/upload-director-avatar/{director.id}", files=files)
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"info": "Avatar uploaded successfully"}
-    assert director.avatar == test_file
+    assert director.avatar == get_content_name(file_path)
 
-    response = client.get(f"/api/file/directors/{test_file}")
+    response = client.get(f"/api/file/directors/{director.avatar}")
     assert response.status_code == status.HTTP_200_OK
+
+
+@mock_aws
+def test_s3_image_storage():
+    bucket_name = "test-images"
+    boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=bucket_name)
+    images.get_s3_connect.cache_clear()
+    storage = images.S3ImageStorage(bucket_name, f"https://{bucket_name}.s3.amazonaws.com")
+
+    file_path = f"{CFG.TEST_DATA_PATH}1_Morgan Freeman.png"
+    with open(file_path, "rb") as file:
+        original = file.read()
+    storage.save_bytes("actors/original.png", original, "image/png")
+    assert storage.exists("actors/original.png")
+    assert not storage.exists("actors/missing.png")
+
+    images.generate_image_variants(storage, "actors", "original.png")
+    variant_key = images.get_variant_key("actors", "original.png", "card")
+    assert storage.exists(variant_key)
+    assert len(storage.read(variant_key)) < len(original)
+
+    s3_object = boto3.client("s3", region_name="us-east-1").head_object(Bucket=bucket_name, Key=variant_key)
+    assert s3_object["CacheControl"] == images.IMMUTABLE_CACHE_CONTROL
+    images.get_s3_connect.cache_clear()
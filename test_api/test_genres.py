@@ -3,6 +3,7 @@ import sqlalchemy as sa
 from fastapi import status
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from api.controllers.translations import translations
 from app import models as m
 from app import schema as s
 
@@ -43,6 +44,33 @@ def test_get_subgenres(client: TestClient, db: Session, auth_user_owner: m.User)
     assert data.items
 
 
+def test_translations_changed_by_other_processes(db: Session, monkeypatch):
+    genre = db.scalars(sa.select(m.Genre)).first()
+    assert genre
+    genre_names = translations.get(db, "genre")
+
+    # Statements without ORM objects don't invalidate the maps, like changes made by another process
+    genre_id = db.execute(sa.insert(m.Genre).values(key="other-process-genre").returning(m.Genre.id)).scalar_one()
+    db.execute(
+        sa.insert(m.GenreTranslation).values(
+            genre_id=genre_id, language=s.Language.EN.value, name="Other process genre", description=""
+        )
+    )
+    db.execute(sa.update(m.GenreTranslation).where(m.GenreTranslation.genre_id == genre.id).values(name="Renamed"))
+    db.commit()
+    assert not genre_names.get_name(genre_id, s.Language.EN)
+
+    # Looked up ids missing in the map are loaded
+    assert translations.get(db, "genre", [genre.id, genre_id]) is genre_names
+    assert genre_names.get_name(genre_id, s.Language.EN) == "Other process genre"
+    assert genre_names.get_name(genre.id, s.Language.EN) != "Renamed"
+
+    # The whole map is reloaded after the TTL
+    monkeypatch.setattr(translations, "ttl", -1)
+    assert translations.get(db, "genre") is genre_names
+    assert genre_names.get_name(genre.id, s.Language.EN) == "Renamed"
+
+
 def test_create_genre(client: TestClient, db: Session, auth_user_owner: m.User):
     genres = db.scalars(sa.select(m.Genre)).all()
     assert genres
@@ -51,6 +79,7 @@ def test_create_genre(client: TestClient, db: Session, auth_user_owner: m.User):
 
     genre = db.scalar(sa.select(m.Genre).where(m.Genre.key == NEW_GENRE_KEY))
     assert not genre
+    genre_names = translations.get(db, "genre")
 
     form_data = s.GenreFormIn(
         key=NEW_GENRE_KEY,
@@ -73,6 +102,9 @@ def test_create_genre(client: TestClient, db: Session, auth_user_owner: m.User):
     # Test update genre item
     genre = db.scalar(sa.select(m.Genre).where(m.Genre.key == NEW_GENRE_KEY))
     assert genre
+    # New genre is added to the loaded translations
+    assert translations.get(db, "genre") is genre_names
+    assert genre_names.get_name(genre.id, s.Language.EN) == form_data.name_en
 
     update_form_data = s.GenreFormFieldsWithUUID(
         uuid=genre.uuid,
@@ -89,6 +121,7 @@ def test_create_genre(client: TestClient, db: Session, auth_user_owner: m.User):
     )
     assert response.status_code == status.HTTP_204_NO_CONTENT
     assert genre.key == update_form_data.key
+    assert translations.get(db, "genre").get_name(genre.id, s.Language.UK) == update_form_data.name_uk
 
     # Test get genre fields for form
     response = client.get(
@@ -1,11 +1,25 @@
+import base64
+import json
+from typing import Any
+
+import pytest
+
 import sqlalchemy as sa
 from fastapi import status
 from fastapi.testclient import TestClient
+from sqlalchemy import orm
 from sqlalchemy.orm import Session
-from api.controllers.create_movie import get_movies_data_from_file, remove_quick_movie
+from api.controllers.quick_movies import count_quick_movies, get_quick_movie, remove_quick_movie
+from api.controllers.movie_batch import MOVIE_BATCH_LIMIT
+from api.controllers.similar_movies import refresh_similar_movies
+from api.controllers import super_search_index as super_search_index_module
+from api.controllers.super_search_index import from_bitmap, super_search_index, to_bitmap
+import app.database
 from app import models as m
+from app.models.mixins import SearchableMixin
 from app import schema as s
 from config import config
+from test_api.utils import count_queries
 
 CFG = config()
 
@@ -36,6 +50,22 @@ def test_get_movies(client: TestClient, db: Session, auth_user_owner: m.User):
     assert data.items
 
 
+def test_get_movies_translations(client: TestClient, db: Session):
+    movie = db.scalar(sa.select(m.Movie).order_by(m.Movie.id))
+    assert movie
+
+    response = client.get("/api/movies/", params={"lang": s.Language.EN.value})
+    assert response.status_code == status.HTTP_200_OK
+
+    # Titles and genre names come from the loaded translations
+    with count_queries(db) as statements:
+        response = client.get("/api/movies/", params={"lang": s.Language.EN.value})
+    assert response.status_code == status.HTTP_200_OK
+    assert not [statement for statement in statements if "_translations" in statement]
+    data = s.PaginationDataOut.model_validate(response.json())
+    assert movie.get_title(s.Language.EN) in [item.title for item in data.items]
+
+
 def test_get_movie(client: TestClient, db: Session, auth_simple_user: m.User, auth_user_owner: m.User):
     movie = db.scalar(sa.select(m.Movie))
     assert movie
@@ -62,6 +92,75 @@ def test_get_movie(client: TestClient, db: Session, auth_simple_user: m.User, au
     assert owner_data.key == movie.key
 
 
+# Movie select, owner lookup, filter matches (UNION) and one query per eager-loaded relationship.
+# Only movies in a collection or shared universe need a few extra ones.
+MOVIE_DETAIL_MAX_QUERIES = 40
+
+
+def test_get_movie_query_count(client: TestClient, db: Session):
+    movies = db.scalars(sa.select(m.Movie)).all()
+    assert movies
+
+    queries_counts = []
+    for movie in movies:
+        db.expunge_all()
+        with count_queries(db) as statements:
+            response = client.get(f"/api/movies/{movie.key}")
+        assert response.status_code == status.HTTP_200_OK
+        queries_counts.append(len(statements))
+
+    # Doesn't depend on cast and filters size
+    assert max(queries_counts) <= MOVIE_DETAIL_MAX_QUERIES
+
+
+def test_get_movies_batch(client: TestClient, db: Session, auth_simple_user: m.User):
+    movies = db.scalars(sa.select(m.Movie).order_by(m.Movie.id.desc())).all()
+    assert len(movies) > 2
+    keys = [movie.key for movie in movies]
+
+    response = client.get("/api/movies/batch/", params={"keys": keys[:2] + ["unknown-movie"]})
+    assert response.status_code == status.HTTP_200_OK
+    data = s.MovieBatchOut.model_validate(response.json())
+    assert [item.key for item in data.items] == keys[:2]
+    assert isinstance(data.items[0], s.MoviePreviewOut)
+    assert data.not_found == ["unknown-movie"]
+
+    # Full projection has the same data as the movie page
+    response = client.get(
+        "/api/movies/batch/", params={"keys": keys[:2], "projection": "full", "user_uuid": auth_simple_user.uuid}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = s.MovieBatchOut.model_validate(response.json())
+    assert [item.key for item in data.items] == keys[:2]
+    movie_response = client.get(f"/api/movies/{keys[0]}", params={"user_uuid": auth_simple_user.uuid})
+    assert response.json()["items"][0] == movie_response.json()
+
+    # The number of queries doesn't grow with the batch size
+    queries_counts = {}
+    for size in (1, len(keys)):
+        db.expunge_all()
+        with count_queries(db) as statements:
+            response = client.get("/api/movies/batch/", params={"keys": keys[:size], "projection": "full"})
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.json()["items"]) == size
+        queries_counts[size] = len(statements)
+    assert queries_counts[len(keys)] <= MOVIE_DETAIL_MAX_QUERIES
+
+    # A movie without the owner rating is reported in not_found instead of failing the batch
+    owner = db.scalar(sa.select(m.User).where(m.User.role == s.UserRole.OWNER.value))
+    assert owner
+    db.execute(sa.delete(m.Rating).where(m.Rating.movie_id == movies[1].id, m.Rating.user_id == owner.id))
+    db.commit()
+    response = client.get("/api/movies/batch/", params={"keys": keys[:3] + ["unknown-movie"], "projection": "full"})
+    assert response.status_code == status.HTTP_200_OK
+    data = s.MovieBatchOut.model_validate(response.json())
+    assert [item.key for item in data.items] == [keys[0], keys[2]]
+    assert data.not_found == [keys[1], "unknown-movie"]
+
+    response = client.get("/api/movies/batch/", params={"keys": [f"movie-{i}" for i in range(MOVIE_BATCH_LIMIT + 1)]})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
 def test_super_search(client: TestClient, db: Session):
     movies = db.scalars(sa.select(m.Movie)).all()
     assert movies
@@ -116,6 +215,126 @@ def test_super_search(client: TestClient, db: Session):
     assert [m for m in data.items if m.key == movie.key]
 
 
+def test_super_search_memory_backend(client: TestClient, db: Session, monkeypatch):
+    movie = db.scalar(sa.select(m.Movie).where(m.Movie.key == "the-shawshank-redemption"))
+    assert movie
+    shared_universe = db.scalar(sa.select(m.SharedUniverse))
+    assert shared_universe
+
+    SEARCH_PARAMS: list[dict[str, Any]] = [
+        {"genre": "action(10,100)"},
+        {"genre": ["drama(10,100)", "crime(50,100)"], "inner_exact_match": True},
+        {"genre": ["drama(10,100)", "crime(50,100)"], "subgenre": "psychological-drama(0,100)"},
+        {
+            "genre": "drama(10,100)",
+            "specification": "prison(10,100)",
+            "actor": "morgan-freeman",
+            "director": "frank-darabont",
+            "exact_match": True,
+        },
+        {"actor": ["morgan-freeman", "unknown-actor"], "keyword": "cool-antagonist(0,100)"},
+        {"shared_universe": shared_universe.key, "action_time": "present(20,80)"},
+        {"visual_profile": [movie.visual_profiles[0].category.key, "unknown-category"]},
+        {"character": "unknown-character"},
+        {},
+    ]
+
+    for params in SEARCH_PARAMS:
+        params = {**params, "sort_by": s.SortBy.ID.value, "sort_order": s.SortOrder.ASC.value, "size": 100}
+
+        monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "sql")
+        response = client.get("/api/movies/super-search/", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        sql_data = s.PaginationDataOut.model_validate(response.json())
+
+        monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "memory")
+        response = client.get("/api/movies/super-search/", params=params)
+        assert response.status_code == status.HTTP_200_OK
+        memory_data = s.PaginationDataOut.model_validate(response.json())
+
+        assert memory_data.total == sql_data.total
+        assert [m.key for m in memory_data.items] == [m.key for m in sql_data.items]
+
+    # Only the requested page is returned
+    response = client.get(
+        "/api/movies/super-search/",
+        params={"genre": "drama(0,100)", "sort_by": s.SortBy.RATING.value, "page": 2, "size": 5},
+    )
+    assert response.status_code == status.HTTP_200_OK
+    data = s.PaginationDataOut.model_validate(response.json())
+    assert len(data.items) <= 5
+    assert data.page == 2
+
+
+def test_cursor_pagination(client: TestClient, db: Session, auth_user_owner: m.User, monkeypatch):
+    total = db.scalar(sa.select(sa.func.count()).select_from(m.Movie))
+    rated_total = db.scalar(sa.select(sa.func.count()).where(m.Rating.user_id == auth_user_owner.id))
+
+    def get_all_keys(url: str, **params) -> list[str]:
+        keys = []
+        cursor = None
+        while True:
+            response = client.get(url, params={**params, "pagination": "cursor", "cursor": cursor, "size": 7})
+            assert response.status_code == status.HTTP_200_OK
+            data = s.CursorPaginationDataOut.model_validate(response.json())
+            keys += [movie.key for movie in data.items]
+            if not data.next_cursor:
+                return keys
+            cursor = data.next_cursor
+
+    for sort_by in s.SortBy:
+        for sort_order in s.SortOrder:
+            sort = dict(sort_by=sort_by.value, sort_order=sort_order.value, seed=42)
+
+            keys = get_all_keys("/api/movies/", **sort)
+            assert len(keys) == len(set(keys)) == total
+
+            user_keys = get_all_keys("/api/movies/", **sort, user_uuid=auth_user_owner.uuid)
+            assert len(user_keys) == len(set(user_keys)) == rated_total
+
+            monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "sql")
+            sql_keys = get_all_keys("/api/movies/super-search/", **sort)
+            monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "memory")
+            memory_keys = get_all_keys("/api/movies/super-search/", **sort)
+            assert keys == sql_keys == memory_keys
+
+    # Total is counted only on request
+    response = client.get("/api/movies/", params={"pagination": "cursor", "size": 5, "with_total": True})
+    assert response.status_code == status.HTTP_200_OK
+    assert s.CursorPaginationDataOut.model_validate(response.json()).total == total
+
+    # Cursor of another sort
+    cursor = s.CursorPaginationDataOut.model_validate(response.json()).next_cursor
+    response = client.get(
+        "/api/movies/", params={"pagination": "cursor", "cursor": cursor, "sort_by": s.SortBy.RATING.value}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    response = client.get("/api/movies/", params={"pagination": "cursor", "cursor": "broken"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    # Decodable cursors with values of wrong types
+    monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "memory")
+    for url, sort_by, data in (
+        ("/api/movies/", s.SortBy.ID, {"s": "id:desc", "v": ["x"], "r": None}),
+        ("/api/movies/super-search/", s.SortBy.ID, {"s": "id:desc", "v": ["x"], "r": None}),
+        ("/api/movies/super-search/", s.SortBy.ID, {"s": "id:desc", "v": [True], "r": None}),
+        ("/api/movies/super-search/", s.SortBy.RATING, {"s": "rating:desc", "v": [{"a": 1}, 1], "r": None}),
+        ("/api/movies/super-search/", s.SortBy.RANDOM, {"s": "random:desc", "v": [0, 1, 1], "r": "x"}),
+    ):
+        cursor = base64.urlsafe_b64encode(json.dumps(data).encode()).decode()
+        response = client.get(url, params={"pagination": "cursor", "cursor": cursor, "sort_by": sort_by.value})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, data
+
+    # NULL release date where a date is expected is ordered after dates, not compared with them
+    cursor_data = {"s": "release_date:desc", "v": [0, None, 1], "r": None}
+    cursor = base64.urlsafe_b64encode(json.dumps(cursor_data).encode()).decode()
+    response = client.get(
+        "/api/movies/super-search/",
+        params={"pagination": "cursor", "cursor": cursor, "sort_by": s.SortBy.RELEASE_DATE.value},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
 def test_search(client: TestClient, db: Session):
     movie = db.scalar(sa.select(m.Movie))
     assert movie
@@ -127,9 +346,51 @@ def test_search(client: TestClient, db: Session):
     data = s.SearchResults.model_validate(response.json())
     assert data
     assert [m for m in data.results if m.key == movie.key]
+    # Exact match goes first
+    assert data.results[0].key == movie.key
+
+    # Search name follows title updates
+    translation = next(t for t in movie.translations if t.language == s.Language.EN.value)
+    translation.title = "Zootopia: The Last Train!"
+    db.commit()
+    assert translation.search_name == "zootopia the last train"
+
+    response = client.get("/api/movies/search/", params={"query": "LAST tr"})
+    assert response.status_code == status.HTTP_200_OK
+    data = s.SearchResults.model_validate(response.json())
+    assert [m.key for m in data.results] == [movie.key]
+
+    # ORM UPDATE statements, bulk by primary key and with criteria, skip the flush hook
+    db.execute(sa.update(m.MovieTranslation), [dict(id=translation.id, title="Bulk: Title")])
+    db.commit()
+    assert translation.search_name == "bulk title"
+    db.execute(
+        sa.update(m.MovieTranslation).where(m.MovieTranslation.id == translation.id).values(title="Criteria Title!")
+    )
+    db.commit()
+    assert translation.search_name == "criteria title"
+
+
+def test_searchable_table_args():
+    # Like db.Model, mapped by the metaclass after __init_subclass__
+    Base: Any = orm.declarative_base()
+
+    class Translation(Base, SearchableMixin):
+        __tablename__ = "test_translations"
+        __search_fields__ = ("name",)
+        __table_args__ = (sa.UniqueConstraint("name"), {"comment": "Translations"})
+
+        id: orm.Mapped[int] = orm.mapped_column(primary_key=True)
+        name: orm.Mapped[str] = orm.mapped_column(sa.String(64))
+
+    table = Translation.__table__
+    assert isinstance(table, sa.Table)
+    assert [index.name for index in table.indexes] == ["ix_test_translations_search_name_trgm"]
+    assert any(isinstance(constraint, sa.UniqueConstraint) for constraint in table.constraints)
+    assert table.comment == "Translations"
 
 
-def test_get_movie_filters(client: TestClient, db: Session):
+def test_get_movie_filters(client: TestClient, db: Session, auth_user_owner: m.User):
     response = client.get("/api/movies/filters/")
     assert response.status_code == status.HTTP_200_OK
     data = s.MovieFiltersListOut.model_validate(response.json())
@@ -144,6 +405,71 @@ def test_get_movie_filters(client: TestClient, db: Session):
     assert data.shared_universes
     assert data.visual_profile_categories
 
+    # Cached payload is revalidated with ETag
+    etag = response.headers["etag"]
+    assert etag
+    response = client.get("/api/movies/filters/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert not response.content
+
+    # Each encoding has its own ETag
+    response = client.get("/api/movies/filters/", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+
+    response = client.get("/api/movies/filters/", params={"lang": s.Language.EN.value}, headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+
+    # Creating a filter item invalidates the cache
+    response = client.post(
+        "/api/filters/keywords/",
+        json=s.MovieFilterFormIn(
+            key="test_keyword",
+            name_uk="Тестове ключове слово",
+            name_en="Test keyword",
+            description_uk="Тестовий опис",
+            description_en="Test description",
+        ).model_dump(),
+        params={"user_uuid": auth_user_owner.uuid},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    response = client.get("/api/movies/filters/", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["etag"] != etag
+    data = s.MovieFiltersListOut.model_validate(response.json())
+    assert [keyword for keyword in data.keywords if keyword.key == "test_keyword"]
+
+
+def test_fast_json_responses(client: TestClient, auth_user_owner: m.User, monkeypatch):
+    """Heavy list endpoints return the same JSON as the response_model serialization, compressed"""
+
+    for url in ("/api/movies/", "/api/movies/super-search/", "/api/movies/filters/"):
+        response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+
+        monkeypatch.setattr(CFG, "FAST_JSON_RESPONSES", False)
+        assert client.get(url).json() == response.json()
+        monkeypatch.setattr(CFG, "FAST_JSON_RESPONSES", True)
+
+        for accept_encoding in ("identity", "gzip;q=0", "gzip; q=0.0, br;q=0", "gzip;q=oops"):
+            response = client.get(url, headers={"Accept-Encoding": accept_encoding})
+            assert "content-encoding" not in response.headers
+        response = client.get(url, headers={"Accept-Encoding": "gzip;q=0.5"})
+        assert response.headers["content-encoding"] == "gzip"
+
+    response = client.get("/api/movies/pre-create/", params={"user_uuid": auth_user_owner.uuid})
+    assert response.status_code == status.HTTP_200_OK
+    assert s.MoviePreCreateData.model_validate(response.json())
+
+    # Small payloads are not compressed
+    monkeypatch.setattr(CFG, "RESPONSE_COMPRESSION_MIN_SIZE", 10**9)
+    response = client.get("/api/movies/")
+    assert "content-encoding" not in response.headers
+
 
 def test_pre_create_movie_data(client: TestClient, auth_user_owner: m.User, auth_simple_user: m.User):
     """Should return all data needed for movie creation"""
@@ -283,6 +609,36 @@ def test_create_movie(client: TestClient, db: Session, auth_user_owner: m.User,
     assert new_movie
     assert new_movie.ratings
     assert new_movie.visual_profiles
+    assert [actor.key for actor in new_movie.actors] == [actor.key]
+    assert new_movie.characters
+    assert (
+        db.scalar(sa.select(m.movie_subgenres.c.percentage_match).where(m.movie_subgenres.c.movie_id == new_movie.id))
+        == 80
+    )
+    assert (
+        db.scalar(sa.select(m.movie_keywords.c.percentage_match).where(m.movie_keywords.c.movie_id == new_movie.id))
+        == 50
+    )
+
+    # Test create with unknown filter key - should fail with the key in the error
+    unknown_form_data = form_data.model_copy(
+        update={
+            "key": "test-create-unknown-keyword",
+            "keywords": [
+                s.MovieFilterField(key="unknown-keyword", percentage_match=50, name="Test name", subgenre_parent_key="")
+            ],
+        }
+    )
+    with open(poster_path, "rb") as image:
+        response = client.post(
+            "/api/movies",
+            data={"form_data": unknown_form_data.model_dump_json()},
+            files={"file": (poster_name, image, "image/png")},
+            params={"lang": s.Language.EN.value, "user_uuid": auth_user_owner.uuid},
+        )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Keyword [unknown-keyword] not found" in response.json()["detail"]
+    assert not db.scalar(sa.select(m.Movie).where(m.Movie.key == unknown_form_data.key))
 
     # Test create with existing key - should fail
     with open(poster_path, "rb") as image:
@@ -308,7 +664,7 @@ def test_create_movie(client: TestClient, db: Session, auth_user_owner: m.User,
     assert response.status_code == status.HTTP_403_FORBIDDEN
 
 
-def test_quick_movies(client: TestClient, auth_user_owner: m.User, auth_simple_user: m.User):
+def test_quick_movies(client: TestClient, db: Session, auth_user_owner: m.User, auth_simple_user: m.User):
     form_data = s.QuickMovieFormData(
         key="test-quick-add-key",
         title_en="Test quick EN",
@@ -328,26 +684,35 @@ def test_quick_movies(client: TestClient, auth_user_owner: m.User, auth_simple_u
         ),
     )
 
-    initial_movie_data = get_movies_data_from_file()
+    initial_count = count_quick_movies(db)
 
     response = client.post(
         "/api/movies/quick-add/", json=form_data.model_dump(), params={"user_uuid": auth_user_owner.uuid}
     )
     assert response.status_code == status.HTTP_201_CREATED
+    assert count_quick_movies(db) == initial_count + 1
+    assert get_quick_movie(db, form_data.key) == form_data
 
-    updated_movie_data = get_movies_data_from_file()
-    assert len(initial_movie_data) + 1 == len(updated_movie_data)
+    response = client.get("/api/movies/movies-to-add/", params={"user_uuid": auth_user_owner.uuid})
+    assert response.status_code == status.HTTP_200_OK
+    quick_movies = s.QuickMovieList.model_validate(response.json()).quick_movies
+    assert quick_movies[0].key == form_data.key
 
-    # Test quick add with existing (in file) key
+    response = client.get(
+        "/api/movies/pre-create/", params={"quick_movie_key": form_data.key, "user_uuid": auth_user_owner.uuid}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert s.MoviePreCreateData.model_validate(response.json()).quick_movie == form_data
+
+    # Test quick add with existing key
     response = client.post(
         "/api/movies/quick-add/", json=form_data.model_dump(), params={"user_uuid": auth_user_owner.uuid}
     )
     assert response.status_code == status.HTTP_400_BAD_REQUEST
 
-    remove_quick_movie(form_data.key)
-
-    current_movies = get_movies_data_from_file()
-    assert len(initial_movie_data) == len(current_movies)
+    remove_quick_movie(db, form_data.key)
+    db.commit()
+    assert count_quick_movies(db) == initial_count
 
     # Test quick add with simple user - should fail
     response = client.post(
@@ -363,6 +728,68 @@ def test_get_random_movies(client: TestClient):
     data = s.MovieCarouselList.model_validate(response.json())
     assert data
     assert len(data.movies) == 10
+    assert len({movie.key for movie in data.movies}) == 10
+
+
+def test_seeded_random_order(client: TestClient, db: Session, monkeypatch):
+    total = db.scalars(sa.select(sa.func.count()).select_from(m.Movie)).one()
+
+    def get_pages(url: str, seed: int, size: int = 10) -> list[list[str]]:
+        pages = []
+        params: dict[str, str | int] = {
+            "sort_by": s.SortBy.RANDOM.value,
+            "seed": seed,
+            "size": size,
+            "pagination": s.PaginationMode.CURSOR.value,
+        }
+        while True:
+            with count_queries(db) as statements:
+                response = client.get(url, params=params)
+            assert response.status_code == status.HTTP_200_OK
+            # Pages are read by keyset, without counting movies before or after the pivot
+            assert not any("count(*)" in statement for statement in statements)
+            data = s.CursorPaginationDataOut.model_validate(response.json())
+            assert data.total is None
+            pages.append([movie.key for movie in data.items])
+            if not data.next_cursor:
+                return pages
+            params["cursor"] = data.next_cursor
+
+    # Random pages are stable for the same seed and don't overlap
+    pages = get_pages("/api/movies/", 42)
+    assert pages == get_pages("/api/movies/", 42)
+    keys = [key for page in pages for key in page]
+    assert len(keys) == len(set(keys)) == total
+    assert get_pages("/api/movies/", 7, total) != [keys]
+
+    # Total is counted only on request
+    response = client.get(
+        "/api/movies/",
+        params={
+            "sort_by": s.SortBy.RANDOM.value,
+            "seed": 42,
+            "with_total": True,
+            "pagination": s.PaginationMode.CURSOR.value,
+        },
+    )
+    assert s.CursorPaginationDataOut.model_validate(response.json()).total == total
+
+    # Offset pages follow the same seeded order
+    for url in ("/api/movies/", "/api/movies/super-search/"):
+        offset_keys = []
+        for page in range(1, total // 10 + 2):
+            response = client.get(url, params={"sort_by": s.SortBy.RANDOM.value, "seed": 42, "page": page, "size": 10})
+            assert response.status_code == status.HTTP_200_OK
+            data = s.PaginationDataOut.model_validate(response.json())
+            assert data.page == page
+            offset_keys += [movie.key for movie in data.items]
+        assert offset_keys == keys
+
+    # SQL and in-memory super search give the same random order
+    monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "sql")
+    sql_pages = get_pages("/api/movies/super-search/", 42, total)
+    monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "memory")
+    assert get_pages("/api/movies/super-search/", 42, total) == sql_pages == [keys]
 
 
 def test_get_similar_movies(client: TestClient, db: Session):
@@ -374,6 +801,191 @@ def test_get_similar_movies(client: TestClient, db: Session):
     data = s.SimilarMovieOutList.model_validate(response.json())
     assert data
     assert data.similar_movies
+    related_keys = {related.key for related in movie.related_movies_collection}
+    assert not [similar for similar in data.similar_movies if similar.key in related_keys]
+
+
+def test_refresh_similar_movies(client: TestClient, db: Session, auth_user_owner: m.User):
+    movie = db.scalar(sa.select(m.Movie).where(m.Movie.key == "shrek"))
+    assert movie
+    keyword = db.scalar(sa.select(m.Keyword).where(m.Keyword.id.not_in([k.id for k in movie.keywords])))
+    assert keyword
+    other_movies = db.scalars(sa.select(m.Movie).where(m.Movie.id != movie.id).order_by(m.Movie.id).limit(3)).all()
+
+    def get_rows() -> set:
+        return set(db.execute(sa.select(m.similar_movies)).tuples())
+
+    # Changes of movie tags through the API (incremental refresh)
+    edits = [
+        (movie, [(k.key, 50.0) for k in movie.keywords] + [(keyword.key, 100.0)]),
+        # Another movie becomes close to the first one and enters lists
+        (other_movies[0], [(k.key, 50.0) for k in movie.keywords] + [(keyword.key, 100.0)]),
+        # And leaves them
+        (other_movies[0], [(keyword.key, 1.0)]),
+        (other_movies[1], [(keyword.key, 100.0)]),
+        (other_movies[2], [(k.key, 100.0) for k in movie.keywords[:1]]),
+    ]
+    for edited_movie, keywords in edits:
+        with count_queries(db) as statements:
+            response = client.put(
+                "/api/movies/keywords/",
+                json={
+                    "movie_key": edited_movie.key,
+                    "items": [
+                        {"key": key, "name": key, "percentage_match": percentage} for key, percentage in keywords
+                    ],
+                },
+                params={"user_uuid": auth_user_owner.uuid},
+            )
+        assert response.status_code == status.HTTP_200_OK
+        # Tags are read only for the changed movie and by tag, never for the whole catalogue
+        tag_reads = [statement for statement in statements if "FROM movie_genres" in statement]
+        assert tag_reads and all("WHERE" in statement for statement in tag_reads)
+
+        incremental_rows = get_rows()
+        assert incremental_rows
+        refresh_similar_movies(db)
+        db.commit()
+        assert get_rows() == incremental_rows
+
+
+def test_super_search_facets(client: TestClient, db: Session, monkeypatch):
+    # Sparse and dense ids are packed and unpacked in order
+    for movie_ids in ([3, 700, 100000], list(range(1, 1000, 3))):
+        assert from_bitmap(to_bitmap(movie_ids)) == movie_ids
+
+    # Facets are counted on the in-memory index with the SQL search backend too
+    response = client.get("/api/movies/super-search/facets/", params={"genre": ["drama(10,100)"]})
+    assert response.status_code == status.HTTP_200_OK
+    assert s.SuperSearchFacetsOut.model_validate(response.json()).total
+
+    monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "memory")
+    movie = db.scalar(sa.select(m.Movie).where(m.Movie.key == "the-shawshank-redemption"))
+    assert movie
+
+    SELECTIONS: list[dict[str, Any]] = [
+        {},
+        {"genre": ["drama(10,100)"]},
+        {"genre": ["drama(10,100)", "crime(50,100)"], "inner_exact_match": True},
+        {"genre": ["drama(10,100)"], "actor": ["morgan-freeman"], "exact_match": True},
+        {"genre": ["drama(10,100)", "crime(50,100)"], "keyword": ["cool-antagonist(0,100)"], "exact_match": True},
+        {"visual_profile": [movie.visual_profiles[0].category.key], "director": ["frank-darabont", "unknown"]},
+    ]
+
+    # Items counted with bitmaps, and with Counter over the movies
+    for bitmap_cost_associations in (10**9, 0):
+        monkeypatch.setattr(super_search_index_module, "BITMAP_COST_ASSOCIATIONS", bitmap_cost_associations)
+        super_search_index.mark_stale()
+
+        for selection in SELECTIONS:
+            response = client.get("/api/movies/super-search/facets/", params=selection)
+            assert response.status_code == status.HTTP_200_OK
+            data = s.SuperSearchFacetsOut.model_validate(response.json())
+
+            response = client.get("/api/movies/super-search/", params={**selection, "size": 1})
+            assert response.status_code == status.HTTP_200_OK
+            assert data.total == s.PaginationDataOut.model_validate(response.json()).total
+
+            # Every count is the number of movies found with the item added to the selection
+            index = super_search_index.get(db)
+            exact_match = selection.get("exact_match", False)
+            inner_exact_match = selection.get("inner_exact_match", False)
+            filters = {name: items for name, items in selection.items() if isinstance(items, list)}
+            for name, counts in data.facets.items():
+                all_keys = (
+                    index.percentage_postings[name] if name in index.percentage_postings else index.postings[name]
+                )
+                for key in all_keys:
+                    item = f"{key}(0,100)" if name in index.percentage_postings else key
+                    selected = [selected for selected in filters.get(name, []) if selected.split("(")[0] == key]
+                    items = filters.get(name, []) + ([] if selected else [item])
+                    expected = index.search({**filters, name: items}, exact_match, inner_exact_match).bit_count()
+                    assert counts.get(key, 0) == expected, (selection, name, key)
+
+    # Facets counted while a filter update cleared the cache are not stored
+    index = super_search_index.get(db)
+    count_items = index._count_items
+
+    def count_items_during_update(*args):
+        index.facets_generation += 1
+        return count_items(*args)
+
+    monkeypatch.setattr(index, "_count_items", count_items_during_update)
+    index.facets_cache.clear()
+    index.facet_counts({"genre": ["drama(10,100)"]})
+    assert not index.facets_cache
+
+
+def test_edit_movie_keywords_diff(client: TestClient, db: Session, auth_user_owner: m.User, monkeypatch):
+    monkeypatch.setattr(CFG, "SUPER_SEARCH_BACKEND", "memory")
+
+    movie = max(db.scalars(sa.select(m.Movie)), key=lambda movie: len(movie.keywords))
+    assert len(movie.keywords) > 1
+    kept, *removed = movie.keywords
+    new_keyword = db.scalar(sa.select(m.Keyword).where(m.Keyword.id.not_in([k.id for k in movie.keywords])))
+    assert new_keyword
+
+    def search_keys(keyword_key: str) -> list[str]:
+        response = client.get("/api/movies/super-search/", params={"keyword": f"{keyword_key}(0,100)", "size": 100})
+        assert response.status_code == status.HTTP_200_OK
+        return [movie.key for movie in s.PaginationDataOut.model_validate(response.json()).items]
+
+    assert movie.key not in search_keys(new_keyword.key)
+    index = super_search_index._index
+    assert index
+    kept_posting = index.percentage_postings["keyword"][kept.key]
+    kept_postings = list(zip(kept_posting.percentages, kept_posting.movie_ids))
+
+    items = [
+        {"key": kept.key, "name": kept.key, "percentage_match": 42.0},
+        {"key": new_keyword.key, "name": new_keyword.key, "percentage_match": 100.0},
+    ]
+    with count_queries(db) as statements:
+        response = client.put(
+            "/api/movies/keywords/",
+            json={"movie_key": movie.key, "items": items},
+            params={"user_uuid": auth_user_owner.uuid},
+        )
+    assert response.status_code == status.HTTP_200_OK
+
+    # One DELETE, INSERT and UPDATE of movie keywords
+    writes = [
+        statement.split()[0]
+        for statement in statements
+        if "movie_keywords" in statement and not statement.lstrip().upper().startswith("SELECT")
+    ]
+    assert sorted(writes) == ["DELETE", "INSERT", "UPDATE"]
+    assert set(
+        db.execute(
+            sa.select(m.movie_keywords.c.keyword_id, m.movie_keywords.c.percentage_match).where(
+                m.movie_keywords.c.movie_id == movie.id
+            )
+        ).tuples()
+    ) == {(kept.id, 42.0), (new_keyword.id, 100.0)}
+
+    # The super search index is updated in place
+    assert super_search_index._index is index
+    assert movie.key in search_keys(new_keyword.key)
+    assert movie.key not in search_keys(removed[0].key)
+    assert movie.key in search_keys(kept.key)
+    assert index.movie_items["keyword"][movie.id] == [kept.key, new_keyword.key]
+    # Posting lists are swapped, a search holding the old one still sees it unchanged
+    assert index.percentage_postings["keyword"][kept.key] is not kept_posting
+    assert list(zip(kept_posting.percentages, kept_posting.movie_ids)) == kept_postings
+    _, facets = index.facet_counts({"keyword": [f"{new_keyword.key}(0,100)"]}, exact_match=True)
+    assert (
+        facets["keyword"][kept.key]
+        == index.search({"keyword": [f"{new_keyword.key}(0,100)", f"{kept.key}(0,100)"]}, exact_match=True).bit_count()
+    )
+
+    # Unknown keyword
+    items.append({"key": "unknown-keyword", "name": "Unknown", "percentage_match": 10.0})
+    response = client.put(
+        "/api/movies/keywords/",
+        json={"movie_key": movie.key, "items": items},
+        params={"user_uuid": auth_user_owner.uuid},
+    )
+    assert response.status_code == status.HTTP_404_NOT_FOUND
 
 
 def test_get_movie_genres_subgenres(client: TestClient, db: Session, auth_user_owner: m.User, auth_simple_user: m.User):
@@ -432,3 +1044,97 @@ def test_get_movie_genres_subgenres(client: TestClient, db: Session, auth_user_o
         "/api/movies/genres-subgenres/", params={"movie_key": movie.key, "user_uuid": auth_simple_user.uuid}
     )
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_import_movies_in_batches(db: Session):
+    from app.commands.export_movies import write_movies_in_db
+
+    with open("data/movies.json", "r") as file:
+        movies = s.MoviesJSONFile.model_validate(json.load(file)).movies[:5]
+
+    def get_movie_rows(key: str):
+        movie = db.scalar(sa.select(m.Movie).where(m.Movie.key == key))
+        assert movie
+        return (
+            movie.get_title(s.Language.EN),
+            movie.average_rating,
+            movie.ratings_count,
+            movie.average_by_criteria,
+            sorted(actor.id for actor in movie.actors),
+            sorted(director.id for director in movie.directors),
+            sorted(
+                db.execute(
+                    sa.select(m.movie_genres.c.genre_id, m.movie_genres.c.percentage_match).where(
+                        m.movie_genres.c.movie_id == movie.id
+                    )
+                ).all()
+            ),
+            sorted(
+                db.execute(
+                    sa.select(m.movie_keywords.c.keyword_id, m.movie_keywords.c.percentage_match).where(
+                        m.movie_keywords.c.movie_id == movie.id
+                    )
+                ).all()
+            ),
+        )
+
+    batch_movies = [movie.model_copy(update={"key": f"{movie.key}-batch"}) for movie in movies]
+    row_movies = [movie.model_copy(update={"key": f"{movie.key}-row"}) for movie in movies]
+
+    write_movies_in_db(batch_movies, batch_size=2)
+    write_movies_in_db(row_movies, row_by_row=True)
+
+    for batch_movie, row_movie in zip(batch_movies, row_movies):
+        assert get_movie_rows(batch_movie.key) == get_movie_rows(row_movie.key)
+
+    # Existing movies are skipped
+    movies_count = db.scalars(sa.select(sa.func.count(m.Movie.id))).one()
+    write_movies_in_db(batch_movies)
+    assert db.scalar(sa.select(sa.func.count(m.Movie.id))) == movies_count
+
+    # A key repeated in the sheet is imported once, from its first row
+    repeated_movies = [
+        movies[0].model_copy(update={"key": "repeated-movie"}),
+        movies[1].model_copy(update={"key": "repeated-movie"}),
+    ]
+    write_movies_in_db(repeated_movies)
+    assert db.scalar(sa.select(sa.func.count(m.Movie.id))) == movies_count + 1
+    repeated_movie = db.scalar(sa.select(m.Movie).where(m.Movie.key == "repeated-movie"))
+    assert repeated_movie and repeated_movie.get_title(s.Language.EN) == movies[0].title_en
+
+
+def test_async_read_routes(client: TestClient, db: Session, monkeypatch):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    movie = db.scalar(sa.select(m.Movie))
+    assert movie
+    genre = movie.genres[0]
+
+    requests = [
+        ("/api/movies/", {"sort_by": s.SortBy.RELEASE_DATE.value}),
+        (f"/api/movies/{movie.key}", {}),
+        ("/api/movies/super-search/", {"genre": genre.key}),
+        ("/api/movies/search/", {"query": movie.get_title(s.Language.EN)}),
+    ]
+
+    # Threadpool fallback (no async engine)
+    sync_responses = []
+    for url, params in requests:
+        response = client.get(url, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        sync_responses.append(response.json())
+
+    database_url = db.get_bind().engine.url
+    if database_url.get_backend_name() != "sqlite":
+        pytest.skip("async engine test runs on the sqlite test database")
+    async_engine = create_async_engine(database_url.set(drivername="sqlite+aiosqlite"), poolclass=NullPool)
+    monkeypatch.setattr(app.database, "async_session_maker", async_sessionmaker(async_engine, expire_on_commit=False))
+
+    for (url, params), sync_response in zip(requests, sync_responses):
+        with count_queries(async_engine.sync_engine) as statements:
+            response = client.get(url, params=params)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == sync_response
+        assert statements
@@ -0,0 +1,42 @@
+import sqlalchemy as sa
+
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from api.controllers.query_metrics import query_metrics
+from app import models as m
+
+
+def test_query_metrics(client: TestClient, db: Session, monkeypatch):
+    movie = db.scalar(sa.select(m.Movie))
+    assert movie
+
+    # Disabled by default
+    response = client.get(f"/api/movies/{movie.key}")
+    assert response.status_code == status.HTTP_200_OK
+    assert "Server-Timing" not in response.headers
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    monkeypatch.setattr(query_metrics, "enabled", True)
+    query_metrics.clear()
+
+    response = client.get(f"/api/movies/{movie.key}")
+    assert response.status_code == status.HTTP_200_OK
+    server_timing = response.headers["Server-Timing"]
+    assert server_timing.startswith("db;dur=")
+    assert "db-slowest;dur=" in server_timing
+
+    route_stats = query_metrics.get_route_stats("GET", "/api/movies/{movie_key}")
+    assert route_stats
+    assert route_stats.requests_count == 1
+    assert route_stats.statements_count
+    assert route_stats.slowest_statement
+    assert f'desc="{route_stats.statements_count} statements"' in server_timing
+
+    response = client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert 'api_requests_total{method="GET",route="/api/movies/{movie_key}"} 1' in response.text
+    assert "# TYPE api_db_statements_total counter" in response.text
+
+    query_metrics.clear()
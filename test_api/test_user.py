@@ -1,16 +1,48 @@
+from datetime import datetime
+
+import pytest
 import sqlalchemy as sa
 
 from fastapi import status
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
+from api.controllers.movie_rating import (
+    BASE_CRITERIA,
+    OPTIONAL_CRITERIA,
+    get_rating_aggregates,
+    recalculate_movies_rating,
+)
+from api.controllers.user_stats import recalculate_users_stats
+from api.controllers.users_cache import users_cache
 from app import models as m
 
 from app import schema as s
 from config import config
+from test_api.utils import count_queries
 
 CFG = config()
 
 
+def get_expected_rating_values(movie: m.Movie) -> dict:
+    """Rating aggregates of the movie calculated in Python from its ratings"""
+
+    def average(field: str) -> float:
+        values = [getattr(rating, field) for rating in movie.ratings if getattr(rating, field) is not None]
+        return round(sum(values) / len(values), 2) if values else 0.0
+
+    return dict(
+        average_rating=average("rating"),
+        ratings_count=len(movie.ratings),
+        average_by_criteria={
+            **{criterion: average(criterion) for criterion in BASE_CRITERIA},
+            **{
+                criterion: average(criterion) if movie.rating_criterion == movie_criterion else None
+                for criterion, movie_criterion in OPTIONAL_CRITERIA.items()
+            },
+        },
+    )
+
+
 def test_rate_movie(client: TestClient, db: Session):
     movie = db.scalar(sa.select(m.Movie))
     assert movie
@@ -21,6 +53,10 @@ def test_rate_movie(client: TestClient, db: Session):
     rating = db.scalar(sa.select(m.Rating))
     assert rating
 
+    # Seed data has ratings imported after the movies
+    recalculate_movies_rating(db)
+    db.commit()
+
     # Test add new rate
     data_in = s.UserRateMovieIn(
         uuid=user.uuid,
@@ -63,6 +99,130 @@ def test_rate_movie(client: TestClient, db: Session):
     ratings_values = [rating.rating for rating in movie.ratings if rating.user_id == user.id]
     assert data_in.rating in ratings_values
 
+    # Incrementally updated aggregates match the full recalculation (up to rounding drift)
+    db.refresh(movie)
+    aggregates = get_rating_aggregates(db, [movie.id])[movie.id]
+    assert movie.ratings_count == aggregates["ratings_count"]
+    assert movie.average_rating == pytest.approx(aggregates["average_rating"], abs=0.02)
+    for criterion, average in aggregates["average_by_criteria"].items():
+        if average is None:
+            assert movie.average_by_criteria[criterion] is None
+        else:
+            assert movie.average_by_criteria[criterion] == pytest.approx(average, abs=0.02)
+
+
+def test_recalculate_movies_rating(db: Session):
+    movies_count = recalculate_movies_rating(db)
+    db.commit()
+    assert movies_count
+
+    for movie in db.scalars(sa.select(m.Movie)):
+        expected = get_expected_rating_values(movie)
+        assert movie.average_rating == expected["average_rating"]
+        assert movie.ratings_count == expected["ratings_count"]
+        assert movie.average_by_criteria == expected["average_by_criteria"]
+
+
+def test_write_ratings_in_db(db: Session):
+    from app.commands.export_rating import write_ratings_in_db
+
+    user = db.scalar(sa.select(m.User).where(m.User.role == s.UserRole.USER.value))
+    assert user
+    rated_movie_ids = sa.select(m.Rating.movie_id).where(m.Rating.user_id == user.id)
+    movie_ids = db.scalars(sa.select(m.Movie.id).where(m.Movie.id.not_in(rated_movie_ids)).limit(2)).all()
+    assert len(movie_ids) == 2
+    ratings_count = db.scalars(sa.select(sa.func.count(m.Rating.id))).one()
+    db.commit()
+
+    def rating_in(movie_id: int, rating: float) -> s.RatingExportCreate:
+        return s.RatingExportCreate(
+            id=0,
+            movie_id=movie_id,
+            user_id=user.id,
+            rating=rating,
+            acting=rating / 6,
+            plot_storyline=rating / 6,
+            script_dialogue=rating / 6,
+            music=rating / 6,
+            enjoyment=rating / 6,
+            production_design=rating / 6,
+            created_at=datetime(2024, 1, 1),
+            updated_at=datetime(2024, 1, 1),
+        )
+
+    def get_rating(movie_id: int) -> float | None:
+        return db.scalar(sa.select(m.Rating.rating).where(m.Rating.user_id == user.id, m.Rating.movie_id == movie_id))
+
+    write_ratings_in_db([rating_in(movie_ids[0], 3.0)])
+    # The same movie twice: the last rating wins
+    write_ratings_in_db([rating_in(movie_ids[0], 1.2), rating_in(movie_ids[1], 3.0), rating_in(movie_ids[0], 6.0)])
+
+    db.expire_all()
+    assert db.scalar(sa.select(sa.func.count(m.Rating.id))) == ratings_count + 2
+    assert get_rating(movie_ids[0]) == 6.0
+    assert get_rating(movie_ids[1]) == 3.0
+
+    # Aggregates of the touched movies and stats of the user are recalculated
+    for movie in db.scalars(sa.select(m.Movie).where(m.Movie.id.in_(movie_ids))):
+        expected = get_expected_rating_values(movie)
+        assert movie.average_rating == expected["average_rating"]
+        assert movie.ratings_count == expected["ratings_count"]
+    stats = db.scalar(sa.select(m.UserStats).where(m.UserStats.user_id == user.id))
+    assert stats
+    assert stats.ratings_count == 2
+
+
+def test_user_stats(client: TestClient, db: Session, auth_simple_user: m.User):
+    def get_stats() -> tuple:
+        db.expire_all()
+        stats = db.scalar(sa.select(m.UserStats).where(m.UserStats.user_id == auth_simple_user.id))
+        assert stats
+        genres = db.execute(
+            sa.select(m.user_genre_stats.c.genre_id, m.user_genre_stats.c.movies_count)
+            .where(m.user_genre_stats.c.user_id == auth_simple_user.id, m.user_genre_stats.c.movies_count > 0)
+            .order_by(m.user_genre_stats.c.genre_id)
+        ).all()
+        return stats.ratings_count, stats.top_rated, genres
+
+    rated_movie_ids = sa.select(m.Rating.movie_id).where(m.Rating.user_id == auth_simple_user.id)
+    movie = db.scalar(sa.select(m.Movie).where(m.Movie.id.not_in(rated_movie_ids)))
+    assert movie
+
+    # Reading the report doesn't write stats
+    response = client.get("/api/users/info-report/", params={"user_uuid": auth_simple_user.uuid})
+    assert response.status_code == status.HTTP_200_OK
+    assert not db.scalar(sa.select(m.UserStats).where(m.UserStats.user_id == auth_simple_user.id))
+
+    recalculate_users_stats(db, [auth_simple_user.id])
+    db.commit()
+    ratings_count, _, _ = get_stats()
+
+    for method, rating in (client.post, 9.99), (client.put, 0.5):
+        data_in = s.UserRateMovieIn(
+            uuid=auth_simple_user.uuid,
+            movie_key=movie.key,
+            rating=rating,
+            rating_criteria=s.RatingCriteria(
+                acting=1, plot_storyline=1, script_dialogue=1, music=1, enjoyment=1, production_design=1
+            ),
+        )
+        response = method(f"/api/users/rate-movie/{auth_simple_user.uuid}", json=data_in.model_dump())
+        assert response.status_code in (status.HTTP_200_OK, status.HTTP_201_CREATED)
+
+        # Incrementally updated stats match the full recalculation
+        stats = get_stats()
+        recalculate_users_stats(db, [auth_simple_user.id])
+        db.commit()
+        assert stats == get_stats()
+        assert stats[0] == ratings_count + 1
+
+    response = client.get("/api/users/info-report/", params={"user_uuid": auth_simple_user.uuid})
+    assert response.status_code == status.HTTP_200_OK
+    data = s.UserInfoReport.model_validate(response.json())
+    assert data.movies_rated == ratings_count + 1
+    assert sum(genre.count for genre in data.genre_data) >= data.movies_rated
+    assert data.last_movie_rate_date
+
 
 def test_get_time_rate_chart_movies(client: TestClient, auth_user_owner: m.User):
     assert auth_user_owner.ratings
@@ -108,6 +268,42 @@ def test_set_language(client: TestClient, auth_simple_user: m.User):
     assert auth_simple_user.preferred_language == lang
 
 
+def test_users_cache(client: TestClient, db: Session, auth_simple_user: m.User):
+    """Cached user identities and the owner are resolved without user queries"""
+
+    movie = db.scalar(sa.select(m.Movie))
+    assert movie
+    user_uuid = auth_simple_user.uuid
+    response = client.get(f"/api/movies/{movie.key}", params={"user_uuid": user_uuid})
+    assert response.status_code == status.HTTP_200_OK
+    assert users_cache.get(user_uuid)
+    assert users_cache.owner
+
+    # Next request has an empty session
+    db.expunge_all()
+    with count_queries(db) as statements:
+        response = client.get(f"/api/movies/{movie.key}", params={"user_uuid": user_uuid})
+    assert response.status_code == status.HTTP_200_OK
+    assert not [statement for statement in statements if "FROM users" in statement]
+
+    # Changing the language invalidates the identity
+    response = client.put(f"/api/users/language/{user_uuid}", params={"lang": s.Language.EN.value})
+    assert response.status_code == status.HTTP_200_OK
+    assert not users_cache.get(user_uuid)
+
+    response = client.get(f"/api/movies/{movie.key}", params={"user_uuid": user_uuid})
+    identity = users_cache.get(user_uuid)
+    assert identity
+    assert identity.preferred_language == s.Language.EN.value
+
+    # Deleted user is not authorized anymore
+    response = client.delete("/api/auth/google", params={"user_uuid": user_uuid})
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert not users_cache.get(user_uuid)
+    response = client.get(f"/api/movies/{movie.key}", params={"user_uuid": user_uuid})
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
 def test_title_visual_profile_movie(client: TestClient, db: Session, auth_user_owner: m.User):
     OLD_RATING_VALUE = 3
     NEW_RATING_VALUE = 5
@@ -135,8 +331,12 @@ def test_title_visual_profile_movie(client: TestClient, db: Session, auth_user_o
         criteria=criteria[::-1],  # Reverse the order to match the expected input
     )
 
-    response = client.put(f"/api/users/title-visual-profile/{auth_user_owner.uuid}", json=data_in.model_dump())
+    with count_queries(db) as statements:
+        response = client.put(f"/api/users/title-visual-profile/{auth_user_owner.uuid}", json=data_in.model_dump())
     assert response.status_code == status.HTTP_200_OK
+    # Criteria are resolved with one query, ratings are loaded once and updated with one statement
+    assert len([statement for statement in statements if "visual_profile_category_criteria" in statement]) == 1
+    assert len([statement for statement in statements if "visual_profile_ratings" in statement]) == 2
     assert movie.visual_profiles[0].ratings
     assert movie.visual_profiles[0].ratings[0].rating == NEW_RATING_VALUE
     # Check that the order is preserved (max 6)
@@ -165,3 +365,14 @@ def test_title_visual_profile_movie(client: TestClient, db: Session, auth_user_o
     response = client.put(f"/api/users/title-visual-profile/{auth_user_owner.uuid}", json=data_in.model_dump())
     assert response.status_code == status.HTTP_200_OK
     assert movie.visual_profiles[0].category.key == new_category.key
+    assert [rating.criterion_id for rating in movie.visual_profiles[0].ratings] == [
+        criterion.id for criterion in new_category.criteria
+    ]
+
+    # Unknown criterion: nothing is changed
+    data_in.criteria[-1].key = "unknown-criterion"
+    data_in.criteria[0].rating = OLD_RATING_VALUE
+    response = client.put(f"/api/users/title-visual-profile/{auth_user_owner.uuid}", json=data_in.model_dump())
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+    db.expire_all()
+    assert movie.visual_profiles[0].ratings[0].rating == NEW_RATING_VALUE
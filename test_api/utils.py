@@ -1,6 +1,10 @@
-from typing import Any
+from contextlib import contextmanager
+from typing import Any, Generator
 import re
 
+from sqlalchemy import Engine, event
+from sqlalchemy.orm import Session
+
 
 def do_nothing(*_: list[Any]) -> None:
     return None
@@ -13,3 +17,20 @@ def regexp_replace(text, pattern, replacement, flags=""):
     if "i" in flags.lower():
         regex_flags |= re.IGNORECASE
     return re.sub(pattern, replacement, text, flags=regex_flags)
+
+
+@contextmanager
+def count_queries(db: Session | Engine) -> Generator[list[str], None, None]:
+    """Collect SQL statements executed by the session (or given) engine"""
+
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind() if isinstance(db, Session) else db
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)